@@ -1,38 +1,159 @@
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, Response, stream_with_context
 import logging
 import os
 import traceback
-from json import loads
+from json import loads, dumps
 
+import batch
+import clients
+import llm_router
+import response_cache
 import route
-import toolkit
+import thalamus
+import tracing
+import warmup
+from telemetry import telemetry
+from streaming import STREAM_HEADERS, SSE_DONE, SSE_ERROR, stream_mode, sse_event
 
 app = Flask(__name__)
 
+# Provider SDKs load lazily, warm them on a background thread instead of at import
+if os.environ.get("PRELOAD_PROVIDERS", "1") == "1":
+    clients.preload_in_background()
+
+# Probe every backend concurrently and keep readiness fresh for /healthz and routing
+if os.environ.get("WARMUP", "1") == "1":
+    warmup.start()
+
+def sse_events(chunks, trace):
+    # The request span ends once the last chunk has been sent
+    tracing.activate(trace)
+    try:
+        for chunk in chunks:
+            yield sse_event(chunk)
+        yield SSE_DONE
+    except Exception as e:
+        # Headers are already sent, so report the failure in-band
+        stack_trace = traceback.format_exc()
+        logging.error(f"Error while streaming:\n{stack_trace}")
+        trace.end(error=e)
+        yield SSE_ERROR
+    finally:
+        trace.end()
+
+def chunked_text(chunks, trace):
+    tracing.activate(trace)
+    try:
+        for chunk in chunks:
+            yield chunk
+    except Exception as e:
+        stack_trace = traceback.format_exc()
+        logging.error(f"Error while streaming:\n{stack_trace}")
+        trace.end(error=e)
+    finally:
+        trace.end()
+
 @app.route('/routePrompt', methods=['GET','POST'])
 def routePrompt():
+    trace = tracing.start_span("request", endpoint="routePrompt")
+    tracing.activate(trace)
+    parse = tracing.start_span("request.parse")
     try:
         _data = request.get_data(as_text=True, parse_form_data=True)
         data = loads(_data)
         phrase = data.get("text")
         if not phrase:
             raise ValueError("Text parameter is missing.")
+        # Optional latency SLO for the first token, lets the router trade cost for speed
+        slo_ttft = float(data["slo_ms"]) / 1000 if data.get("slo_ms") is not None else None
+        parse.end()
         
-        # Assuming route_query returns some kind of result
-        result = route.route_query(phrase)
-        
-        # Use jsonify to return a proper JSON response
-        return jsonify(result)
+        # route_query is a generator, chunks are forwarded as the provider produces them
+        chunks = route.route_query(phrase, slo_ttft=slo_ttft)
+        mode = stream_mode(data, request.args, request.headers)
+
+        if mode == "sse":
+            return Response(stream_with_context(sse_events(chunks, trace)), mimetype="text/event-stream", headers=STREAM_HEADERS)
+        if mode == "chunked":
+            return Response(stream_with_context(chunked_text(chunks, trace)), mimetype="text/plain; charset=utf-8", headers=STREAM_HEADERS)
+
+        # Non-streaming fallback, collect the whole generation into one JSON body
+        response = "".join(chunks)
+        trace.end()
+        return jsonify({"response": response})
     
     except ValueError as ve:
+        parse.end(error=ve)
+        trace.end(error=ve)
         stack_trace = traceback.format_exc()
         logging.error(f"Validation error:\n{stack_trace}")
         return jsonify({"error": f"Validation error:\n{stack_trace}"}), 400
     
     except Exception as e:
+        parse.end(error=e)
+        trace.end(error=e)
         stack_trace = traceback.format_exc()
         logging.error(f"Error moderating text:\n{stack_trace}")
         return jsonify({"error": f"Unexpected error occurred:\n{stack_trace}"}), 500
 
+@app.route('/routeBatch', methods=['POST'])
+def routeBatch():
+    try:
+        prompts = batch.parse_batch(request.get_data(as_text=True), request.content_type or "")
+        slo_ttft = float(request.args["slo_ms"]) / 1000 if request.args.get("slo_ms") else None
+
+        # One NDJSON line per prompt, in completion order, tagged with its input index
+        def ndjson():
+            for result in batch.run_batch(prompts, slo_ttft):
+                yield dumps(result) + "\n"
+
+        return Response(stream_with_context(ndjson()), mimetype="application/x-ndjson", headers=STREAM_HEADERS)
+
+    except ValueError as ve:
+        stack_trace = traceback.format_exc()
+        logging.error(f"Validation error:\n{stack_trace}")
+        return jsonify({"error": f"Validation error:\n{stack_trace}"}), 400
+
+    except Exception as e:
+        stack_trace = traceback.format_exc()
+        logging.error(f"Error routing batch:\n{stack_trace}")
+        return jsonify({"error": f"Unexpected error occurred:\n{stack_trace}"}), 500
+
+@app.route('/healthz', methods=['GET'])
+def healthz():
+    # 200 once any backend has passed its warm-up probe, 503 until then
+    ready = warmup.readiness.ready()
+    return jsonify({"ready": ready, "backends": warmup.readiness.snapshot()}), 200 if ready else 503
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    # Prometheus scrape target, span durations per phase and model
+    return Response(tracing.render_metrics(), mimetype="text/plain; version=0.0.4")
+
+@app.route('/connectionStats', methods=['GET'])
+def connectionStats():
+    # Pooled provider connections, reuse_ratio should approach 1 under steady load
+    return jsonify(clients.connection_reuse())
+
+@app.route('/cacheStats', methods=['GET'])
+def cacheStats():
+    cache = response_cache.get_cache()
+    return jsonify({
+        "routing": thalamus.routing_cache.stats(),
+        "router_prefix": llm_router.stats(),
+        "responses": cache.stats() if cache else None,
+        "coalescing": route.in_flight.stats(),
+    })
+
+@app.route('/schedulerStats', methods=['GET'])
+def schedulerStats():
+    # Per-backend concurrency limit, queue depth and queue time
+    return jsonify({"backends": route.scheduler.stats(), "execution": route.policy.stats()})
+
+@app.route('/telemetry', methods=['GET'])
+def telemetryStats():
+    # Rolling per-model TTFT, tokens/sec, error rate and price
+    return jsonify(telemetry.stats())
+
 if __name__ == "__main__":
-    app.run(host='0.0.0.0', port=4999)
+    app.run(host='0.0.0.0', port=4999, threaded=True)
@@ -0,0 +1,158 @@
+from quart import Quart, request, jsonify, Response
+import logging
+import os
+import traceback
+from json import loads, dumps
+
+import batch
+import clients
+import llm_router
+import response_cache
+import route
+import thalamus
+import tracing
+import warmup
+from telemetry import telemetry
+from streaming import STREAM_HEADERS, SSE_DONE, SSE_ERROR, stream_mode, sse_event
+
+# Async twin of app.py. Provider streams are awaited, so one process holds many
+# in-flight generations instead of pinning a worker thread to each.
+# Run with: hypercorn asgi:app --bind 0.0.0.0:4999
+app = Quart(__name__)
+
+@app.before_serving
+async def warm_providers():
+    if os.environ.get("PRELOAD_PROVIDERS", "1") == "1":
+        clients.preload_in_background()
+    if os.environ.get("WARMUP", "1") == "1":
+        warmup.start()
+
+async def sse_events(chunks, trace):
+    # The request span ends once the last chunk has been sent
+    tracing.activate(trace)
+    try:
+        async for chunk in chunks:
+            yield sse_event(chunk)
+        yield SSE_DONE
+    except Exception as e:
+        stack_trace = traceback.format_exc()
+        logging.error(f"Error while streaming:\n{stack_trace}")
+        trace.end(error=e)
+        yield SSE_ERROR
+    finally:
+        trace.end()
+
+async def chunked_text(chunks, trace):
+    tracing.activate(trace)
+    try:
+        async for chunk in chunks:
+            yield chunk
+    except Exception as e:
+        stack_trace = traceback.format_exc()
+        logging.error(f"Error while streaming:\n{stack_trace}")
+        trace.end(error=e)
+    finally:
+        trace.end()
+
+@app.route('/routePrompt', methods=['GET','POST'])
+async def routePrompt():
+    trace = tracing.start_span("request", endpoint="routePrompt")
+    tracing.activate(trace)
+    parse = tracing.start_span("request.parse")
+    try:
+        _data = await request.get_data(as_text=True)
+        data = loads(_data)
+        phrase = data.get("text")
+        if not phrase:
+            raise ValueError("Text parameter is missing.")
+        # Optional latency SLO for the first token, lets the router trade cost for speed
+        slo_ttft = float(data["slo_ms"]) / 1000 if data.get("slo_ms") is not None else None
+        parse.end()
+
+        chunks = route.aroute_query(phrase, slo_ttft=slo_ttft)
+        mode = stream_mode(data, request.args, request.headers)
+
+        if mode == "sse":
+            return Response(sse_events(chunks, trace), mimetype="text/event-stream", headers=STREAM_HEADERS)
+        if mode == "chunked":
+            return Response(chunked_text(chunks, trace), mimetype="text/plain; charset=utf-8", headers=STREAM_HEADERS)
+
+        response = "".join([chunk async for chunk in chunks])
+        trace.end()
+        return jsonify({"response": response})
+
+    except ValueError as ve:
+        parse.end(error=ve)
+        trace.end(error=ve)
+        stack_trace = traceback.format_exc()
+        logging.error(f"Validation error:\n{stack_trace}")
+        return jsonify({"error": f"Validation error:\n{stack_trace}"}), 400
+
+    except Exception as e:
+        parse.end(error=e)
+        trace.end(error=e)
+        stack_trace = traceback.format_exc()
+        logging.error(f"Error moderating text:\n{stack_trace}")
+        return jsonify({"error": f"Unexpected error occurred:\n{stack_trace}"}), 500
+
+@app.route('/routeBatch', methods=['POST'])
+async def routeBatch():
+    try:
+        prompts = batch.parse_batch(await request.get_data(as_text=True), request.content_type or "")
+        slo_ttft = float(request.args["slo_ms"]) / 1000 if request.args.get("slo_ms") else None
+
+        # One NDJSON line per prompt, in completion order, tagged with its input index
+        async def ndjson():
+            async for result in batch.arun_batch(prompts, slo_ttft):
+                yield dumps(result) + "\n"
+
+        return Response(ndjson(), mimetype="application/x-ndjson", headers=STREAM_HEADERS)
+
+    except ValueError as ve:
+        stack_trace = traceback.format_exc()
+        logging.error(f"Validation error:\n{stack_trace}")
+        return jsonify({"error": f"Validation error:\n{stack_trace}"}), 400
+
+    except Exception as e:
+        stack_trace = traceback.format_exc()
+        logging.error(f"Error routing batch:\n{stack_trace}")
+        return jsonify({"error": f"Unexpected error occurred:\n{stack_trace}"}), 500
+
+@app.route('/healthz', methods=['GET'])
+async def healthz():
+    # 200 once any backend has passed its warm-up probe, 503 until then
+    ready = warmup.readiness.ready()
+    return jsonify({"ready": ready, "backends": warmup.readiness.snapshot()}), 200 if ready else 503
+
+@app.route('/metrics', methods=['GET'])
+async def metrics():
+    # Prometheus scrape target, span durations per phase and model
+    return Response(tracing.render_metrics(), mimetype="text/plain; version=0.0.4")
+
+@app.route('/connectionStats', methods=['GET'])
+async def connectionStats():
+    # Pooled provider connections, reuse_ratio should approach 1 under steady load
+    return jsonify(clients.connection_reuse())
+
+@app.route('/cacheStats', methods=['GET'])
+async def cacheStats():
+    cache = response_cache.get_cache()
+    return jsonify({
+        "routing": thalamus.routing_cache.stats(),
+        "router_prefix": llm_router.stats(),
+        "responses": cache.stats() if cache else None,
+        "coalescing": route.async_in_flight.stats(),
+    })
+
+@app.route('/schedulerStats', methods=['GET'])
+async def schedulerStats():
+    # Per-backend concurrency limit, queue depth and queue time
+    return jsonify({"backends": route.scheduler.stats(), "execution": route.policy.stats()})
+
+@app.route('/telemetry', methods=['GET'])
+async def telemetryStats():
+    # Rolling per-model TTFT, tokens/sec, error rate and price
+    return jsonify(telemetry.stats())
+
+if __name__ == "__main__":
+    app.run(host='0.0.0.0', port=4999)
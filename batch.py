@@ -0,0 +1,110 @@
+import asyncio
+import os
+import queue
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from json import loads
+
+import route
+import thalamus
+from scheduler import PRIORITY_BATCH
+
+# Bulk routing: parse a JSON array or NDJSON body, route every prompt in one
+# pass, then run the generations with bounded parallelism at batch priority
+# and hand results back in completion order.
+
+BATCH_PARALLELISM = int(os.environ.get("BATCH_PARALLELISM", 32))
+BATCH_MAX_ITEMS = int(os.environ.get("BATCH_MAX_ITEMS", 100000))
+
+def parse_batch(body, content_type=""):
+    """
+    Accept either a JSON array (of strings or {"text": ...} objects), an
+    object with a "prompts" array, or NDJSON with one prompt per line.
+
+    :return: A list of prompt strings
+    """
+    if "ndjson" in content_type or "jsonlines" in content_type:
+        items = [loads(line) for line in body.splitlines() if line.strip()]
+    else:
+        items = loads(body)
+        if isinstance(items, dict):
+            items = items.get("prompts")
+    if not isinstance(items, list) or not items:
+        raise ValueError("Expected a non-empty JSON array or NDJSON body of prompts.")
+    if len(items) > BATCH_MAX_ITEMS:
+        raise ValueError(f"Batch too large: {len(items)} prompts, the limit is {BATCH_MAX_ITEMS}.")
+
+    prompts = []
+    for i, item in enumerate(items):
+        text = item.get("text") if isinstance(item, dict) else item
+        if not isinstance(text, str) or not text:
+            raise ValueError(f"Prompt {i} has no text.")
+        prompts.append(text)
+    return prompts
+
+def plan(prompts, slo_ttft=None):
+    """
+    Route every prompt and order the work grouped by target model, so
+    requests to one backend go out together over its warm connections.
+
+    :return: [(index, model, prompt), ...]
+    """
+    decisions = thalamus.route_batch(prompts, slo_ttft)
+    groups = defaultdict(list)
+    for i, (prompt, (model, _)) in enumerate(zip(prompts, decisions)):
+        groups[model].append((i, model, prompt))
+    return [item for model in groups for item in groups[model]]
+
+def _complete(index, model, prompt):
+    try:
+        return {"index": index, "model": model, "response": "".join(route.stream_model(model, prompt, PRIORITY_BATCH))}
+    except Exception as e:
+        return {"index": index, "model": model, "error": str(e)}
+
+def _deliver(results, index, model, future):
+    # Every future must put exactly one result, or the consumer waits forever
+    if future.cancelled():
+        results.put({"index": index, "model": model, "error": "cancelled"})
+    else:
+        results.put(future.result())
+
+def run_batch(prompts, slo_ttft=None, parallelism=BATCH_PARALLELISM):
+    """
+    Generate a response for every prompt.
+
+    :return: An iterator of result dicts in completion order
+    """
+    work = plan(prompts, slo_ttft)
+    results = queue.Queue()
+    executor = ThreadPoolExecutor(max_workers=min(parallelism, len(work)), thread_name_prefix="batch")
+    try:
+        for index, model, prompt in work:
+            executor.submit(_complete, index, model, prompt).add_done_callback(partial(_deliver, results, index, model))
+        for _ in range(len(work)):
+            yield results.get()
+    finally:
+        # A disconnected client should not keep paying for the rest of the batch
+        executor.shutdown(wait=False, cancel_futures=True)
+
+async def arun_batch(prompts, slo_ttft=None, parallelism=BATCH_PARALLELISM):
+    # Routing a large batch is CPU bound, and a blocking call with ROUTER_MODE=llm
+    work = await asyncio.to_thread(plan, prompts, slo_ttft)
+    semaphore = asyncio.Semaphore(parallelism)
+
+    async def complete(index, model, prompt):
+        async with semaphore:
+            try:
+                chunks = [chunk async for chunk in route.astream_model(model, prompt, PRIORITY_BATCH)]
+                return {"index": index, "model": model, "response": "".join(chunks)}
+            except Exception as e:
+                return {"index": index, "model": model, "error": str(e)}
+
+    tasks = [asyncio.ensure_future(complete(*item)) for item in work]
+    try:
+        for finished in asyncio.as_completed(tasks):
+            yield await finished
+    finally:
+        for task in tasks:
+            task.cancel()
@@ -0,0 +1,68 @@
+"""
+Tail latency with and without hedging, against fake providers whose primary
+backend has a heavy-tailed time to first token and injected failures.
+
+    python benchmarks/hedging_bench.py --requests 200 --slow-fraction 0.1
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from functools import partial
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import route
+import stub_providers
+from execution import ExecutionPolicy
+from telemetry import Telemetry
+
+
+def percentile(samples, p):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))]
+
+
+def heavy_tailed_query(query, rng, slow_fraction, slow_ttft, failure_rate):
+    ttft = slow_ttft if rng.random() < slow_fraction else 0.1
+    return stub_providers.stub_query(query, ttft=ttft, chunks=5, interval=0.01, failure_rate=failure_rate)
+
+
+def run(policy, requests, model):
+    latencies, errors = [], 0
+    for i in range(requests):
+        start = time.perf_counter()
+        try:
+            for _ in policy.execute(model, f"prompt {i}"):
+                pass
+            latencies.append(time.perf_counter() - start)
+        except Exception:
+            errors += 1
+    return latencies, errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--slow-fraction", type=float, default=0.1)
+    parser.add_argument("--slow-ttft", type=float, default=3.0)
+    parser.add_argument("--failure-rate", type=float, default=0.02)
+    args = parser.parse_args()
+
+    model = "gpt-4"
+    primary = route.backend_for(model)
+    for label, max_hedges in (("no hedging", 0), ("hedged", 1)):
+        providers = {backend: partial(stub_providers.stub_query, ttft=0.1, chunks=5, interval=0.01) for backend in route.PROVIDERS}
+        rng = random.Random(42)
+        providers[primary] = partial(heavy_tailed_query, rng=rng, slow_fraction=args.slow_fraction,
+                                     slow_ttft=args.slow_ttft, failure_rate=args.failure_rate)
+        policy = ExecutionPolicy(providers, route.backend_for, telemetry=Telemetry(), max_hedges=max_hedges)
+        latencies, errors = run(policy, args.requests, model)
+        print(f"{label:<12} p50 {percentile(latencies, 50) * 1000:7.1f}ms  p95 {percentile(latencies, 95) * 1000:7.1f}ms  "
+              f"p99 {percentile(latencies, 99) * 1000:7.1f}ms  errors {errors}  {policy.stats()}")
+
+
+if __name__ == "__main__":
+    main()
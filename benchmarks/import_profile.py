@@ -0,0 +1,72 @@
+"""
+Cold-start import profile of the serving app. Runs `python -X importtime` in a
+fresh interpreter and reports the slowest imports by cumulative time.
+
+    python benchmarks/import_profile.py --module app --top 25 --output import_profile.json
+
+--root profiles another checkout, e.g. a worktree of the commit before a change,
+so before/after reports come from the same script and the same installed SDKs.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def profile(module, root=ROOT):
+    # The SDK preload and warm-up probes import the SDKs on background threads,
+    # which would be counted against the import itself
+    env = dict(os.environ, PRELOAD_PROVIDERS="0", WARMUP="0")
+    start = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=root, env=env, capture_output=True, text=True,
+    )
+    wall = time.perf_counter() - start
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1])
+
+    imports = []
+    for line in proc.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        own, cumulative, name = line[len("import time:"):].split("|", 2)
+        imports.append({
+            "module": name.strip(),
+            "depth": (len(name) - len(name.lstrip()) - 1) // 2,
+            "self_ms": int(own) / 1000,
+            "cumulative_ms": int(cumulative) / 1000,
+        })
+    return wall, imports
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--module", default="app")
+    parser.add_argument("--top", type=int, default=25)
+    parser.add_argument("--root", default=ROOT, help="Checkout to profile, this one by default")
+    parser.add_argument("--output")
+    args = parser.parse_args()
+
+    wall, imports = profile(args.module, args.root)
+    slowest = sorted(imports, key=lambda entry: entry["cumulative_ms"], reverse=True)[:args.top]
+    provider_sdks = {"openai", "anthropic", "google.generativeai", "ollama", "paramiko", "huggingface_hub", "langchain"}
+    eager = sorted(entry["module"] for entry in imports if entry["module"] in provider_sdks)
+
+    print(f"import {args.module}: {wall * 1000:.0f} ms wall, {len(imports)} modules")
+    print(f"provider SDKs imported eagerly: {', '.join(eager) or 'none'}")
+    for entry in slowest:
+        print(f"{entry['cumulative_ms']:9.1f} ms  {'  ' * entry['depth']}{entry['module']}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"module": args.module, "wall_ms": wall * 1000, "eager_sdks": eager, "slowest": slowest}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,263 @@
+"""
+Load generator and soak test for /routePrompt, run against app.py (or asgi.py)
+with every provider stubbed.
+
+    # Latency vs throughput, closed loop: N users each sending back to back
+    python benchmarks/loadgen.py curve --mode closed --levels 10,50,100,200
+    # Open loop: Poisson arrivals at a fixed rate, independent of how fast the server answers
+    python benchmarks/loadgen.py curve --mode open --levels 50,100,200,400 --output curve.json
+    # Memory growth over a long run at fixed load, exits 1 on a leak
+    python benchmarks/loadgen.py soak --concurrency 50 --duration 1800
+
+Prompt sizes are mixed according to --prompt-sizes (characters:weight) and
+every response is consumed as a stream, measuring time to first byte and
+total time. Open-loop latencies include time queued at the server, which is
+what finds the saturation point.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+
+from serving_bench import percentile, stream_request, wait_for_port
+
+WORDS = ("route", "model", "latency", "token", "stream", "prompt", "cache", "budget", "python", "write",
+         "explain", "compare", "summary", "proof", "design", "query", "backend", "answer", "context", "data")
+
+
+def parse_sizes(spec):
+    sizes = []
+    for part in spec.split(","):
+        chars, _, weight = part.partition(":")
+        sizes.append((int(chars), float(weight or 1)))
+    return sizes
+
+
+def make_prompt(rng, sizes, i):
+    chars = rng.choices([s for s, _ in sizes], weights=[w for _, w in sizes])[0]
+    words = [f"request {i}"]
+    length = len(words[0])
+    while length < chars:
+        word = rng.choice(WORDS)
+        words.append(word)
+        length += len(word) + 1
+    return " ".join(words)
+
+
+class Results:
+
+    def __init__(self):
+        self.ttfbs, self.totals, self.errors, self.dropped = [], [], 0, 0
+
+    async def request(self, port, text):
+        try:
+            ttfb, total = await stream_request(port, text)
+        except Exception:
+            self.errors += 1
+            return
+        self.ttfbs.append(ttfb)
+        self.totals.append(total)
+
+    def summary(self, elapsed):
+        def ms(samples, p):
+            return percentile(samples, p) * 1000 if samples else None
+        return {
+            "completed": len(self.totals),
+            "errors": self.errors,
+            "dropped": self.dropped,
+            "throughput_rps": len(self.totals) / elapsed,
+            "ttfb_p50_ms": ms(self.ttfbs, 50),
+            "ttfb_p99_ms": ms(self.ttfbs, 99),
+            "p50_ms": ms(self.totals, 50),
+            "p95_ms": ms(self.totals, 95),
+            "p99_ms": ms(self.totals, 99),
+        }
+
+
+async def closed_loop(port, users, duration, sizes, seed=0, think=0.0):
+    """
+    users clients, each sending its next request as soon as the last one finishes.
+    """
+    results, rng = Results(), random.Random(seed)
+    deadline = time.monotonic() + duration
+    counter = iter(range(10 ** 9))
+
+    async def user():
+        while time.monotonic() < deadline:
+            await results.request(port, make_prompt(rng, sizes, next(counter)))
+            if think:
+                await asyncio.sleep(think)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(user() for _ in range(users)))
+    return results.summary(time.perf_counter() - start)
+
+
+async def open_loop(port, rate, duration, sizes, seed=0, max_outstanding=2000):
+    """
+    Poisson arrivals at rate requests/sec. Arrivals beyond max_outstanding
+    in-flight requests are dropped and counted, rather than slowing the generator.
+    """
+    results, rng = Results(), random.Random(seed)
+    tasks = set()
+    start = time.perf_counter()
+    next_at = time.monotonic()
+    deadline = next_at + duration
+    i = 0
+    while next_at < deadline:
+        await asyncio.sleep(max(next_at - time.monotonic(), 0))
+        if len(tasks) >= max_outstanding:
+            results.dropped += 1
+        else:
+            task = asyncio.ensure_future(results.request(port, make_prompt(rng, sizes, i)))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+        i += 1
+        next_at += rng.expovariate(rate)
+    if tasks:
+        await asyncio.gather(*tasks)
+    return results.summary(time.perf_counter() - start)
+
+
+def rss_mb(pid):
+    # Linux only, resident set size of the server process
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return None
+
+
+def slope_per_hour(points):
+    # Least-squares slope of (seconds, MB) samples, in MB per hour
+    n = len(points)
+    mean_t = sum(t for t, _ in points) / n
+    mean_m = sum(m for _, m in points) / n
+    var = sum((t - mean_t) ** 2 for t, _ in points)
+    return 3600 * sum((t - mean_t) * (m - mean_m) for t, m in points) / var if var else 0.0
+
+
+async def soak(port, pid, users, duration, sizes, sample_every):
+    samples = []
+    start = time.monotonic()
+
+    async def sample():
+        while True:
+            samples.append((time.monotonic() - start, rss_mb(pid)))
+            await asyncio.sleep(sample_every)
+
+    sampler = asyncio.ensure_future(sample())
+    try:
+        summary = await closed_loop(port, users, duration, sizes)
+    finally:
+        sampler.cancel()
+    samples.append((time.monotonic() - start, rss_mb(pid)))
+    # The first fifth is warm-up: pools, caches and allocator arenas filling up
+    steady = [s for s in samples if s[0] >= duration / 5] or samples
+    summary.update({
+        "rss_start_mb": samples[0][1],
+        "rss_steady_start_mb": steady[0][1],
+        "rss_end_mb": samples[-1][1],
+        "rss_growth_mb_per_hour": slope_per_hour(steady) if len(steady) > 1 else 0.0,
+        "rss_samples": samples,
+    })
+    return summary
+
+
+def start_server(args):
+    serving_bench = os.path.join(os.path.dirname(os.path.abspath(__file__)), "serving_bench.py")
+    proc = subprocess.Popen([
+        sys.executable, serving_bench, "--serve", args.server, "--port", str(args.port),
+        "--ttft", str(args.ttft), "--chunks", str(args.chunks), "--interval", str(args.interval),
+    ])
+    wait_for_port(args.port)
+    return proc
+
+
+def print_curve(mode, points):
+    unit = "users" if mode == "closed" else "rate"
+    print(f"{unit:>8}{'rps':>10}{'ttfb p50':>10}{'p50':>10}{'p95':>10}{'p99':>10}{'errors':>8}{'dropped':>9}")
+    for p in points:
+        print(f"{p['level']:>8}{p['throughput_rps']:>10.1f}{p['ttfb_p50_ms'] or 0:>10.1f}{p['p50_ms'] or 0:>10.1f}"
+              f"{p['p95_ms'] or 0:>10.1f}{p['p99_ms'] or 0:>10.1f}{p['errors']:>8}{p['dropped']:>9}")
+
+
+def plot_curve(points, path):
+    try:
+        import matplotlib
+        matplotlib.use("Agg")
+        import matplotlib.pyplot as plt
+    except ImportError:
+        print("matplotlib is not installed, skipping the plot")
+        return
+    rps = [p["throughput_rps"] for p in points]
+    for key in ("p50_ms", "p95_ms", "p99_ms"):
+        plt.plot(rps, [p[key] for p in points], marker="o", label=key.split("_")[0])
+    plt.xlabel("throughput (req/s)")
+    plt.ylabel("latency (ms)")
+    plt.legend()
+    plt.savefig(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", choices=("curve", "soak"))
+    parser.add_argument("--mode", choices=("open", "closed"), default="closed")
+    parser.add_argument("--levels", default="10,50,100,200", help="users (closed) or requests/sec (open) per point")
+    parser.add_argument("--duration", type=float, default=20, help="seconds per curve point, or of the whole soak")
+    parser.add_argument("--concurrency", type=int, default=50, help="soak users")
+    parser.add_argument("--prompt-sizes", default="64:0.6,512:0.3,4096:0.1")
+    parser.add_argument("--sample-every", type=float, default=5, help="soak RSS sampling interval (s)")
+    parser.add_argument("--max-growth", type=float, default=50, help="soak fails above this many MB/hour")
+    parser.add_argument("--server", choices=("flask", "asgi"), default="flask")
+    parser.add_argument("--port", type=int, default=5201)
+    parser.add_argument("--ttft", type=float, default=0.2, help="stub time to first token (s)")
+    parser.add_argument("--chunks", type=int, default=20)
+    parser.add_argument("--interval", type=float, default=0.01, help="stub delay between chunks (s)")
+    parser.add_argument("--output")
+    parser.add_argument("--plot")
+    args = parser.parse_args()
+    sizes = parse_sizes(args.prompt_sizes)
+
+    proc = start_server(args)
+    try:
+        # Warm the server's pools before measuring anything
+        asyncio.run(closed_loop(args.port, 10, 2, sizes))
+        if args.command == "curve":
+            points = []
+            for level in (float(v) for v in args.levels.split(",")):
+                if args.mode == "closed":
+                    point = asyncio.run(closed_loop(args.port, int(level), args.duration, sizes))
+                else:
+                    point = asyncio.run(open_loop(args.port, level, args.duration, sizes))
+                point["level"] = int(level) if level.is_integer() else level
+                points.append(point)
+            print_curve(args.mode, points)
+            report = {"command": "curve", "mode": args.mode, "server": args.server, "points": points}
+            if args.plot:
+                plot_curve(points, args.plot)
+        else:
+            report = asyncio.run(soak(args.port, proc.pid, args.concurrency, args.duration, sizes, args.sample_every))
+            report.update({"command": "soak", "server": args.server})
+            growth = report["rss_growth_mb_per_hour"]
+            print(f"{report['completed']} requests, {report['errors']} errors, {report['throughput_rps']:.1f} req/s, "
+                  f"RSS {report['rss_start_mb']:.0f} -> {report['rss_end_mb']:.0f} MB, "
+                  f"steady-state growth {growth:.1f} MB/hour")
+    finally:
+        proc.terminate()
+        proc.wait()
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.command == "soak" and report["rss_growth_mb_per_hour"] > args.max_growth:
+        print(f"Memory grew faster than {args.max_growth} MB/hour")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Vectorized MathToolkit batch mode against the scalar per-call loop.
+
+    python benchmarks/math_batch_bench.py --rows 1000000
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from toolkitutils.math_batch import batch
+from toolkitutils.math_toolkit import MathToolkit
+
+CASES = [
+    ("geometry", "circle_area", lambda rng, n: [rng.uniform(0, 10, n)]),
+    ("geometry", "distance", lambda rng, n: [rng.uniform(-5, 5, n) for _ in range(4)]),
+    # Coefficients chosen so most rows have two real roots
+    ("algebra", "quad_roots", lambda rng, n: [rng.uniform(1, 2, n), rng.uniform(5, 10, n), rng.uniform(-2, 2, n)]),
+    ("trigonometry", "law_of_cos", lambda rng, n: [rng.uniform(1, 5, n), rng.uniform(1, 5, n), rng.uniform(0, 3, n)]),
+]
+
+
+def scalar_loop(category, operation, columns):
+    method = getattr(MathToolkit, category)
+    return [method(operation, *row) for row in zip(*(c.tolist() for c in columns))]
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+def check(scalar, vectorized):
+    # Spot-check the vectorized results against the scalar ones
+    for i in range(0, len(scalar), max(len(scalar) // 1000, 1)):
+        expected = scalar[i]
+        got = tuple(column[i] for column in vectorized) if isinstance(vectorized, tuple) else vectorized[i]
+        if isinstance(expected, (tuple, list)):
+            expected = tuple(expected) + (np.nan,) * (len(got) - len(expected))
+            if not np.allclose(expected, got, equal_nan=True):
+                return False
+        elif not np.isclose(expected, got):
+            return False
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    args = parser.parse_args()
+    rng = np.random.default_rng(0)
+
+    print(f"{'operation':<28}{'scalar s':>10}{'batch s':>10}{'speedup':>10}  matches")
+    for category, operation, make in CASES:
+        columns = make(rng, args.rows)
+        scalar, scalar_time = timed(scalar_loop, category, operation, columns)
+        vectorized, batch_time = timed(batch, category, operation, columns)
+        print(f"{category + '.' + operation:<28}{scalar_time:>10.3f}{batch_time:>10.4f}"
+              f"{scalar_time / batch_time:>9.0f}x  {check(scalar, vectorized)}")
+
+
+if __name__ == "__main__":
+    main()
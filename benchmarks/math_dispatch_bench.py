@@ -0,0 +1,65 @@
+"""
+Per-call overhead of MathToolkit dispatch: the registry behind
+toolkit.math_toolkit_wrapper against the old path, which re-parsed every
+category docstring and scanned the resulting list on each call, and against
+calling the function directly.
+
+    python benchmarks/math_dispatch_bench.py --calls 200000
+"""
+import argparse
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import toolkit
+from toolkitutils import math_toolkit
+from toolkitutils.math_toolkit import CATEGORIES, MathToolkit
+
+CASES = [
+    ("geometry.circle_area", {"radius": 2.0}, lambda p: math_toolkit.circle_area(*p.values())),
+    ("algebra.quadratic_roots", {"a": 1, "b": -3, "c": 2}, lambda p: math_toolkit.quadratic_roots(*p.values())),
+    ("statistics.mean", {"data": [1, 2, 3, 4]}, lambda p: math_toolkit.mean(*p.values())),
+]
+
+
+def legacy_available_operations():
+    # As the old parser, except each name is stripped before the category is
+    # prefixed; the original kept the leading space and so matched nothing
+    operations = []
+    for category in CATEGORIES:
+        operations.extend([f"{category}.{op.strip()}" for op in getattr(MathToolkit, category).__doc__.split('Operations:')[1].split('-')[1:]])
+    return [op.split(':')[0] for op in operations if op.strip()]
+
+
+def legacy_wrapper(operation, params):
+    if operation not in legacy_available_operations():
+        raise ValueError(f"Unknown operation: {operation}")
+    category, specific_operation = operation.split('.')
+    return getattr(MathToolkit, category)(specific_operation, *params.values())
+
+
+def per_call_us(fn, operation, params, calls):
+    start = time.perf_counter()
+    for _ in range(calls):
+        fn(operation, params)
+    return (time.perf_counter() - start) / calls * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--calls", type=int, default=200_000)
+    args = parser.parse_args()
+
+    print(f"{'operation':<28}{'legacy us':>11}{'registry us':>13}{'direct us':>11}{'speedup':>9}")
+    for operation, params, direct in CASES:
+        legacy = per_call_us(legacy_wrapper, operation, params, args.calls)
+        registry = per_call_us(toolkit.math_toolkit_wrapper, operation, params, args.calls)
+        plain = per_call_us(lambda _, p: direct(p), operation, params, args.calls)
+        print(f"{operation:<28}{legacy:>11.2f}{registry:>13.2f}{plain:>11.2f}{legacy / registry:>8.0f}x")
+
+
+if __name__ == "__main__":
+    main()
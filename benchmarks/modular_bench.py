@@ -0,0 +1,89 @@
+"""
+Timings for CRT and batch modular exponentiation on thousands of large
+moduli. The brute-force cross-checks are in tests/test_number_theory.py.
+
+    python benchmarks/modular_bench.py --moduli 2000 --bits 64
+"""
+import argparse
+import math
+import os
+import random
+import sys
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from toolkitutils import number_theory
+from toolkitutils.math_batch import batch
+
+
+def legacy_crt(remainders, moduli):
+    # Inverses through Euler's totient by trial division, correct only for prime moduli
+    def totient(n):
+        result = n
+        for i in range(2, int(math.sqrt(n)) + 1):
+            if n % i == 0:
+                while n % i == 0:
+                    n //= i
+                result *= (1 - 1 / i)
+        if n > 1:
+            result *= (1 - 1 / n)
+        return int(result)
+    total, product = 0, math.prod(moduli)
+    for remainder, modulus in zip(remainders, moduli):
+        p = product // modulus
+        total += remainder * pow(p, totient(modulus) - 1, modulus) * p
+    return total % product
+
+
+def random_primes(rng, count, bits):
+    primes = set()
+    while len(primes) < count:
+        n = rng.getrandbits(bits) | (1 << (bits - 1)) | 1
+        if number_theory.is_prime(n):
+            primes.add(n)
+    return list(primes)
+
+
+def timed_ms(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, (time.perf_counter() - start) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--moduli", type=int, default=2000, help="moduli per timed system")
+    parser.add_argument("--bits", type=int, default=64, help="size of each timed modulus")
+    parser.add_argument("--rows", type=int, default=200_000, help="rows of batch modular exponentiation")
+    args = parser.parse_args()
+    rng = random.Random(0)
+
+    # The old CRT against the new one, on prime moduli small enough for trial division
+    primes = random_primes(rng, 200, 24)
+    remainders = [rng.randrange(p) for p in primes]
+    old, old_ms = timed_ms(legacy_crt, remainders, primes)
+    (new, _), new_ms = timed_ms(number_theory.crt, remainders, primes)
+    print(f"200 x 24-bit prime moduli: legacy {old_ms:.1f} ms, crt {new_ms:.2f} ms, agree {old == new}")
+
+    x = rng.getrandbits(args.bits * args.moduli)
+    for label, moduli in (
+        ("pairwise coprime", random_primes(rng, args.moduli, args.bits)),
+        ("sharing factors", [rng.getrandbits(args.bits) | 1 for _ in range(args.moduli)]),
+    ):
+        (solution, lcm), elapsed = timed_ms(number_theory.crt, [x % m for m in moduli], moduli)
+        print(f"{args.moduli} x {args.bits}-bit moduli, {label}: {elapsed:.1f} ms, correct {solution == x % lcm}")
+
+    np_rng = np.random.default_rng(0)
+    columns = [np_rng.integers(0, 2 ** 32, args.rows), np_rng.integers(0, 2 ** 62, args.rows), np_rng.integers(1, 2 ** 32, args.rows)]
+    _, vectorized = timed_ms(batch, "number_theory", "modular_exponentiation", columns)
+    rows = list(zip(*(c.tolist() for c in columns)))
+    _, loop = timed_ms(lambda: [pow(b, e, m) for b, e, m in rows])
+    print(f"\nbatch modular exponentiation, {args.rows} rows below 2^32: {vectorized:.0f} ms vs {loop:.0f} ms per-row pow")
+
+
+if __name__ == "__main__":
+    main()
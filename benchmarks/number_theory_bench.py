@@ -0,0 +1,105 @@
+"""
+Number theory engine against the trial division it replaced, over ranges of
+small integers and over semiprimes of growing size.
+
+    python benchmarks/number_theory_bench.py --range 20000 --max-bits 64
+"""
+import argparse
+import math
+import os
+import random
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from toolkitutils import number_theory
+
+# Trial division is only timed while one call stays under this many seconds
+TRIAL_BUDGET = 2.0
+
+
+def trial_is_prime(n):
+    if n < 2:
+        return False
+    for i in range(2, int(math.sqrt(n)) + 1):
+        if n % i == 0:
+            return False
+    return True
+
+
+def trial_prime_factors(n):
+    factors = []
+    d = 2
+    while n > 1:
+        while n % d == 0:
+            factors.append(d)
+            n //= d
+        d += 1
+        if d * d > n:
+            if n > 1:
+                factors.append(n)
+            break
+    return factors
+
+
+def random_prime(rng, bits):
+    while True:
+        n = rng.getrandbits(bits) | (1 << (bits - 1)) | 1
+        if number_theory.is_prime(n):
+            return n
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+def bench_ranges(size):
+    print(f"{'range':<34}{'trial s':>10}{'engine s':>10}{'speedup':>10}  matches")
+    for low in (0, 10 ** 6, 10 ** 9):
+        numbers = range(low, low + size)
+        expected, trial = timed(lambda: [n for n in numbers if trial_is_prime(n)])
+        got, engine = timed(lambda: [n for n in numbers if number_theory.is_prime(n)])
+        print(f"{'is_prime [' + str(low) + ', +' + str(size) + ')':<34}{trial:>10.3f}{engine:>10.3f}"
+              f"{trial / engine:>9.0f}x  {expected == got}")
+        sieved, sieve = timed(number_theory.sieve.primes, low, low + size)
+        print(f"{'primes_in_range [' + str(low) + ', +' + str(size) + ')':<34}{'':>10}{sieve:>10.3f}"
+              f"{trial / sieve:>9.0f}x  {expected == sieved}")
+
+
+def bench_semiprimes(max_bits, count):
+    rng = random.Random(0)
+    print(f"\n{'semiprime bits':<16}{'trial ms':>10}{'engine ms':>11}  factors ok")
+    trial_ok = True
+    for bits in range(24, max_bits + 1, 8):
+        cases = [random_prime(rng, bits // 2) * random_prime(rng, bits - bits // 2) for _ in range(count)]
+        trial_ms = "skipped"
+        if trial_ok:
+            start = time.perf_counter()
+            for n in cases:
+                trial_prime_factors(n)
+            per_call = (time.perf_counter() - start) / count
+            trial_ms = f"{per_call * 1000:.2f}"
+            # Each 8 bits multiplies trial division time by ~16
+            trial_ok = per_call * 16 < TRIAL_BUDGET
+        start = time.perf_counter()
+        ok = all(math.prod(number_theory.prime_factors(n)) == n and len(number_theory.prime_factors(n)) == 2 for n in cases)
+        engine_ms = (time.perf_counter() - start) / (2 * count) * 1000
+        print(f"{bits:<16}{trial_ms:>10}{engine_ms:>11.2f}  {ok}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--range", type=int, default=20_000, help="integers per range")
+    parser.add_argument("--max-bits", type=int, default=64, help="largest semiprime size")
+    parser.add_argument("--count", type=int, default=5, help="semiprimes per size")
+    args = parser.parse_args()
+    bench_ranges(args.range)
+    bench_semiprimes(args.max_bits, args.count)
+
+
+if __name__ == "__main__":
+    main()
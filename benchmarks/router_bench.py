@@ -0,0 +1,240 @@
+"""
+Offline benchmark of routing plus serving. Replays MMLU-style prompts from a
+local cached copy and recorded request traces through route.route_query
+against deterministic fake providers, and reports routing accuracy against
+labels, router overhead, throughput, end-to-end latency percentiles and cost
+per 1k requests. Results are saved as JSON so runs can be compared.
+
+    python canned/try.py          # caches MMLU to benchmarks/data/mmlu.jsonl, once
+    python benchmarks/router_bench.py --output router_bench.json
+    python benchmarks/router_bench.py --compare router_bench.json
+
+Trace files are JSON lines with a "text" field and, when the correct model is
+known, a "model" field. canned/router_prompts.jsonl is used by default; it is
+also the router's training set, so its score is reported as training accuracy
+and says nothing about unseen prompts (train_router.py prints the held-out
+5-fold accuracy). MMLU rows
+are labelled through --mmlu-labels, a JSON object of subject -> model.
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Measure routing and serving, not response cache replay
+os.environ.setdefault("RESPONSE_CACHE", "0")
+
+import route
+import stub_providers
+import thalamus
+from telemetry import DEFAULT_PRICE, PRICES
+
+MMLU_CACHE = os.path.join(ROOT, "benchmarks", "data", "mmlu.jsonl")
+DEFAULT_TRACES = os.path.join(ROOT, "canned", "router_prompts.jsonl")
+
+
+def percentile(samples, p):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))] if ordered else None
+
+
+def fmt(value, spec=".0f"):
+    return "n/a" if value is None else format(value, spec)
+
+
+def load_jsonl(path, limit=None):
+    items = []
+    with open(path) as f:
+        for line in f:
+            if line.strip():
+                items.append(json.loads(line))
+                if limit and len(items) >= limit:
+                    break
+    return items
+
+
+class DecisionRecorder:
+    """
+    Stands in for route.find_llm and records each decision and its cost in
+    time on the calling thread.
+    """
+
+    def __init__(self, find_llm):
+        self.find_llm = find_llm
+        self.local = threading.local()
+
+    def __call__(self, query, slo_ttft=None):
+        start = time.perf_counter()
+        model = self.find_llm(query, slo_ttft)
+        self.local.overhead = time.perf_counter() - start
+        self.local.model = model
+        return model
+
+
+def replay(items, recorder, concurrency):
+    def one(item):
+        recorder.local.model, recorder.local.overhead = None, None
+        start = time.perf_counter()
+        chunks, error = [], None
+        try:
+            chunks = list(route.route_query(item["text"]))
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+        return {
+            "label": item.get("model"),
+            "model": recorder.local.model,
+            "overhead": recorder.local.overhead,
+            "latency": time.perf_counter() - start,
+            "prompt_tokens": len(item["text"]) // 4,
+            # The fake providers stream one token per chunk
+            "output_tokens": len(chunks),
+            "error": error,
+        }
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as pool:
+        results = list(pool.map(one, items))
+    return results, time.perf_counter() - start
+
+
+def summarize(results, wall):
+    ok = [r for r in results if r["error"] is None]
+    labelled = [r for r in results if r["label"] and r["model"]]
+    overheads = [r["overhead"] * 1000 for r in results if r["overhead"] is not None]
+    latencies = [r["latency"] * 1000 for r in ok]
+    cost = 0.0
+    for r in ok:
+        price_in, price_out = PRICES.get(r["model"], DEFAULT_PRICE)
+        cost += (r["prompt_tokens"] * price_in + r["output_tokens"] * price_out) / 1e6
+    return {
+        "requests": len(results),
+        "errors": len(results) - len(ok),
+        "labelled": len(labelled),
+        "routing_accuracy": sum(r["model"] == r["label"] for r in labelled) / len(labelled) if labelled else None,
+        "router_overhead_ms": {
+            "mean": sum(overheads) / len(overheads) if overheads else None,
+            "p50": percentile(overheads, 50),
+            "p99": percentile(overheads, 99),
+        },
+        "throughput_rps": len(ok) / wall if wall else None,
+        "latency_ms": {"p50": percentile(latencies, 50), "p95": percentile(latencies, 95), "p99": percentile(latencies, 99)},
+        "cost_per_1k_usd": 1000 * cost / len(ok) if ok else None,
+        "model_mix": dict(Counter(r["model"] for r in results if r["model"])),
+    }
+
+
+def compare(current, baseline):
+    keys = [
+        ("routing_accuracy", lambda m: m["routing_accuracy"]),
+        ("router_overhead_ms.mean", lambda m: m["router_overhead_ms"]["mean"]),
+        ("throughput_rps", lambda m: m["throughput_rps"]),
+        ("latency_ms.p50", lambda m: m["latency_ms"]["p50"]),
+        ("latency_ms.p99", lambda m: m["latency_ms"]["p99"]),
+        ("cost_per_1k_usd", lambda m: m["cost_per_1k_usd"]),
+    ]
+    for name, metrics in current["datasets"].items():
+        before = baseline["datasets"].get(name)
+        if before is None:
+            continue
+        print(f"\n{name} vs baseline")
+        for key, get in keys:
+            new, old = get(metrics), get(before)
+            if new is None or old is None:
+                continue
+            change = f"{100 * (new - old) / old:+.1f}%" if old else "n/a"
+            print(f"  {key:<26} {old:>12.4f} -> {new:>12.4f}  {change}")
+
+
+def parse_backend_latency(specs):
+    # backend=median,sigma
+    overrides = {}
+    for spec in specs:
+        backend, _, params = spec.partition("=")
+        median, sigma = (float(v) for v in params.split(","))
+        overrides[backend] = {"ttft": stub_providers.lognormal_ttft(median, sigma)}
+    return overrides
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--traces", nargs="*", default=[DEFAULT_TRACES])
+    parser.add_argument("--mmlu", default=MMLU_CACHE)
+    parser.add_argument("--mmlu-limit", type=int, default=500)
+    parser.add_argument("--mmlu-labels")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--ttft-median", type=float, default=0.05)
+    parser.add_argument("--ttft-sigma", type=float, default=0.5)
+    parser.add_argument("--backend-latency", nargs="*", default=[], help="Per-backend TTFT as backend=median,sigma")
+    parser.add_argument("--chunks", type=int, default=20)
+    parser.add_argument("--interval", type=float, default=0.002)
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    parser.add_argument("--output")
+    parser.add_argument("--compare")
+    args = parser.parse_args()
+
+    stub_providers.install(
+        parse_backend_latency(args.backend_latency),
+        ttft=stub_providers.lognormal_ttft(args.ttft_median, args.ttft_sigma),
+        chunks=args.chunks, interval=args.interval, failure_rate=args.failure_rate,
+    )
+    recorder = DecisionRecorder(route.find_llm)
+    route.find_llm = recorder
+
+    datasets = {}
+    if os.path.exists(args.mmlu):
+        items = load_jsonl(args.mmlu, args.mmlu_limit)
+        if args.mmlu_labels:
+            with open(args.mmlu_labels) as f:
+                labels = json.load(f)
+            for item in items:
+                item["model"] = labels.get(item.get("subject"))
+        datasets["mmlu"] = items
+    else:
+        print(f"No MMLU cache at {args.mmlu}, run canned/try.py to create it")
+    training_sets = set()
+    for path in args.traces:
+        name = os.path.splitext(os.path.basename(path))[0]
+        datasets[name] = load_jsonl(path)
+        if os.path.abspath(path) == DEFAULT_TRACES:
+            training_sets.add(name)
+
+    report = {
+        "timestamp": time.time(),
+        "python": platform.python_version(),
+        "config": {k: v for k, v in vars(args).items() if k not in ("output", "compare")},
+        "datasets": {},
+    }
+    for name, items in datasets.items():
+        # Every dataset starts with cold routing decisions
+        thalamus.invalidate_routing_cache()
+        results, wall = replay(items, recorder, args.concurrency)
+        metrics = summarize(results, wall)
+        # The router was fit on this data, so its accuracy here is not a generalization estimate
+        metrics["training_set"] = name in training_sets
+        report["datasets"][name] = metrics
+        latency = metrics["latency_ms"]
+        print(f"{name}: {metrics['requests']} requests, {metrics['errors']} errors, "
+              f"{'training accuracy' if metrics['training_set'] else 'accuracy'} {fmt(metrics['routing_accuracy'], '.3f')} over {metrics['labelled']} labelled, "
+              f"router {fmt(metrics['router_overhead_ms']['mean'], '.3f')} ms mean, "
+              f"{fmt(metrics['throughput_rps'], '.1f')} req/s, "
+              f"p50/p95/p99 {fmt(latency['p50'])}/{fmt(latency['p95'])}/{fmt(latency['p99'])} ms, "
+              f"${fmt(metrics['cost_per_1k_usd'], '.3f')} per 1k")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            compare(report, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+"""
+Compare the Flask server (app.py) with the ASGI server (asgi.py) under
+concurrent streaming load, with every provider replaced by a stub.
+
+    python benchmarks/serving_bench.py --requests 2000 --concurrency 200
+
+Each server runs in its own subprocess. Reports requests/sec and p50/p99 for
+time to first byte and full-stream latency.
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+def serve(kind, port, ttft, chunks, interval):
+    # Measure the serving path, not cache replay
+    os.environ.setdefault("RESPONSE_CACHE", "0")
+    # Stubbed providers need no warm-up, and probing the real ones would skew routing
+    os.environ.setdefault("WARMUP", "0")
+    # Lift the per-backend limits: the stubs have no capacity to protect, and
+    # queueing behind the self-hosted backends' 2-8 slots would hide the server
+    import scheduler
+    for limits in scheduler.BACKEND_LIMITS.values():
+        limits.update(initial=100000, max_limit=100000, rpm=None, tpm=None)
+    import stub_providers
+    stub_providers.install(ttft=ttft, chunks=chunks, interval=interval)
+
+    if kind == "flask":
+        import logging
+        import app
+        logging.getLogger("werkzeug").setLevel(logging.ERROR)
+        app.app.run(host="127.0.0.1", port=port, threaded=True)
+    else:
+        from hypercorn.asyncio import serve as hypercorn_serve
+        from hypercorn.config import Config
+        import asgi
+        config = Config()
+        config.bind = [f"127.0.0.1:{port}"]
+        config.accesslog = None
+        config.backlog = 2048
+        asyncio.run(hypercorn_serve(asgi.app, config))
+
+
+def wait_for_port(port, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.5):
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f"Server on port {port} did not come up")
+
+
+async def stream_request(port, text):
+    """
+    POST one streaming request and read the body to the end.
+
+    :return: (time to first body byte, total time) in seconds
+    """
+    body = json.dumps({"text": text, "stream": True}).encode()
+    start = time.perf_counter()
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(
+        b"POST /routePrompt HTTP/1.1\r\nHost: 127.0.0.1\r\nContent-Type: application/json\r\n"
+        + f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode()
+        + body
+    )
+    await writer.drain()
+
+    head = await reader.readuntil(b"\r\n\r\n")
+    if not head.startswith(b"HTTP/1.1 200") and not head.startswith(b"HTTP/1.0 200"):
+        raise RuntimeError(head.split(b"\r\n")[0].decode())
+    first = await reader.read(1)
+    ttfb = time.perf_counter() - start
+    while await reader.read(65536):
+        pass
+    total = time.perf_counter() - start
+    writer.close()
+    return ttfb, total
+
+
+def percentile(samples, p):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))]
+
+
+async def run_load(port, requests, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+    ttfbs, totals, errors = [], [], 0
+
+    async def one(i):
+        nonlocal errors
+        async with semaphore:
+            try:
+                ttfb, total = await stream_request(port, f"benchmark prompt {i}")
+                ttfbs.append(ttfb)
+                totals.append(total)
+            except Exception:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    elapsed = time.perf_counter() - start
+    return {
+        "requests": requests,
+        "errors": errors,
+        "rps": len(totals) / elapsed,
+        "ttfb_p50_ms": percentile(ttfbs, 50) * 1000 if ttfbs else None,
+        "ttfb_p99_ms": percentile(ttfbs, 99) * 1000 if ttfbs else None,
+        "p50_ms": percentile(totals, 50) * 1000 if totals else None,
+        "p99_ms": percentile(totals, 99) * 1000 if totals else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--ttft", type=float, default=0.2, help="stub time to first token (s)")
+    parser.add_argument("--chunks", type=int, default=20)
+    parser.add_argument("--interval", type=float, default=0.01, help="stub delay between chunks (s)")
+    parser.add_argument("--servers", default="flask,asgi")
+    parser.add_argument("--serve", help=argparse.SUPPRESS)
+    parser.add_argument("--port", type=int, default=5101, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args.serve, args.port, args.ttft, args.chunks, args.interval)
+        return
+
+    results = {}
+    for offset, kind in enumerate(args.servers.split(",")):
+        port = args.port + offset
+        proc = subprocess.Popen([
+            sys.executable, __file__, "--serve", kind, "--port", str(port),
+            "--ttft", str(args.ttft), "--chunks", str(args.chunks), "--interval", str(args.interval),
+        ])
+        try:
+            wait_for_port(port)
+            asyncio.run(run_load(port, min(20, args.requests), min(20, args.concurrency)))
+            results[kind] = asyncio.run(run_load(port, args.requests, args.concurrency))
+        finally:
+            proc.terminate()
+            proc.wait()
+
+    print(f"{'server':<8}{'rps':>10}{'ttfb p50':>12}{'ttfb p99':>12}{'p50':>10}{'p99':>10}{'errors':>8}")
+    for kind, r in results.items():
+        print(f"{kind:<8}{r['rps']:>10.1f}{r['ttfb_p50_ms'] or 0:>12.1f}{r['ttfb_p99_ms'] or 0:>12.1f}"
+              f"{r['p50_ms'] or 0:>10.1f}{r['p99_ms'] or 0:>10.1f}{r['errors']:>8}")
+
+
+if __name__ == "__main__":
+    main()
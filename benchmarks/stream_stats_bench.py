@@ -0,0 +1,97 @@
+"""
+MathToolkit statistics before and after the single-pass engine, on Python
+lists and NumPy arrays, plus peak memory for a generator consumed in chunks.
+
+    python benchmarks/stream_stats_bench.py --rows 2000000
+"""
+import argparse
+import math
+import os
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from toolkitutils import stream_stats
+from toolkitutils.math_toolkit import MathToolkit
+
+# The old mode is quadratic, so it only runs on a prefix of this many values
+LEGACY_MODE_ROWS = 5000
+
+
+def legacy_mean(data):
+    return sum(data) / len(data)
+
+
+def legacy_median(data):
+    sorted_data = sorted(data)
+    n = len(sorted_data)
+    if n % 2 == 0:
+        return (sorted_data[n // 2 - 1] + sorted_data[n // 2]) / 2
+    return sorted_data[n // 2]
+
+
+def legacy_mode(data):
+    return max(set(data), key=data.count)
+
+
+def legacy_variance(data):
+    m = legacy_mean(data)
+    return sum((x - m) ** 2 for x in data) / len(data)
+
+
+def legacy_standard_deviation(data):
+    return math.sqrt(legacy_variance(data))
+
+
+LEGACY = {
+    "mean": legacy_mean,
+    "median": legacy_median,
+    "mode": legacy_mode,
+    "variance": legacy_variance,
+    "standard_deviation": legacy_standard_deviation,
+}
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    args = parser.parse_args()
+    rng = np.random.default_rng(0)
+    array = rng.integers(0, 10_000, args.rows)
+    values = array.tolist()
+
+    print(f"{'operation':<22}{'rows':>10}{'legacy s':>10}{'list s':>10}{'array s':>10}  matches")
+    for operation, legacy in LEGACY.items():
+        data = values[:LEGACY_MODE_ROWS] if operation == "mode" else values
+        expected, legacy_time = timed(legacy, data)
+        from_list, list_time = timed(MathToolkit.statistics, operation, data)
+        from_array, array_time = timed(MathToolkit.statistics, operation, array[:len(data)])
+        # Modes may break ties differently, so compare their frequencies
+        if operation == "mode":
+            ok = data.count(expected) == data.count(from_list) == data.count(from_array)
+        else:
+            ok = math.isclose(expected, from_list) and math.isclose(expected, from_array)
+        print(f"{operation:<22}{len(data):>10}{legacy_time:>10.3f}{list_time:>10.3f}{array_time:>10.3f}  {ok}")
+
+    # A generator is never materialized: peak memory stays at a few chunks
+    stats, elapsed = timed(stream_stats.summarize, (float(x) for x in range(args.rows)), False)
+    tracemalloc.start()
+    stream_stats.summarize((float(x) for x in range(args.rows)), False)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"\ngenerator of {args.rows} values: {elapsed:.2f} s, peak {peak / 2 ** 20:.1f} MB, "
+          f"mean {stats.mean:.1f}, approximate median {stats.median:.0f} (exact {(args.rows - 1) / 2:.1f})")
+
+if __name__ == "__main__":
+    main()
@@ -15,6 +15,7 @@ from langchain_core.output_parsers import StrOutputParser
 from langchain_community.document_loaders import YoutubeLoader
 
 from langchain_core.prompts import PromptTemplate, ChatPromptTemplate
+from langchain_core.callbacks import BaseCallbackHandler
 
 from dotenv import load_dotenv
 #Load the .env file
@@ -22,6 +23,7 @@ load_dotenv()
 import os
 
 from toolkit import tools, web_tools,research_tools,news_tools
+import tracing
 # from bsi_agents.bsi_tools import o365_toolkit
 from router_backend.canned.loadllm import get_llm_client
 from operator import itemgetter
@@ -32,6 +34,44 @@ MONGODB_URI = os.getenv('MONGODB_URI')
 def _handle_error(error) -> str:
     return str(error)
 
+class ToolTracer(BaseCallbackHandler):
+    """
+    Trace every tool call an agent makes as an agent.tool_call span.
+    """
+
+    def __init__(self):
+        self.spans = {}
+
+    def on_tool_start(self, serialized, input_str, *, run_id, **kwargs):
+        self.spans[run_id] = tracing.start_span("agent.tool_call", tool=(serialized or {}).get("name", "unknown"))
+
+    def on_tool_end(self, output, *, run_id, **kwargs):
+        span = self.spans.pop(run_id, None)
+        if span:
+            span.end()
+
+    def on_tool_error(self, error, *, run_id, **kwargs):
+        span = self.spans.pop(run_id, None)
+        if span:
+            span.end(error=error)
+
+# Tool runs do not inherit callbacks given to the AgentExecutor constructor,
+# so the tracer is attached to the tools themselves. Spans are keyed by run
+# id, so one tracer serves every agent.
+tool_tracer = ToolTracer()
+
+def traced(agent_tools):
+    """
+    Attach tool_tracer to each tool, so its calls are traced however the agent is invoked.
+
+    :return: The same tools
+    """
+    for agent_tool in agent_tools:
+        callbacks = agent_tool.callbacks or []
+        if tool_tracer not in callbacks:
+            agent_tool.callbacks = [*callbacks, tool_tracer]
+    return agent_tools
+
 def conversation_agent(select_llm):
     
     llm = get_llm_client(select_llm)
@@ -106,7 +146,7 @@ def web_agent(select_llm, max_iterations=15):
     prompt = PromptTemplate.from_template(template)
         
     agent = create_react_agent(llm, web_tools, prompt)
-    agent_chain = AgentExecutor(agent=agent, tools=web_tools,
+    agent_chain = AgentExecutor(agent=agent, tools=traced(web_tools),
                                 # stop_sequence=True,
                                 # handle_parsing_errors=_handle_error,
                                 handle_parsing_errors=True,
@@ -164,7 +204,7 @@ def research_agent(select_llm,max_iterations=15):
     prompt = PromptTemplate.from_template(template)
         
     agent = create_react_agent(llm, research_tools, prompt)
-    agent_chain = AgentExecutor(agent=agent, tools=research_tools,
+    agent_chain = AgentExecutor(agent=agent, tools=traced(research_tools),
                                 # stop_sequence=True,
                                 handle_parsing_errors=_handle_error,
                                 verbose=True,
@@ -216,7 +256,7 @@ def news_agent(select_llm,max_iterations=15):
     prompt = PromptTemplate.from_template(template)
         
     agent = create_react_agent(llm, news_tools, prompt)
-    agent_chain = AgentExecutor(agent=agent, tools=news_tools,
+    agent_chain = AgentExecutor(agent=agent, tools=traced(news_tools),
                                 # stop_sequence=True,
                                 handle_parsing_errors=_handle_error,
                                 verbose=True,
@@ -267,7 +307,7 @@ def code_agent(select_llm, max_iterations=15):
     prompt = PromptTemplate.from_template(template)
         
     agent = create_react_agent(llm, custom_code_tools, prompt)
-    agent_chain = AgentExecutor(agent=agent, tools=custom_code_tools,
+    agent_chain = AgentExecutor(agent=agent, tools=traced(custom_code_tools),
                                 # stop_sequence=True,
                                 handle_parsing_errors=_handle_error,
                                 verbose=True,
@@ -341,7 +381,7 @@ def email_agent(select_llm):
     
     prompt = hub.pull("hwchase17/react")
     agent = create_react_agent(llm, tools=o365_toolkit, prompt=prompt)
-    agent_chain = AgentExecutor(agent=agent, tools=o365_toolkit, verbose=True)
+    agent_chain = AgentExecutor(agent=agent, tools=traced(o365_toolkit), verbose=True)
 
     
     return agent_chain
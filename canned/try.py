@@ -1,11 +1,21 @@
+import json
+import os
 
-from typing import List, Dict
-import openai
 from datasets import load_dataset
-from tqdm import tqdm
-
-from huggingface_hub import login, list_datasets
 
+# Cache MMLU locally as JSON lines, so benchmarks/router_bench.py can replay it
+# offline and every run sees the same prompts.
+CACHE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks", "data", "mmlu.jsonl")
 
+def format_prompt(row):
+    choices = "\n".join(f"{letter}. {choice}" for letter, choice in zip("ABCD", row["choices"]))
+    return f"{row['question']}\n{choices}\nAnswer with the letter of the correct choice."
 
 mmlu = load_dataset("cais/mmlu", "all")
+
+os.makedirs(os.path.dirname(CACHE_PATH), exist_ok=True)
+with open(CACHE_PATH, "w") as f:
+    for row in mmlu["test"]:
+        f.write(json.dumps({"text": format_prompt(row), "subject": row["subject"], "answer": row["answer"]}) + "\n")
+
+print(f"Cached {len(mmlu['test'])} MMLU questions to {CACHE_PATH}")
@@ -0,0 +1,195 @@
+import logging
+import os
+import threading
+import time
+from functools import partial
+from importlib import import_module
+
+import llmsetup
+import tracing
+from ssh_pool import TARGET_HOSTS, get_pool
+
+# Provider SDKs are imported on first use (or by preload_in_background) so a
+# worker can start serving before every SDK has been loaded
+SDK_MODULES = {
+    "openai": "openai",
+    "anthropic": "anthropic",
+    "gemini": "google.generativeai",
+    "ollama": "ollama",
+    "ssh": "paramiko",
+}
+
+# Keep-alive pool sizing, shared by every provider client built here
+POOL_MAX_CONNECTIONS = int(os.environ.get("PROVIDER_POOL_MAX_CONNECTIONS", 100))
+POOL_MAX_KEEPALIVE = int(os.environ.get("PROVIDER_POOL_MAX_KEEPALIVE", 20))
+POOL_KEEPALIVE_EXPIRY = float(os.environ.get("PROVIDER_POOL_KEEPALIVE_EXPIRY", 60))
+
+# Self-hosted models, reached over the SSH tunnel to the Ollama HTTP API.
+# OLLAMA_TRANSPORT=cli falls back to `ollama run` in an SSH session.
+OLLAMA_TRANSPORT = os.environ.get("OLLAMA_TRANSPORT", "http")
+OLLAMA_PORT = int(os.environ.get("OLLAMA_PORT", 11434))
+OLLAMA_KEEP_ALIVE = os.environ.get("OLLAMA_KEEP_ALIVE", "30m")
+OLLAMA_MODELS = {
+    "mistral": "mistral",
+    "llama": "llama3.1",
+}
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+# provider -> {"requests": n, "connects": n}
+_connection_stats = {}
+_stats_lock = threading.Lock()
+
+def _record(provider, key):
+    with _stats_lock:
+        stats = _connection_stats.setdefault(provider, {"requests": 0, "connects": 0})
+        stats[key] += 1
+
+def _limits():
+    import httpx
+    return httpx.Limits(
+        max_connections=POOL_MAX_CONNECTIONS,
+        max_keepalive_connections=POOL_MAX_KEEPALIVE,
+        keepalive_expiry=POOL_KEEPALIVE_EXPIRY,
+    )
+
+def _connect_tracer(provider):
+    # httpcore reports connect_tcp only when the pool has to dial a new
+    # connection, so requests - connects is the number of reused connections.
+    # Each dial and TLS handshake is also traced as a connection.* span.
+    started = {}
+
+    def trace(event_name, info):
+        step, _, phase = event_name.rpartition(".")
+        if not step.startswith("connection."):
+            return
+        if phase == "started":
+            started[step] = time.perf_counter()
+        elif phase in ("complete", "failed") and step in started:
+            if step == "connection.connect_tcp" and phase == "complete":
+                _record(provider, "connects")
+            tracing.record(step, time.perf_counter() - started.pop(step), backend=provider, failed=phase == "failed")
+
+    return trace
+
+def _event_hooks(provider):
+    def on_request(request):
+        _record(provider, "requests")
+        request.extensions["trace"] = _connect_tracer(provider)
+
+    return {"request": [on_request]}
+
+def _async_event_hooks(provider):
+    async def on_request(request):
+        _record(provider, "requests")
+        trace = _connect_tracer(provider)
+
+        async def atrace(event_name, info):
+            trace(event_name, info)
+
+        request.extensions["trace"] = atrace
+
+    return {"request": [on_request]}
+
+def _build_openai():
+    import openai
+    return openai.OpenAI(api_key=llmsetup.require("openai")["api_key"], http_client=openai.DefaultHttpxClient(limits=_limits(), event_hooks=_event_hooks("openai")))
+
+def _build_async_openai():
+    import openai
+    return openai.AsyncOpenAI(api_key=llmsetup.require("openai")["api_key"], http_client=openai.DefaultAsyncHttpxClient(limits=_limits(), event_hooks=_async_event_hooks("openai")))
+
+def _build_anthropic():
+    import anthropic
+    return anthropic.Anthropic(
+        api_key=llmsetup.require("anthropic")["api_key"],
+        http_client=anthropic.DefaultHttpxClient(limits=_limits(), event_hooks=_event_hooks("anthropic")),
+    )
+
+def _build_async_anthropic():
+    import anthropic
+    return anthropic.AsyncAnthropic(
+        api_key=llmsetup.require("anthropic")["api_key"],
+        http_client=anthropic.DefaultAsyncHttpxClient(limits=_limits(), event_hooks=_async_event_hooks("anthropic")),
+    )
+
+def _build_gemini():
+    import google.generativeai as genai
+    # genai keeps its own process-wide gRPC channel, configure it exactly once
+    genai.configure(api_key=llmsetup.require("gemini")["api_key"])
+    return genai.GenerativeModel("gemini-1.5-flash")
+
+def _build_ollama(modal, client_class, event_hooks):
+    import ollama
+    # The forwarded local port stays up for the life of the pool, and the
+    # client's own keep-alive pool reuses connections through it
+    port = get_pool().forward_port(TARGET_HOSTS[modal], OLLAMA_PORT)
+    return getattr(ollama, client_class)(host=f"http://127.0.0.1:{port}", limits=_limits(), event_hooks=event_hooks(f"ollama_{modal}"))
+
+BUILDERS = {
+    "openai": _build_openai,
+    "async_openai": _build_async_openai,
+    "anthropic": _build_anthropic,
+    "async_anthropic": _build_async_anthropic,
+    "gemini": _build_gemini,
+    "ollama_mistral": partial(_build_ollama, "mistral", "Client", _event_hooks),
+    "async_ollama_mistral": partial(_build_ollama, "mistral", "AsyncClient", _async_event_hooks),
+    "ollama_llama": partial(_build_ollama, "llama", "Client", _event_hooks),
+    "async_ollama_llama": partial(_build_ollama, "llama", "AsyncClient", _async_event_hooks),
+}
+
+def get_client(name):
+    """
+    Return the process-wide client for a provider, building it on first use.
+
+    Clients are safe to share across worker threads. The async_* clients are
+    bound to the event loop that first uses them (the ASGI server's loop).
+
+    :param name: A key of BUILDERS, e.g. "openai" or "async_anthropic"
+    :return: The shared client
+    """
+    client = _clients.get(name)
+    if client is None:
+        with _clients_lock:
+            client = _clients.get(name)
+            if client is None:
+                client = BUILDERS[name]()
+                _clients[name] = client
+    return client
+
+def preload_in_background(sdks=None):
+    """
+    Import the provider SDKs on a daemon thread so the first request on each
+    backend does not pay for it, without holding up server startup.
+
+    :param sdks: Keys of SDK_MODULES to load, all of them by default
+    """
+    def preload():
+        for name in sdks or SDK_MODULES:
+            try:
+                import_module(SDK_MODULES[name])
+            except ImportError as e:
+                logging.warning(f"Could not preload the {name} SDK: {e}")
+
+    thread = threading.Thread(target=preload, name="sdk-preload", daemon=True)
+    thread.start()
+    return thread
+
+def connection_reuse():
+    """
+    Report how often provider requests reused a pooled connection.
+
+    :return: A dict of provider -> requests, new connections and reuse ratio
+    """
+    with _stats_lock:
+        report = {}
+        for provider, stats in _connection_stats.items():
+            reused = max(stats["requests"] - stats["connects"], 0)
+            report[provider] = {
+                "requests": stats["requests"],
+                "new_connections": stats["connects"],
+                "reused": reused,
+                "reuse_ratio": reused / stats["requests"] if stats["requests"] else 0.0,
+            }
+        return report
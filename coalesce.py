@@ -0,0 +1,306 @@
+import asyncio
+import contextvars
+import logging
+import os
+import threading
+
+# Single-flight coalescing: concurrent requests with the same key share one
+# upstream generation. The producer appends chunks to a shared buffer and every
+# subscriber reads the buffer from the start, so late joiners replay what was
+# already produced and then follow the live stream.
+#
+# A subscriber only joins, and a leader only starts the producer, once its
+# iterator is first advanced. It stops counting in a finally that runs however
+# it exits, so an iterator that is never consumed neither calls the provider
+# nor keeps a flight alive. When the last subscriber leaves
+# an unfinished flight it is abandoned: it leaves the registry and its
+# producer stops. A subscriber that starts after that gets a fresh flight.
+#
+# The producer may run at most STREAM_BUFFER chunks ahead of the slowest
+# subscriber, so a slow client slows the provider down instead of the buffer
+# growing without bound. The queues in execution and route use the same
+# bound. A producer that gets no room for STREAM_STALL_TIMEOUT seconds gives up.
+
+STREAM_BUFFER = int(os.environ.get("STREAM_BUFFER", 32))
+STREAM_STALL_TIMEOUT = float(os.environ.get("STREAM_STALL_TIMEOUT", 60))
+
+# Producer tasks of AsyncSingleFlight, the event loop only keeps weak references
+_tasks = set()
+
+
+class Flight:
+
+    def __init__(self):
+        self.chunks = []
+        self.done = False
+        self.error = None
+        self.subscribers = 0
+        self.abandoned = False
+        # Reader -> index of the next chunk it will read
+        self.positions = {}
+        self.cond = threading.Condition()
+
+    def _has_room(self):
+        slowest = min(self.positions.values(), default=0)
+        return self.abandoned or len(self.chunks) - slowest < STREAM_BUFFER
+
+    def publish(self, chunk):
+        with self.cond:
+            if not self.cond.wait_for(self._has_room, STREAM_STALL_TIMEOUT):
+                raise TimeoutError(f"No subscriber read for {STREAM_STALL_TIMEOUT}s")
+            self.chunks.append(chunk)
+            self.cond.notify_all()
+
+    def wake(self):
+        with self.cond:
+            self.cond.notify_all()
+
+    def finish(self, error=None):
+        with self.cond:
+            self.done = True
+            self.error = error
+            self.cond.notify_all()
+
+    def read(self):
+        reader = object()
+        with self.cond:
+            self.positions[reader] = 0
+        i = 0
+        try:
+            while True:
+                with self.cond:
+                    while i >= len(self.chunks) and not self.done:
+                        self.cond.wait()
+                    pending = self.chunks[i:]
+                    done, error = self.done, self.error
+                for chunk in pending:
+                    yield chunk
+                    i += 1
+                    with self.cond:
+                        self.positions[reader] = i
+                        self.cond.notify_all()
+                if done and i >= len(self.chunks):
+                    if error is not None:
+                        raise error
+                    return
+        finally:
+            with self.cond:
+                del self.positions[reader]
+                self.cond.notify_all()
+
+
+class SingleFlight:
+
+    def __init__(self):
+        self._flights = {}
+        self._lock = threading.Lock()
+        self.leaders = 0
+        self.joiners = 0
+
+    def _produce(self, key, flight, factory, on_complete):
+        completed = False
+        try:
+            stream = factory()
+            try:
+                for chunk in stream:
+                    flight.publish(chunk)
+                    if flight.abandoned:
+                        # Everyone hung up, stop paying for the generation
+                        break
+                else:
+                    completed = True
+            finally:
+                close = getattr(stream, "close", None)
+                if close:
+                    close()
+        except Exception as e:
+            logging.error(f"Coalesced stream for {key!r} failed: {e}")
+            flight.finish(e)
+        else:
+            flight.finish()
+        finally:
+            with self._lock:
+                if self._flights.get(key) is flight:
+                    del self._flights[key]
+        if completed and on_complete is not None:
+            on_complete(flight.chunks)
+
+    def _join(self, key, factory, on_complete):
+        # Called with self._lock held
+        flight = self._flights.get(key)
+        if flight is not None:
+            self.joiners += 1
+            return flight
+        flight = Flight()
+        self._flights[key] = flight
+        self.leaders += 1
+        # The producer runs in the leader's context, so its trace spans nest under the leader's request
+        context = contextvars.copy_context()
+        threading.Thread(target=context.run, args=(self._produce, key, flight, factory, on_complete), daemon=True).start()
+        return flight
+
+    def _subscribe(self, key, factory, on_complete):
+        # Abandoned flights have already left the registry, so this joins a
+        # live flight or starts a fresh one
+        with self._lock:
+            flight = self._join(key, factory, on_complete)
+            flight.subscribers += 1
+        try:
+            yield from flight.read()
+        finally:
+            with self._lock:
+                flight.subscribers -= 1
+                if flight.subscribers == 0 and not flight.done:
+                    flight.abandoned = True
+                    if self._flights.get(key) is flight:
+                        del self._flights[key]
+            # A producer waiting for room sees the abandonment
+            flight.wake()
+
+    def stream(self, key, factory, on_complete=None):
+        """
+        Stream the generation for key, starting it only if none is in flight
+        when the iterator is first advanced.
+
+        :param key: Routing key, e.g. (model, query)
+        :param factory: Zero-argument callable returning the provider chunk iterator
+        :param on_complete: Called once with the full chunk list if the generation finishes
+        :return: An iterator over the shared chunks
+        """
+        return self._subscribe(key, factory, on_complete)
+
+    def stats(self):
+        with self._lock:
+            return {"in_flight": len(self._flights), "upstream_calls": self.leaders, "coalesced": self.joiners}
+
+
+class AsyncFlight:
+
+    def __init__(self):
+        self.chunks = []
+        self.done = False
+        self.error = None
+        self.subscribers = 0
+        self.abandoned = False
+        self.task = None
+        self.positions = {}
+        self.changed = asyncio.Condition()
+
+    def _has_room(self):
+        slowest = min(self.positions.values(), default=0)
+        return len(self.chunks) - slowest < STREAM_BUFFER
+
+    async def publish(self, chunk):
+        async with self.changed:
+            try:
+                await asyncio.wait_for(self.changed.wait_for(self._has_room), STREAM_STALL_TIMEOUT)
+            except asyncio.TimeoutError:
+                raise TimeoutError(f"No subscriber read for {STREAM_STALL_TIMEOUT}s")
+            self.chunks.append(chunk)
+            self.changed.notify_all()
+
+    async def _advance(self, reader, i):
+        async with self.changed:
+            self.positions[reader] = i
+            self.changed.notify_all()
+
+    async def finish(self, error=None):
+        async with self.changed:
+            self.done = True
+            self.error = error
+            self.changed.notify_all()
+
+    async def read(self):
+        reader = object()
+        self.positions[reader] = 0
+        i = 0
+        try:
+            while True:
+                async with self.changed:
+                    await self.changed.wait_for(lambda: i < len(self.chunks) or self.done)
+                    pending = self.chunks[i:]
+                    done, error = self.done, self.error
+                for chunk in pending:
+                    yield chunk
+                    i += 1
+                    await self._advance(reader, i)
+                if done and i >= len(self.chunks):
+                    if error is not None:
+                        raise error
+                    return
+        finally:
+            async with self.changed:
+                del self.positions[reader]
+                self.changed.notify_all()
+
+
+class AsyncSingleFlight:
+    """
+    SingleFlight for the ASGI path. The producer runs as its own task so a
+    disconnecting leader does not cancel the stream for the other waiters.
+    Everything runs on one event loop, so no locks are needed.
+    """
+
+    def __init__(self):
+        self._flights = {}
+        self.leaders = 0
+        self.joiners = 0
+
+    async def _produce(self, key, flight, factory, on_complete):
+        completed = False
+        try:
+            stream = factory()
+            try:
+                async for chunk in stream:
+                    await flight.publish(chunk)
+                else:
+                    completed = True
+            finally:
+                await stream.aclose()
+        except Exception as e:
+            logging.error(f"Coalesced stream for {key!r} failed: {e}")
+            await flight.finish(e)
+        else:
+            await flight.finish()
+        finally:
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+        if completed and on_complete is not None:
+            # Usually a blocking store such as the response cache
+            await asyncio.to_thread(on_complete, flight.chunks)
+
+    def _join(self, key, factory, on_complete):
+        flight = self._flights.get(key)
+        if flight is not None:
+            self.joiners += 1
+            return flight
+        flight = AsyncFlight()
+        self._flights[key] = flight
+        self.leaders += 1
+        flight.task = asyncio.get_running_loop().create_task(self._produce(key, flight, factory, on_complete))
+        _tasks.add(flight.task)
+        flight.task.add_done_callback(_tasks.discard)
+        return flight
+
+    async def _subscribe(self, key, factory, on_complete):
+        flight = self._join(key, factory, on_complete)
+        flight.subscribers += 1
+        reader = flight.read()
+        try:
+            async for chunk in reader:
+                yield chunk
+        finally:
+            # Close the reader now rather than when it is collected, so it stops holding the producer back
+            await reader.aclose()
+            flight.subscribers -= 1
+            if flight.subscribers == 0 and not flight.done:
+                flight.abandoned = True
+                if self._flights.get(key) is flight:
+                    del self._flights[key]
+                flight.task.cancel()
+
+    def stream(self, key, factory, on_complete=None):
+        return self._subscribe(key, factory, on_complete)
+
+    def stats(self):
+        return {"in_flight": len(self._flights), "upstream_calls": self.leaders, "coalesced": self.joiners}
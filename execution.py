@@ -0,0 +1,394 @@
+import asyncio
+import logging
+import os
+import queue
+import threading
+import time
+from contextlib import nullcontext
+from dataclasses import dataclass
+
+import thalamus
+import tracing
+from coalesce import STREAM_BUFFER
+from scheduler import PRIORITY_INTERACTIVE, estimate_tokens
+from telemetry import telemetry as default_telemetry
+
+# Execution policy for provider streams: per-model latency budgets, a hedged
+# second request once the primary is slower than its usual p95 time to first
+# token, fallback through thalamus.models on failure, and cancellation of
+# whichever attempts lose the race to the first token.
+
+
+class ExecutionError(RuntimeError):
+    pass
+
+
+@dataclass
+class LatencyBudget:
+    ttft: float  # seconds allowed before the first token
+    total: float  # seconds allowed for the whole generation
+    hedge_after: float  # hedge delay used until enough TTFT samples exist
+
+
+DEFAULT_BUDGET = LatencyBudget(ttft=10.0, total=180.0, hedge_after=3.0)
+BUDGETS = {
+    "gpt-4": LatencyBudget(ttft=8.0, total=120.0, hedge_after=2.0),
+    "claude-3-sonnet-20240229": LatencyBudget(ttft=8.0, total=120.0, hedge_after=2.0),
+    "gemini-1.5-pro": LatencyBudget(ttft=8.0, total=120.0, hedge_after=2.0),
+    "mistralai/Mixtral-8x7B-Instruct-v0.1": LatencyBudget(ttft=6.0, total=90.0, hedge_after=1.5),
+    "meta-llama/Llama-2-70b-chat-hf": LatencyBudget(ttft=6.0, total=90.0, hedge_after=1.5),
+}
+MAX_HEDGES = int(os.environ.get("EXECUTION_MAX_HEDGES", 1))
+# How often an attempt blocked on a full queue checks whether it was cancelled
+PUT_POLL_INTERVAL = 0.05
+
+_END = object()
+
+
+def budget_for(model):
+    return BUDGETS.get(model, DEFAULT_BUDGET)
+
+def fallback_order(model):
+    """
+    The requested model first, then every other model in thalamus.models order.
+    """
+    return [model] + [m for m in thalamus.models if m != model]
+
+
+class _Attempt:
+
+    def __init__(self, model, started):
+        self.model = model
+        self.started = started
+        self.finished = False
+        # Missed its first-token budget, recorded as an error when the attempt ends
+        self.expired = False
+        self.cancelled = threading.Event()
+        self.task = None  # asyncio path only
+
+    def put(self, messages, item):
+        """
+        Block until the bounded queue has room, giving up if this attempt is
+        cancelled meanwhile.
+
+        :return: False if the attempt was cancelled before the item was queued
+        """
+        while not self.cancelled.is_set():
+            try:
+                messages.put(item, timeout=PUT_POLL_INTERVAL)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+
+class ExecutionPolicy:
+
+    def __init__(self, providers, backend_for, async_providers=None, telemetry=None, max_hedges=MAX_HEDGES, scheduler=None):
+        """
+        :param providers: Backend name -> streaming provider call, e.g. route.PROVIDERS
+        :param backend_for: Maps a model name to a key of providers
+        :param async_providers: Backend name -> async provider call, e.g. route.ASYNC_PROVIDERS
+        :param telemetry: telemetry.Telemetry every attempt is recorded in, the shared store by default
+        :param scheduler: Optional scheduler.Scheduler every attempt must get a slot from
+        """
+        self.providers = providers
+        self.async_providers = async_providers
+        self.backend_for = backend_for
+        self.scheduler = scheduler
+        self.telemetry = telemetry or default_telemetry
+        self.max_hedges = max_hedges
+        self.hedges = 0
+        self.fallbacks = 0
+        # execute() runs on many request threads at once
+        self._stats_lock = threading.Lock()
+
+    def hedge_delay(self, model):
+        budget = budget_for(model)
+        p95 = self.telemetry.ttft_percentile(model, 95)
+        return min(p95 if p95 is not None else budget.hedge_after, budget.ttft)
+
+    def _next_deadline(self, attempts, order, launched, now):
+        """
+        Work out when the race next needs attention.
+
+        :return: (seconds to wait, whether a hedge is due at that point)
+        """
+        active = [a for a in attempts if not a.finished]
+        deadlines = [a.started + budget_for(a.model).ttft for a in active]
+        hedge_at = None
+        if launched < len(order) and len(active) <= self.max_hedges and active:
+            latest = active[-1]
+            hedge_at = latest.started + self.hedge_delay(latest.model)
+            deadlines.append(hedge_at)
+        wait = max(min(deadlines) - now, 0) if deadlines else 0
+        return wait, hedge_at is not None and hedge_at <= now
+
+    def _expire(self, attempts, now, cancel):
+        for a in attempts:
+            if not a.finished and now >= a.started + budget_for(a.model).ttft:
+                logging.warning(f"{a.model} missed its {budget_for(a.model).ttft}s first-token budget")
+                a.finished = True
+                a.expired = True
+                cancel(a)
+
+    def _count(self, counter):
+        with self._stats_lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def _record(self, attempt, first_at, tokens, error):
+        # Every attempt is recorded here once, when it ends, expired ones included
+        error = error or attempt.expired
+        if first_at is None and not error:
+            # Cancelled before producing anything, says nothing about the model
+            return
+        now = time.monotonic()
+        self.telemetry.record(
+            attempt.model,
+            ttft=first_at - attempt.started if first_at is not None else None,
+            tokens=tokens,
+            duration=now - first_at if first_at is not None else None,
+            error=error,
+        )
+
+    def _trace(self, span, acquire, first_at, tokens, cancelled):
+        acquire.end()
+        if first_at is not None:
+            tracing.record("provider.stream", time.monotonic() - first_at, span,
+                           model=span.attributes["model"], backend=span.attributes["backend"], tokens=tokens)
+        span.set(tokens=tokens, cancelled=cancelled)
+        span.end()
+
+    def _slot(self, backend, priority, query):
+        if self.scheduler is None:
+            return nullcontext(None)
+        return self.scheduler.slot(backend, priority, estimate_tokens(query))
+
+    def _aslot(self, backend, priority, query):
+        if self.scheduler is None:
+            return nullcontext(None)
+        return self.scheduler.aslot(backend, priority, estimate_tokens(query))
+
+    def execute(self, model, query, priority=PRIORITY_INTERACTIVE):
+        """
+        Stream query from model under the policy, hedging and falling back as needed.
+
+        :param priority: Scheduler priority for every attempt, see scheduler.PRIORITY_*
+        :return: An iterator over the winning attempt's chunks
+        """
+        order = fallback_order(model)
+        # Bounded, so a slow consumer stops the attempt threads reading from their providers
+        messages = queue.Queue(maxsize=STREAM_BUFFER)
+        attempts = []
+        request = tracing.current_span()
+
+        def run(attempt):
+            backend = self.backend_for(attempt.model)
+            first_at, tokens, error = None, 0, False
+            # Each attempt owns its thread, provider connect spans nest under it
+            span = tracing.start_span("provider.attempt", request, model=attempt.model, backend=backend)
+            tracing.activate(span)
+            acquire = tracing.start_span("connection.acquire", model=attempt.model, backend=backend)
+            try:
+                with self._slot(backend, priority, query) as slot:
+                    acquire.end()
+                    if attempt.cancelled.is_set():
+                        # Waiting for capacity outlasted the race
+                        if slot is not None:
+                            slot.cancel()
+                        return
+                    called_at = time.monotonic()
+                    stream = iter(self.providers[backend](query))
+                    try:
+                        # Checked before every read, so an attempt that lost the race
+                        # gives up without waiting on the provider again. A read that
+                        # is already blocked cannot be interrupted from another thread.
+                        while not attempt.cancelled.is_set():
+                            chunk = next(stream, _END)
+                            if chunk is _END:
+                                break
+                            if first_at is None:
+                                first_at = time.monotonic()
+                                tracing.record("provider.ttfb", first_at - called_at, model=attempt.model, backend=backend)
+                                if slot is not None:
+                                    slot.first_token()
+                            tokens += 1
+                            if not attempt.put(messages, (attempt, "chunk", chunk)):
+                                return
+                    finally:
+                        if attempt.cancelled.is_set() and slot is not None:
+                            slot.cancel()
+                        close = getattr(stream, "close", None)
+                        if close:
+                            close()
+            except Exception as e:
+                error = True
+                span.end(error=e)
+                attempt.put(messages, (attempt, "error", e))
+                return
+            finally:
+                self._record(attempt, first_at, tokens, error)
+                self._trace(span, acquire, first_at, tokens, attempt.cancelled.is_set())
+            attempt.put(messages, (attempt, "done", None))
+
+        def launch():
+            attempt = _Attempt(order[len(attempts)], time.monotonic())
+            attempts.append(attempt)
+            threading.Thread(target=run, args=(attempt,), daemon=True).start()
+
+        def cancel(attempt):
+            attempt.cancelled.set()
+
+        launch()
+        winner, first = None, None
+        try:
+            while winner is None:
+                now = time.monotonic()
+                if all(a.finished for a in attempts):
+                    if len(attempts) >= len(order):
+                        raise ExecutionError(f"All providers failed for model {model}")
+                    self._count("fallbacks")
+                    launch()
+                    continue
+                wait, hedge_due = self._next_deadline(attempts, order, len(attempts), now)
+                if hedge_due:
+                    self._count("hedges")
+                    launch()
+                    continue
+                try:
+                    attempt, kind, payload = messages.get(timeout=wait)
+                except queue.Empty:
+                    self._expire(attempts, time.monotonic(), cancel)
+                    continue
+                if attempt.finished:
+                    continue
+                if kind == "error":
+                    logging.warning(f"{attempt.model} failed before its first token: {payload}")
+                    attempt.finished = True
+                    continue
+                winner, first = attempt, (kind, payload)
+                for other in attempts:
+                    if other is not winner:
+                        other.finished = True
+                        cancel(other)
+
+            deadline = winner.started + budget_for(winner.model).total
+            kind, payload = first
+            while kind == "chunk":
+                yield payload
+                while True:
+                    try:
+                        attempt, kind, payload = messages.get(timeout=max(deadline - time.monotonic(), 0))
+                    except queue.Empty:
+                        raise ExecutionError(f"{winner.model} exceeded its {budget_for(winner.model).total}s total budget")
+                    if attempt is winner:
+                        break
+            if kind == "error":
+                raise payload
+        finally:
+            for attempt in attempts:
+                cancel(attempt)
+
+    async def aexecute(self, model, query, priority=PRIORITY_INTERACTIVE):
+        """
+        asyncio version of execute, losing attempts are cancelled as tasks.
+        """
+        order = fallback_order(model)
+        messages = asyncio.Queue(STREAM_BUFFER)
+        attempts = []
+        request = tracing.current_span()
+
+        async def run(attempt):
+            backend = self.backend_for(attempt.model)
+            first_at, tokens, error, cancelled = None, 0, False, False
+            # Tasks copy the context they were created in, so this stays local to the attempt
+            span = tracing.start_span("provider.attempt", request, model=attempt.model, backend=backend)
+            tracing.activate(span)
+            acquire = tracing.start_span("connection.acquire", model=attempt.model, backend=backend)
+            try:
+                async with self._aslot(backend, priority, query) as slot:
+                    acquire.end()
+                    called_at = time.monotonic()
+                    async for chunk in self.async_providers[backend](query):
+                        if first_at is None:
+                            first_at = time.monotonic()
+                            tracing.record("provider.ttfb", first_at - called_at, model=attempt.model, backend=backend)
+                            if slot is not None:
+                                slot.first_token()
+                        tokens += 1
+                        await messages.put((attempt, "chunk", chunk))
+            except asyncio.CancelledError:
+                cancelled = True
+                raise
+            except Exception as e:
+                error = True
+                span.end(error=e)
+                await messages.put((attempt, "error", e))
+                return
+            finally:
+                self._record(attempt, first_at, tokens, error)
+                self._trace(span, acquire, first_at, tokens, cancelled)
+            await messages.put((attempt, "done", None))
+
+        def launch():
+            attempt = _Attempt(order[len(attempts)], time.monotonic())
+            attempts.append(attempt)
+            attempt.task = asyncio.get_running_loop().create_task(run(attempt))
+
+        def cancel(attempt):
+            if attempt.task is not None:
+                attempt.task.cancel()
+
+        launch()
+        winner, first = None, None
+        try:
+            while winner is None:
+                now = time.monotonic()
+                if all(a.finished for a in attempts):
+                    if len(attempts) >= len(order):
+                        raise ExecutionError(f"All providers failed for model {model}")
+                    self._count("fallbacks")
+                    launch()
+                    continue
+                wait, hedge_due = self._next_deadline(attempts, order, len(attempts), now)
+                if hedge_due:
+                    self._count("hedges")
+                    launch()
+                    continue
+                try:
+                    attempt, kind, payload = await asyncio.wait_for(messages.get(), timeout=wait)
+                except asyncio.TimeoutError:
+                    self._expire(attempts, time.monotonic(), cancel)
+                    continue
+                if attempt.finished:
+                    continue
+                if kind == "error":
+                    logging.warning(f"{attempt.model} failed before its first token: {payload}")
+                    attempt.finished = True
+                    continue
+                winner, first = attempt, (kind, payload)
+                for other in attempts:
+                    if other is not winner:
+                        other.finished = True
+                        cancel(other)
+
+            deadline = winner.started + budget_for(winner.model).total
+            kind, payload = first
+            while kind == "chunk":
+                yield payload
+                while True:
+                    try:
+                        attempt, kind, payload = await asyncio.wait_for(messages.get(), timeout=max(deadline - time.monotonic(), 0))
+                    except asyncio.TimeoutError:
+                        raise ExecutionError(f"{winner.model} exceeded its {budget_for(winner.model).total}s total budget")
+                    if attempt is winner:
+                        break
+            if kind == "error":
+                raise payload
+        finally:
+            for attempt in attempts:
+                cancel(attempt)
+
+    def stats(self):
+        with self._stats_lock:
+            return {"hedges": self.hedges, "fallbacks": self.fallbacks}
@@ -0,0 +1,168 @@
+import json
+import os
+import re
+import threading
+from functools import lru_cache
+
+from clients import OLLAMA_KEEP_ALIVE, OLLAMA_MODELS, get_client
+
+# Optional LLM-based router driven by the system prompt in canned/context.txt.
+# ROUTER_MODE=llm enables it in thalamus, with the trained classifier as the
+# fallback. The context is read and tokenized once per process and always sent
+# as the same leading bytes, so the provider's prompt cache serves it and only
+# the user query is processed per decision.
+
+CONTEXT_PATH = os.environ.get("ROUTER_CONTEXT", os.path.join(os.path.dirname(os.path.abspath(__file__)), "canned", "context.txt"))
+ROUTER_LLM_BACKEND = os.environ.get("ROUTER_LLM_BACKEND", "anthropic")
+ROUTER_LLM_MODELS = {
+    "anthropic": os.environ.get("ROUTER_ANTHROPIC_MODEL", "claude-3-5-sonnet-20240620"),
+    "openai": os.environ.get("ROUTER_OPENAI_MODEL", "gpt-4o-mini"),
+    "llama": OLLAMA_MODELS["llama"],
+    "mistral": OLLAMA_MODELS["mistral"],
+}
+ROUTER_MAX_TOKENS = 200
+
+# Anthropic ignores cache_control on prefixes shorter than this (Sonnet/Opus),
+# and bills cache writes at a premium, so short contexts are sent uncached
+ANTHROPIC_CACHE_MIN_TOKENS = 1024
+
+# Choices named in context.txt -> thalamus.models. Agent choices have no
+# dedicated model yet and fall through to the classifier.
+CHOICES = {
+    "gpt-4o": "gpt-4",
+    "claude 3.5 sonnet": "claude-3-sonnet-20240229",
+    "gemini 1.5 pro": "gemini-1.5-pro",
+    "mixtral": "mistralai/Mixtral-8x7B-Instruct-v0.1",
+    "dolphin": "mistralai/Mixtral-8x7B-Instruct-v0.1",
+    "llama default": "meta-llama/Llama-2-70b-chat-hf",
+}
+
+JSON_RE = re.compile(r"\{.*\}", re.DOTALL)
+
+
+class RouterContext:
+    def __init__(self, text, tokens):
+        self.text = text
+        self.tokens = tokens
+
+    @property
+    def n_tokens(self):
+        return len(self.tokens) if isinstance(self.tokens, list) else self.tokens
+
+
+@lru_cache(maxsize=None)
+def load_context(path=CONTEXT_PATH):
+    """
+    Read and tokenize the router system prompt, once per process.
+
+    :return: A RouterContext. tokens is the token id list when tiktoken is
+             installed, otherwise an estimated token count.
+    """
+    with open(path, encoding="utf-8") as f:
+        # Trailing whitespace differences would break the provider prefix match
+        text = f.read().strip()
+    try:
+        import tiktoken
+        tokens = tiktoken.get_encoding("cl100k_base").encode(text)
+    except ImportError:
+        tokens = len(text) // 4
+    return RouterContext(text, tokens)
+
+
+_stats = {"decisions": 0, "errors": 0, "prompt_tokens": 0, "cached_tokens": 0}
+_stats_lock = threading.Lock()
+
+def _record(prompt_tokens, cached_tokens):
+    with _stats_lock:
+        _stats["decisions"] += 1
+        _stats["prompt_tokens"] += prompt_tokens or 0
+        _stats["cached_tokens"] += cached_tokens or 0
+
+def anthropic_route(query, context):
+    system = {"type": "text", "text": context.text}
+    if context.n_tokens >= ANTHROPIC_CACHE_MIN_TOKENS:
+        system["cache_control"] = {"type": "ephemeral"}
+    response = get_client("anthropic").messages.create(
+        model=ROUTER_LLM_MODELS["anthropic"],
+        max_tokens=ROUTER_MAX_TOKENS,
+        system=[system],
+        messages=[{"role": "user", "content": query}],
+    )
+    usage = response.usage
+    cached = getattr(usage, "cache_read_input_tokens", 0) or 0
+    _record(usage.input_tokens + cached + (getattr(usage, "cache_creation_input_tokens", 0) or 0), cached)
+    return response.content[0].text
+
+def openai_route(query, context):
+    # OpenAI caches prompt prefixes of 1024+ tokens automatically, the static
+    # system message has to come first and be byte-identical every time
+    response = get_client("openai").chat.completions.create(
+        model=ROUTER_LLM_MODELS["openai"],
+        max_tokens=ROUTER_MAX_TOKENS,
+        messages=[
+            {"role": "system", "content": context.text},
+            {"role": "user", "content": query},
+        ],
+    )
+    usage = response.usage
+    details = getattr(usage, "prompt_tokens_details", None)
+    _record(usage.prompt_tokens, getattr(details, "cached_tokens", 0) if details else 0)
+    return response.choices[0].message.content
+
+def ollama_route(modal, query, context):
+    # With the model kept loaded, Ollama reuses the KV cache for the unchanged
+    # system prefix and only evaluates the query tokens
+    response = get_client(f"ollama_{modal}").generate(
+        model=ROUTER_LLM_MODELS[modal],
+        system=context.text,
+        prompt=query,
+        format="json",
+        keep_alive=OLLAMA_KEEP_ALIVE,
+        options={"num_predict": ROUTER_MAX_TOKENS},
+    )
+    evaluated = response.get("prompt_eval_count") or 0
+    total = context.n_tokens + len(query) // 4
+    _record(total, max(total - evaluated, 0))
+    return response["response"]
+
+ROUTERS = {
+    "anthropic": anthropic_route,
+    "openai": openai_route,
+    "llama": lambda query, context: ollama_route("llama", query, context),
+    "mistral": lambda query, context: ollama_route("mistral", query, context),
+}
+
+def parse_choice(output):
+    """
+    :param output: The router's reply, expected to contain {"choice": ...}
+    :return: A model from thalamus.models, or None for agents and unknown choices
+    """
+    match = JSON_RE.search(output)
+    if not match:
+        return None
+    try:
+        choice = json.loads(match.group(0)).get("choice", "")
+    except (ValueError, AttributeError):
+        return None
+    return CHOICES.get(str(choice).strip().lower())
+
+def choose(query, backend=ROUTER_LLM_BACKEND):
+    """
+    Ask the LLM router which model should answer query.
+
+    :return: A model from thalamus.models, or None if the router made no usable choice
+    """
+    try:
+        return parse_choice(ROUTERS[backend](query, load_context()))
+    except Exception:
+        with _stats_lock:
+            _stats["errors"] += 1
+        raise
+
+def stats():
+    context = load_context()
+    with _stats_lock:
+        report = dict(_stats)
+    report["context_tokens"] = context.n_tokens
+    report["cached_fraction"] = report["cached_tokens"] / report["prompt_tokens"] if report["prompt_tokens"] else 0.0
+    return report
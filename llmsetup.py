@@ -1,30 +1,64 @@
 import os
-import google.generativeai as genai
-import os
-from langchain_community.llms import HuggingFaceHub
 from dotenv import load_dotenv
 
 load_dotenv()
 
+# Environment variable holding each backend's credential. Keys are read when a
+# backend is first used, so a worker missing one key still serves the others.
+BACKEND_ENV = {
+    "openai": "OPENAI_API_KEY",
+    "anthropic": "ANTHROPIC_API_KEY",
+    "gemini": "API_KEY",
+    "huggingface": "HUGGINGFACE_API_KEY",
+}
+
 llm_config = {
     "config_list": [
         # GPT-4
-        {"model": "gpt-4", "api_key": os.environ["OPENAI_API_KEY"]},
+        {"model": "gpt-4", "api_key": os.environ.get("OPENAI_API_KEY")},
         
         # Claude 3.5 Sonnet
-        {"model": "claude-3-sonnet-20240229", "api_key": os.environ["ANTHROPIC_API_KEY"]},
+        {"model": "claude-3-sonnet-20240229", "api_key": os.environ.get("ANTHROPIC_API_KEY")},
         
         # Gemini 1.5 Pro
-        {"model": "gemini-1.5-pro", "api-key": os.environ["API_KEY"]},
+        {"model": "gemini-1.5-pro", "api-key": os.environ.get("API_KEY")},
         
         # Mixtral (via Hugging Face)
-        {"model": "mistralai/Mixtral-8x7B-Instruct-v0.1", "token": os.environ["HUGGINGFACE_API_KEY"]},
+        {"model": "mistralai/Mixtral-8x7B-Instruct-v0.1", "token": os.environ.get("HUGGINGFACE_API_KEY")},
         
         # LLAMA 2 (via Hugging Face)
-        {"model": "meta-llama/Llama-2-70b-chat-hf", "token": os.environ["HUGGINGFACE_API_KEY"]},
+        {"model": "meta-llama/Llama-2-70b-chat-hf", "token": os.environ.get("HUGGINGFACE_API_KEY")},
         
         # Dolphin (via Hugging Face)
-        {"model": "cognitivecomputations/dolphin-2.6-mixtral-8x7b", "token": os.environ["HUGGINGFACE_API_KEY"]}
+        {"model": "cognitivecomputations/dolphin-2.6-mixtral-8x7b", "token": os.environ.get("HUGGINGFACE_API_KEY")}
     ]
 }
 
+def backend_for(model):
+    """
+    Map a model name from thalamus.models to the backend that serves it.
+    """
+    if "gpt" in model:
+        return "openai"
+    if "claude" in model:
+        return "anthropic"
+    if "gemini" in model:
+        return "gemini"
+    if "llama" in model:
+        return "llama"
+    if "mistral" in model:
+        return "mistral"
+    raise ValueError(f"No backend configured for model: {model}")
+
+def require(backend):
+    """
+    Validate and return the configuration for one backend.
+
+    :param backend: A key of BACKEND_ENV
+    :return: {"api_key": ...}
+    """
+    env = BACKEND_ENV[backend]
+    value = os.environ.get(env)
+    if not value:
+        raise ValueError(f"{env} is not set, the {backend} backend is unavailable.")
+    return {"api_key": value}
@@ -0,0 +1,74 @@
+"""
+Local stand-in for an OpenTelemetry collector. Accepts OTLP/HTTP JSON trace
+exports on /v1/traces, prints one line per span and optionally appends the
+spans to a JSON lines file.
+
+    python otlp_collector.py --port 4318 --output spans.jsonl
+    OTLP_ENDPOINT=http://127.0.0.1:4318 python app.py
+"""
+import argparse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from json import dumps, loads
+
+
+def spans_in(payload):
+    for resource in payload.get("resourceSpans", []):
+        for scope in resource.get("scopeSpans", []):
+            yield from scope.get("spans", [])
+
+
+def make_handler(output):
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            if self.path != "/v1/traces":
+                self.send_error(404)
+                return
+            body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            try:
+                payload = loads(body)
+            except ValueError:
+                # The stand-in only speaks the JSON encoding, not protobuf
+                self.send_error(415, "Expected OTLP/HTTP JSON")
+                return
+
+            for span in spans_in(payload):
+                duration_ms = (int(span["endTimeUnixNano"]) - int(span["startTimeUnixNano"])) / 1e6
+                attributes = {a["key"]: next(iter(a["value"].values())) for a in span.get("attributes", [])}
+                print(f"{span['traceId'][:8]} {span['name']:<24} {duration_ms:9.2f} ms  {attributes}")
+                if output:
+                    output.write(dumps(span) + "\n")
+            if output:
+                output.flush()
+
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.end_headers()
+            self.wfile.write(b"{}")
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=4318)
+    parser.add_argument("--output")
+    args = parser.parse_args()
+
+    output = open(args.output, "a") if args.output else None
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(output))
+    print(f"Collecting OTLP traces on http://{args.host}:{args.port}/v1/traces")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if output:
+            output.close()
+
+
+if __name__ == "__main__":
+    main()
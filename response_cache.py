@@ -0,0 +1,276 @@
+import hashlib
+import json
+import math
+import os
+import random
+import re
+import sqlite3
+import threading
+import time
+from zlib import crc32
+
+# Response cache for route_query. The exact tier is a SQLite table keyed by a
+# hash of (model, prompt, params) holding the chunk list, so cached answers are
+# replayed chunk-by-chunk. The optional semantic tier embeds prompts locally
+# and finds near neighbours through random-hyperplane LSH.
+#
+# The cache is opt-in with RESPONSE_CACHE=1. Entries expire RESPONSE_CACHE_TTL
+# seconds after they are stored, so answers to time-sensitive prompts do not
+# outlive the facts they state. Hits only note the access time in memory; the
+# times are written back in batches for LRU eviction.
+
+CACHE_PATH = os.environ.get("RESPONSE_CACHE_PATH", "response_cache.sqlite3")
+CACHE_MAX_BYTES = int(os.environ.get("RESPONSE_CACHE_MAX_BYTES", 256 * 1024 * 1024))
+CACHE_TTL = float(os.environ.get("RESPONSE_CACHE_TTL", 24 * 3600))
+# Hits noted before their access times are written back
+TOUCH_BATCH = 256
+
+EMBEDDING_DIMS = 256
+WORD_RE = re.compile(r"\w+")
+
+def cache_key(model, prompt, params=None):
+    payload = json.dumps([model, prompt, params or {}], sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+def hashed_embedding(text, dims=EMBEDDING_DIMS):
+    """
+    Cheap local embedding: signed feature hashing of words and character
+    trigrams, L2 normalized. Good enough to catch rephrasings of one prompt.
+    """
+    vec = [0.0] * dims
+    for word in WORD_RE.findall(text.casefold()):
+        grams = [word] + [word[i:i + 3] for i in range(len(word) - 2)]
+        for gram in grams:
+            h = crc32(gram.encode())
+            vec[h % dims] += 1.0 if (h >> 16) & 1 else -1.0
+    norm = math.sqrt(sum(v * v for v in vec))
+    return [v / norm for v in vec] if norm else vec
+
+
+class SemanticIndex:
+    """
+    Approximate nearest-neighbour index over unit vectors using several
+    random-hyperplane LSH tables. Candidates are re-ranked by exact cosine.
+    """
+
+    def __init__(self, dims=EMBEDDING_DIMS, tables=8, bits=10, seed=0):
+        rng = random.Random(seed)
+        self.planes = [[[rng.gauss(0, 1) for _ in range(dims)] for _ in range(bits)] for _ in range(tables)]
+        self.buckets = [{} for _ in range(tables)]
+        self.vectors = {}  # key -> (namespace, vector)
+
+    def _signatures(self, namespace, vector):
+        for planes in self.planes:
+            bits = 0
+            for plane in planes:
+                bits = (bits << 1) | (sum(p * v for p, v in zip(plane, vector)) >= 0)
+            yield (namespace, bits)
+
+    def add(self, key, namespace, vector):
+        self.vectors[key] = (namespace, vector)
+        for table, signature in zip(self.buckets, self._signatures(namespace, vector)):
+            table.setdefault(signature, set()).add(key)
+
+    def remove(self, key):
+        entry = self.vectors.pop(key, None)
+        if entry is None:
+            return
+        for table, signature in zip(self.buckets, self._signatures(*entry)):
+            keys = table.get(signature)
+            if keys:
+                keys.discard(key)
+                if not keys:
+                    del table[signature]
+
+    def nearest(self, namespace, vector, threshold):
+        candidates = set()
+        for table, signature in zip(self.buckets, self._signatures(namespace, vector)):
+            candidates |= table.get(signature, set())
+        best, best_score = None, threshold
+        for key in candidates:
+            score = sum(a * b for a, b in zip(vector, self.vectors[key][1]))
+            if score >= best_score:
+                best, best_score = key, score
+        return best
+
+
+class ResponseCache:
+
+    def __init__(self, path=CACHE_PATH, max_bytes=CACHE_MAX_BYTES, semantic=False, similarity_threshold=0.92, embed=hashed_embedding, ttl=CACHE_TTL):
+        """
+        :param ttl: Seconds an entry is served after it is stored, 0 keeps entries until evicted
+        """
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.semantic = semantic
+        self.similarity_threshold = similarity_threshold
+        self.embed = embed
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, namespace TEXT, chunks TEXT, embedding TEXT, size INTEGER, last_access REAL, created REAL)"
+        )
+        if "created" not in {row[1] for row in self._db.execute("PRAGMA table_info(responses)")}:
+            # Cache files written before entries expired
+            self._db.execute("ALTER TABLE responses ADD COLUMN created REAL")
+            self._db.execute("UPDATE responses SET created = last_access")
+        self._db.execute("CREATE INDEX IF NOT EXISTS responses_last_access ON responses (last_access)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS responses_created ON responses (created)")
+        self._total_bytes = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        # key -> last access time, not yet written back
+        self._touched = {}
+        self.hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+        self.index = SemanticIndex() if semantic else None
+        if semantic:
+            rows = self._db.execute("SELECT key, namespace, embedding FROM responses WHERE embedding IS NOT NULL AND created >= ?", (self._cutoff(),))
+            for key, namespace, embedding in rows:
+                self.index.add(key, namespace, json.loads(embedding))
+
+    @staticmethod
+    def _namespace(model, params):
+        return cache_key(model, "", params)
+
+    def _cutoff(self):
+        # Entries stored before this are expired
+        return time.time() - self.ttl if self.ttl else -math.inf
+
+    def _load(self, key):
+        row = self._db.execute("SELECT chunks FROM responses WHERE key = ? AND created >= ?", (key, self._cutoff())).fetchone()
+        if row is None:
+            return None
+        self._touched[key] = time.time()
+        if len(self._touched) >= TOUCH_BATCH:
+            self._flush_touches()
+        return json.loads(row[0])
+
+    def _flush_touches(self):
+        if not self._touched:
+            return
+        self._db.execute("BEGIN")
+        self._db.executemany("UPDATE responses SET last_access = ? WHERE key = ?", [(t, key) for key, t in self._touched.items()])
+        self._db.execute("COMMIT")
+        self._touched.clear()
+
+    def get(self, model, prompt, params=None):
+        """
+        :return: The cached chunk list, or None on a miss
+        """
+        key = cache_key(model, prompt, params)
+        vector = None
+        if self.semantic:
+            vector = self.embed(prompt)
+        with self._lock:
+            chunks = self._load(key)
+            if chunks is not None:
+                self.hits += 1
+                return chunks
+            if self.semantic:
+                similar = self.index.nearest(self._namespace(model, params), vector, self.similarity_threshold)
+                if similar is not None:
+                    chunks = self._load(similar)
+                    if chunks is not None:
+                        self.semantic_hits += 1
+                        return chunks
+            self.misses += 1
+            return None
+
+    def put(self, model, prompt, chunks, params=None):
+        key = cache_key(model, prompt, params)
+        namespace = self._namespace(model, params)
+        payload = json.dumps(chunks, ensure_ascii=False)
+        vector = self.embed(prompt) if self.semantic else None
+        size = len(payload.encode()) + len(key)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._db.execute("SELECT size FROM responses WHERE key = ?", (key,)).fetchone()
+            if old:
+                self._total_bytes -= old[0]
+            now = time.time()
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses (key, namespace, chunks, embedding, size, last_access, created) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, namespace, payload, json.dumps(vector) if vector else None, size, now, now),
+            )
+            self._touched.pop(key, None)
+            self._total_bytes += size
+            if self.semantic:
+                self.index.remove(key)
+                self.index.add(key, namespace, vector)
+            self._expire()
+            self._evict()
+
+    def _delete(self, key, size):
+        self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+        self._touched.pop(key, None)
+        if self.semantic:
+            self.index.remove(key)
+        self._total_bytes -= size
+
+    def _expire(self):
+        # Reclaim the space of expired entries, they are no longer served
+        for key, size in self._db.execute("SELECT key, size FROM responses WHERE created < ?", (self._cutoff(),)).fetchall():
+            self._delete(key, size)
+            self.expirations += 1
+
+    def _evict(self):
+        # Drop least recently used responses until the stored bytes fit the budget
+        if self._total_bytes > self.max_bytes:
+            self._flush_touches()
+        while self._total_bytes > self.max_bytes:
+            rows = self._db.execute("SELECT key, size FROM responses ORDER BY last_access LIMIT 64").fetchall()
+            if not rows:
+                self._total_bytes = 0
+                return
+            for key, size in rows:
+                self._delete(key, size)
+                self.evictions += 1
+                if self._total_bytes <= self.max_bytes:
+                    return
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.semantic_hits + self.misses
+            return {
+                "entries": self._db.execute("SELECT COUNT(*) FROM responses").fetchone()[0],
+                "bytes": self._total_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "semantic_hits": self.semantic_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "hit_rate": (self.hits + self.semantic_hits) / lookups if lookups else 0.0,
+            }
+
+
+def replay(chunks):
+    """
+    Yield cached chunks one at a time so clients keep streaming semantics.
+    """
+    for chunk in chunks:
+        yield chunk
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+def get_cache():
+    """
+    The process-wide cache when RESPONSE_CACHE=1, otherwise None.
+    """
+    global _cache
+    if os.environ.get("RESPONSE_CACHE", "0") != "1":
+        return None
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = ResponseCache(semantic=os.environ.get("RESPONSE_CACHE_SEMANTIC", "0") == "1")
+    return _cache
@@ -1,167 +1,277 @@
-import random 
-
 import os
+import shlex
+import asyncio
+import concurrent.futures
+import threading
+from functools import partial
 
 #LLM IMPORTS
-from anthropic import Anthropic
-import google.generativeai as genai
-import openai
-import anthropic
-import paramiko
-import logger
 import time
 
-from huggingface_hub import InferenceClient
-from ollama import Client
-from .thalamus import find_llm
+from llmsetup import backend_for
+import tracing
+from thalamus import find_llm
+from coalesce import STREAM_BUFFER, AsyncSingleFlight, SingleFlight
+from execution import ExecutionPolicy
+from scheduler import PRIORITY_INTERACTIVE, Scheduler
+from clients import OLLAMA_KEEP_ALIVE, OLLAMA_MODELS, OLLAMA_TRANSPORT, get_client
+from response_cache import get_cache, replay
+from ssh_pool import STREAM_WINDOW, TARGET_HOSTS, find_ssh_key, get_pool, stream_channel
 
-def find_ssh_key():
-    possible_key_names = ['id_rsa', 'id_ed25519', 'id_ecdsa', 'id_dsa']
-    home_dir = os.path.expanduser('~')
-    ssh_dir = os.path.join(home_dir, '.ssh')
-    
-    for key_name in possible_key_names:
-        key_path = os.path.join(ssh_dir, key_name)
-        if os.path.isfile(key_path):
-            print(f"Found SSH key: {key_path}")
-            return key_path
+def ssh_ml_query(query, modal):
 
-    return None
+    target_host = TARGET_HOSTS[modal]
 
-def ssh_ml_query(query, modal):
+    # The prompt is quoted so the remote shell passes it to ollama as one literal argument
+    command = f"ollama run {shlex.quote(OLLAMA_MODELS[modal])} {shlex.quote(query)}"
+
+    session = None
+    try:
+        # Sessions are multiplexed over the pooled jump-host/target transports
+        # A small receive window bounds what queues up behind a slow client
+        # No pty: it would merge stderr into the answer and hide failures
+        session = get_pool().open_session(target_host, window_size=STREAM_WINDOW)
+        session.exec_command(command)
 
-    # SSH connection details
-    target_host = ""
+        # Decoded, coalesced frames, read from the channel only as fast as they
+        # are consumed. stderr is collected along the way and returned at EOF.
+        stderr = yield from stream_channel(session)
 
-    if modal == "mistral":
-        target_host = "100.81.81.162"
-    else:
-        target_host = '100.81.81.96'
+        # Raise instead of yielding the error as content, so the execution
+        # policy can tell a failure from an answer and fall back
+        session.settimeout(None)
+        status = session.recv_exit_status()
+        if status != 0:
+            error = stderr.decode('utf-8', errors='replace').strip()
+            raise RuntimeError(f"ollama run on {target_host} exited with {status}: {error}")
 
-    jump_host = '146.152.232.8'
-    jump_user = 'guest'
+    finally:
+        # Only the session is closed, the tunnel stays open for the next request
+        if session is not None:
+            session.close()
 
-    target_user = 'ubuntu'
-    
-    # Find SSH key
-    key_path = find_ssh_key()
-    if not key_path:
-        return "Error: No SSH key found"
+def ollama_query(query, modal):
+    # Streams NDJSON tokens from the Ollama API as the model produces them,
+    # keep_alive pins the model in GPU memory between requests
+    client = get_client(f"ollama_{modal}")
+    for chunk in client.generate(model=OLLAMA_MODELS[modal], prompt=query, stream=True, keep_alive=OLLAMA_KEEP_ALIVE):
+        if chunk["response"]:
+            yield chunk["response"]
 
-    # Create a new SSH client
-    ssh = paramiko.SSHClient()
-    ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+def openai_query(query):
+    client = get_client("openai")
 
-    try:
-        # Load the private key
-        private_key = paramiko.RSAKey.from_private_key_file(key_path)
-        
-        jump_client = paramiko.SSHClient()
-        jump_client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-        jump_client.connect(jump_host, username=jump_user, pkey=private_key)
-        
-        jump_transport = jump_client.get_transport()
-        dest_addr = (target_host, 22)
-        local_addr = ('', 0)
-        jump_channel = jump_transport.open_channel("direct-tcpip", dest_addr, local_addr)
-       
-        ssh.connect(target_host, username=target_user, sock=jump_channel, pkey=private_key)
-       
-        if modal == "mistral": command = f'ollama run mistral "{query}"'
-        else: command = f'ollama run llama3.1 "{query}"'
-    
-        # Open a session
-        session = ssh.get_transport().open_session()
-        session.get_pty()
-        session.exec_command(command)
+    stream = client.chat.completions.create(
+    model="gpt-4",
+    messages=[{"role": "user", "content": query}],
+    stream=True,
+    )
+    for chunk in stream:
+        if chunk.choices[0].delta.content is not None:
+            yield(chunk.choices[0].delta.content)
 
-        # Read the output
-        output = ""
-        while True:
-            if session.recv_ready():
-                chunk = session.recv(4096).decode('utf-8')
-                yield chunk
-            if session.exit_status_ready():
-                break
-            time.sleep(0.1)
+def anthropic_query(query):
+    client = get_client("anthropic")
+    with client.messages.stream(
+        model="claude-3-opus-20240229",
+        max_tokens=2000,
+        messages=[
+        {"role": "user", "content": query}
+        ]
+    ) as stream:
+        for text in stream.text_stream:
+            yield text
+
+def gemini_query(query):
+    gemini = get_client("gemini")
+    response = gemini.generate_content(query, stream=True)
+    for chunk in response:
+        if chunk.text:
+            yield chunk.text
+
+# Backend name -> streaming provider call. Benchmarks swap these for stubs.
+PROVIDERS = {
+    "openai": openai_query,
+    "anthropic": anthropic_query,
+    "gemini": gemini_query,
+    "llama": partial(ollama_query, modal="llama"),
+    "mistral": partial(ollama_query, modal="mistral"),
+}
+
+if OLLAMA_TRANSPORT == "cli":
+    PROVIDERS["llama"] = partial(ssh_ml_query, modal="llama")
+    PROVIDERS["mistral"] = partial(ssh_ml_query, modal="mistral")
+
+in_flight = SingleFlight()
+
+def traced_route(query, slo_ttft=None):
+    request = tracing.current_span()
+    with tracing.span("route.decision") as decision:
+        model = find_llm(query, slo_ttft)
+        decision.set(model=model)
+    # Label the whole request with the model it was routed to
+    if request is not None:
+        request.set(model=model)
+    return model
+
+def route_query(query, priority=PRIORITY_INTERACTIVE, slo_ttft=None):
+
+    model = traced_route(query, slo_ttft)
+
+    for chunk in stream_model(model, query, priority):
+        yield chunk
+
+def stream_model(model, query, priority=PRIORITY_INTERACTIVE):
+    """
+    Stream query from an already chosen model, through the response cache,
+    request coalescing and the execution policy.
+    """
+    cache = get_cache()
+    cached = cache.get(model, query) if cache else None
+    if cached is not None:
+        yield from replay(cached)
+        return
 
+    # Identical prompts already in flight share that generation instead of
+    # opening another provider stream. Only complete generations are cached.
+    store = partial(cache.put, model, query) if cache else None
+    provider = partial(policy.execute, model, query, priority)
+    for chunk in in_flight.stream((model, query), provider, on_complete=store):
+        yield chunk
 
-        # Check if there's any error
-        if session.recv_stderr_ready():
-            error = session.recv_stderr(4096).decode('utf-8')
-            return f"Error: {error}"
 
-        return output
+#ASYNC PROVIDERS, awaited by the ASGI app in asgi.py
+async def iterate_in_thread(iterator):
+    """
+    Drive a blocking iterator on a worker thread and hand its items to the event loop.
 
+    :param iterator: A blocking iterator, e.g. the paramiko based ssh_ml_query
+    :return: An async iterator over the same items
+    """
+    loop = asyncio.get_running_loop()
+    # Bounded, so the worker only reads ahead of a slow client by STREAM_BUFFER items
+    queue = asyncio.Queue(STREAM_BUFFER)
+    stopped = threading.Event()
+    done = object()
 
-    except Exception as e:
-  
-        return f"An error occurred: {str(e)}"
+    def put(item):
+        # Block the worker until the loop has room, or the consumer has gone
+        if stopped.is_set():
+            return False
+        future = asyncio.run_coroutine_threadsafe(queue.put(item), loop)
+        while not stopped.is_set():
+            try:
+                future.result(timeout=0.1)
+                return True
+            except concurrent.futures.TimeoutError:
+                pass
+        future.cancel()
+        return False
 
+    def pump():
+        try:
+            for item in iterator:
+                if not put(item):
+                    break
+        except Exception as e:
+            put(e)
+        finally:
+            put(done)
+            close = getattr(iterator, "close", None)
+            if close:
+                close()
+
+    loop.run_in_executor(None, pump)
+    try:
+        while True:
+            item = await queue.get()
+            if item is done:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
     finally:
-     
-        ssh.close()
-        jump_client.close()
-
-#Route Query through the Phi 3 Router, Return Either Agent Template or LLM Model
-def route_query(query):
-
-    model = find_llm(query)
-    final_response = ""
-    print(model)
-    
-    if "gpt" in model:
-        print('1')
-        
-        client = openai.OpenAI()
-
-        stream = client.chat.completions.create(
-        model="gpt-4",
-        messages=[{"role": "user", "content": query}],
-        stream=True,
-        )
-        for chunk in stream:
-            if chunk.choices[0].delta.content is not None:
-                yield(chunk.choices[0].delta.content)
-
-    if "claude" in model or "gemini" in model:
-        print('2')
-        client = anthropic.Anthropic(api_key=os.environ.get("ANTHROPIC_API_KEY"))
-        with client.messages.stream(
-            model="claude-3-opus-20240229",
-            max_tokens=2000,
-            messages=[
-            {"role": "user", "content": query}
-            ]
-        ) as stream:
-            for text in stream.text_stream:
-                yield text
-    if "gemini" in model:
-        print('3')
-        genai.configure(api_key=os.environ["API_KEY"])
-        model = genai.GenerativeModel("gemini-1.5-flash")
-        response = model.generate_content("Introduce yourself", stream=True)
-
-    if "llama" in model:
-        print('4')
-        for chunk in ssh_ml_query(query,"llama"):
-            yield chunk
-    if "mistral" in model:
-        for chunk in ssh_ml_query(query,"mistral"):
-            #print(chunk)
+        # Client went away or the stream finished, let the worker thread exit early
+        stopped.set()
+
+async def openai_aquery(query):
+    client = get_client("async_openai")
+
+    stream = await client.chat.completions.create(
+    model="gpt-4",
+    messages=[{"role": "user", "content": query}],
+    stream=True,
+    )
+    async for chunk in stream:
+        if chunk.choices[0].delta.content is not None:
+            yield chunk.choices[0].delta.content
+
+async def anthropic_aquery(query):
+    client = get_client("async_anthropic")
+    async with client.messages.stream(
+        model="claude-3-opus-20240229",
+        max_tokens=2000,
+        messages=[
+        {"role": "user", "content": query}
+        ]
+    ) as stream:
+        async for text in stream.text_stream:
+            yield text
+
+async def gemini_aquery(query):
+    gemini = get_client("gemini")
+    response = await gemini.generate_content_async(query, stream=True)
+    async for chunk in response:
+        if chunk.text:
+            yield chunk.text
+
+async def ollama_aquery(query, modal):
+    client = get_client(f"async_ollama_{modal}")
+    async for chunk in await client.generate(model=OLLAMA_MODELS[modal], prompt=query, stream=True, keep_alive=OLLAMA_KEEP_ALIVE):
+        if chunk["response"]:
+            yield chunk["response"]
+
+async def ssh_ml_aquery(query, modal):
+    async for chunk in iterate_in_thread(ssh_ml_query(query, modal)):
+        yield chunk
+
+ASYNC_PROVIDERS = {
+    "openai": openai_aquery,
+    "anthropic": anthropic_aquery,
+    "gemini": gemini_aquery,
+    "llama": partial(ollama_aquery, modal="llama"),
+    "mistral": partial(ollama_aquery, modal="mistral"),
+}
+
+if OLLAMA_TRANSPORT == "cli":
+    ASYNC_PROVIDERS["llama"] = partial(ssh_ml_aquery, modal="llama")
+    ASYNC_PROVIDERS["mistral"] = partial(ssh_ml_aquery, modal="mistral")
+
+# Latency budgets, hedging and fallback around both provider tables
+# Every attempt waits for a slot on its backend, see scheduler.BACKEND_LIMITS
+scheduler = Scheduler()
+policy = ExecutionPolicy(PROVIDERS, backend_for, ASYNC_PROVIDERS, scheduler=scheduler)
+
+async_in_flight = AsyncSingleFlight()
+
+async def aroute_query(query, priority=PRIORITY_INTERACTIVE, slo_ttft=None):
+    # With ROUTER_MODE=llm the decision is a blocking provider call, keep it off the event loop
+    model = await asyncio.to_thread(traced_route, query, slo_ttft)
+
+    async for chunk in astream_model(model, query, priority):
+        yield chunk
+
+async def astream_model(model, query, priority=PRIORITY_INTERACTIVE):
+    cache = get_cache()
+    # The cache is SQLite behind a lock, look it up off the event loop
+    cached = await asyncio.to_thread(cache.get, model, query) if cache else None
+    if cached is not None:
+        for chunk in replay(cached):
             yield chunk
-        
-    return final_response
-
-
-#Testing Purposes
-def main():
-    query = "What Large Language Model are you"
-    '''
-    for chunk in route_query(query):
-        #print(chunk, end='', flush=True)
-'''
-    
-    
-if __name__ == "__main__":
-    main()
\ No newline at end of file
+        return
+
+    store = partial(cache.put, model, query) if cache else None
+    provider = partial(policy.aexecute, model, query, priority)
+    async for chunk in async_in_flight.stream((model, query), provider, on_complete=store):
+        yield chunk
+
@@ -0,0 +1,145 @@
+import json
+import math
+import os
+import re
+from zlib import crc32
+
+# Local routing engine. A query is turned into a sparse feature vector (length,
+# intent keywords, hashed word n-grams) and scored by a multinomial logistic
+# regression trained offline by train_router.py. Scoring is a few dozen dict
+# lookups, well under a millisecond, so routing never dominates latency.
+
+WEIGHTS_PATH = os.environ.get("ROUTER_WEIGHTS", os.path.join(os.path.dirname(os.path.abspath(__file__)), "canned", "router_weights.json"))
+HASH_BUCKETS = 1 << 14
+# Only the head of very long prompts is tokenized and hashed, which keeps
+# scoring time bounded no matter how large the prompt is
+MAX_QUERY_CHARS = 2048
+MAX_NGRAM_WORDS = 256
+
+TOKEN_RE = re.compile(r"[a-z0-9_]+|[^\sa-z0-9_]")
+
+# Intent lexicons, roughly following the model notes in canned/context.txt
+INTENTS = {
+    "code": {"code", "function", "python", "javascript", "java", "rust", "sql", "bug", "debug", "compile", "refactor",
+             "api", "class", "algorithm", "implement", "script", "regex", "typescript", "cpp", "stack", "error", "exception"},
+    "math": {"prove", "proof", "theorem", "integral", "derivative", "equation", "solve", "matrix", "probability",
+             "calculate", "compute", "statistics", "optimize", "lemma", "eigenvalue"},
+    "writing": {"write", "essay", "story", "draft", "letter", "email", "poem", "rewrite", "edit", "outline", "report",
+                "summary", "structure", "tone", "proposal", "document", "explain", "memo"},
+    "multimodal": {"image", "photo", "picture", "diagram", "chart", "video", "visual", "screenshot", "label", "annotate",
+                   "annotation", "table", "dataset", "ocr", "pdf", "plot", "classify"},
+    "lookup": {"what", "who", "when", "where", "define", "definition", "capital", "translate", "meaning", "synonym",
+               "spell", "convert", "list", "name"},
+    "chat": {"hi", "hello", "hey", "thanks", "thank", "feel", "recommend", "advice", "suggest", "favorite", "chat",
+             "joke", "fun", "tips", "should"},
+    "complex": {"analyze", "analysis", "compare", "tradeoffs", "design", "architecture", "reasoning", "step", "detailed",
+                "comprehensive", "evaluate", "strategy", "plan", "multi", "complex", "nuanced"},
+}
+
+def tokenize(query):
+    return TOKEN_RE.findall(query.lower())
+
+def extract_features(query):
+    """
+    Build the sparse feature vector for a query.
+
+    :param query: The raw user prompt
+    :return: A dict of feature name or hash bucket -> value
+    """
+    head = query[:MAX_QUERY_CHARS]
+    tokens = tokenize(head)
+    words = [t for t in tokens if t[0].isalnum()]
+    # Estimate the word count of truncated prompts from the head
+    n_words = len(words) if len(query) <= MAX_QUERY_CHARS else int(len(words) * len(query) / MAX_QUERY_CHARS)
+
+    features = {
+        "bias": 1.0,
+        "len_words": math.log1p(n_words) / 5,
+        "len_chars": math.log1p(len(query)) / 8,
+        "long": 1.0 if n_words > 60 else 0.0,
+        "short": 1.0 if n_words < 8 else 0.0,
+        "question": 1.0 if "?" in head else 0.0,
+        "code_block": 1.0 if "```" in head or "def " in head or "{" in head else 0.0,
+        "digits": min(sum(c.isdigit() for c in head) / 10, 1.0),
+        "newlines": min(head.count("\n") / 5, 1.0),
+    }
+
+    word_set = set(tokens)
+    for intent, lexicon in INTENTS.items():
+        hits = len(word_set & lexicon)
+        if hits:
+            features["intent_" + intent] = min(hits, 3) / 3
+
+    # Hashed unigrams and bigrams, crc32 is stable across processes unlike hash()
+    for i, word in enumerate(words[:MAX_NGRAM_WORDS]):
+        bucket = crc32(word.encode()) % HASH_BUCKETS
+        features[bucket] = features.get(bucket, 0.0) + 1.0
+        if i:
+            bucket = crc32(f"{words[i - 1]} {word}".encode()) % HASH_BUCKETS
+            features[bucket] = features.get(bucket, 0.0) + 1.0
+
+    # Scale the n-gram block so long prompts do not swamp the dense features
+    norm = 1.0 / math.sqrt(max(min(n_words, MAX_NGRAM_WORDS), 1))
+    for key in features:
+        if isinstance(key, int):
+            features[key] *= norm
+    return features
+
+
+class Router:
+    """
+    Multinomial logistic regression over the sparse features above.
+
+    weights maps a feature (name or hash bucket) to one weight per label.
+    """
+
+    def __init__(self, labels, weights):
+        self.labels = list(labels)
+        self.weights = weights
+
+    @classmethod
+    def load(cls, path=WEIGHTS_PATH):
+        with open(path) as f:
+            data = json.load(f)
+        weights = {}
+        for key, row in data["weights"].items():
+            weights[int(key) if key.isdigit() else key] = row
+        return cls(data["labels"], weights)
+
+    def save(self, path=WEIGHTS_PATH):
+        with open(path, "w") as f:
+            json.dump({"labels": self.labels, "weights": {str(k): [round(w, 5) for w in row] for k, row in self.weights.items()}}, f)
+
+    def scores(self, features):
+        scores = [0.0] * len(self.labels)
+        for key, value in features.items():
+            row = self.weights.get(key)
+            if row is None:
+                continue
+            for i, w in enumerate(row):
+                scores[i] += value * w
+        return scores
+
+    def probabilities(self, query):
+        scores = self.scores(extract_features(query))
+        top = max(scores)
+        exps = [math.exp(s - top) for s in scores]
+        total = sum(exps)
+        return [e / total for e in exps]
+
+    def predict(self, query, allowed=None):
+        """
+        Pick a model for query.
+
+        :param query: The raw user prompt
+        :param allowed: Optional collection of models to choose from, e.g. thalamus.models
+        :return: (model, confidence)
+        """
+        probs = self.probabilities(query)
+        best, confidence = None, -1.0
+        for label, p in zip(self.labels, probs):
+            if allowed is not None and label not in allowed:
+                continue
+            if p > confidence:
+                best, confidence = label, p
+        return best, confidence
@@ -0,0 +1,155 @@
+import re
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from hashlib import blake2b
+from zlib import crc32
+
+WHITESPACE_RE = re.compile(r"\s+")
+
+# MinHash parameters for the optional near-duplicate tier: 16 hashes split
+# into 4 bands of 4, so prompts with ~0.8 shingle Jaccard similarity collide
+# in at least one band with high probability.
+MINHASH_PERMUTATIONS = 16
+MINHASH_BANDS = 4
+SHINGLE_SIZE = 5
+# Only the head of a long prompt is shingled, as router.MAX_QUERY_CHARS does for the classifier
+SHINGLE_CHARS = 2048
+_MERSENNE_PRIME = (1 << 61) - 1
+_PERMUTATIONS = [((i * 0x9E3779B1 + 1) % _MERSENNE_PRIME, (i * 0x85EBCA77 + 7) % _MERSENNE_PRIME) for i in range(1, MINHASH_PERMUTATIONS + 1)]
+
+# digest of the normalized query, and its MinHash band keys when the near-duplicate tier is on
+CacheKey = namedtuple("CacheKey", ("digest", "bands"))
+
+def normalize_query(query):
+    """
+    Canonical form the cache key is derived from: case-folded with runs of whitespace collapsed.
+    """
+    return WHITESPACE_RE.sub(" ", query.casefold()).strip()
+
+def query_digest(normalized):
+    # Entries hold a fixed-size digest rather than the prompt, so memory is bounded by max_entries
+    return blake2b(normalized.encode(), digest_size=16).digest()
+
+def minhash_bands(normalized):
+    """
+    Locality-sensitive band keys for a normalized query. Near-duplicate
+    queries share at least one band key. Only the first SHINGLE_CHARS
+    characters are shingled, so the cost does not grow with the prompt.
+    """
+    normalized = normalized[:SHINGLE_CHARS]
+    if len(normalized) <= SHINGLE_SIZE:
+        shingles = {crc32(normalized.encode())}
+    else:
+        shingles = {crc32(normalized[i:i + SHINGLE_SIZE].encode()) for i in range(len(normalized) - SHINGLE_SIZE + 1)}
+    signature = [min((a * h + b) % _MERSENNE_PRIME for h in shingles) for a, b in _PERMUTATIONS]
+    rows = MINHASH_PERMUTATIONS // MINHASH_BANDS
+    return [(band, tuple(signature[band * rows:(band + 1) * rows])) for band in range(MINHASH_BANDS)]
+
+
+class RoutingCache:
+    """
+    Bounded LRU cache with TTL for routing decisions, keyed on a digest of
+    the normalized query, with an optional MinHash tier for near-duplicate prompts.
+    """
+
+    def __init__(self, max_entries=10000, ttl=3600.0, near_duplicates=False):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.near_duplicates = near_duplicates
+        self._entries = OrderedDict()  # digest -> (value, expires_at, band keys)
+        self._bands = {}  # band key -> entry key
+        self._version = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.near_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _drop(self, key):
+        _, _, bands = self._entries.pop(key)
+        for band in bands:
+            if self._bands.get(band) == key:
+                del self._bands[band]
+
+    def _lookup(self, key, now):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[1] < now:
+            self._drop(key)
+            return None
+        self._entries.move_to_end(key)
+        return entry[0]
+
+    def key(self, query):
+        """
+        :return: The CacheKey for query. Hashing happens here, outside the lock.
+        """
+        normalized = normalize_query(query)
+        return CacheKey(query_digest(normalized), tuple(minhash_bands(normalized)) if self.near_duplicates else ())
+
+    def get(self, query):
+        """
+        :return: (CacheKey, cached value or None), pass the key on to put on a miss
+        """
+        key = self.key(query)
+        now = time.monotonic()
+        with self._lock:
+            value = self._lookup(key.digest, now)
+            if value is not None:
+                self.hits += 1
+                return key, value
+            if self.near_duplicates:
+                for band in key.bands:
+                    similar = self._bands.get(band)
+                    if similar is not None:
+                        value = self._lookup(similar, now)
+                        if value is not None:
+                            self.near_hits += 1
+                            return key, value
+            self.misses += 1
+            return key, None
+
+    def put(self, key, value):
+        """
+        :param key: The CacheKey returned by get
+        """
+        digest, bands = key
+        with self._lock:
+            if digest in self._entries:
+                self._drop(digest)
+            self._entries[digest] = (value, time.monotonic() + self.ttl, bands)
+            for band in bands:
+                self._bands[band] = digest
+            while len(self._entries) > self.max_entries:
+                self._drop(next(iter(self._entries)))
+                self.evictions += 1
+
+    def invalidate(self):
+        with self._lock:
+            self._entries.clear()
+            self._bands.clear()
+
+    def check_version(self, version):
+        """
+        Invalidation hook: clear the cache whenever version (e.g. the
+        configured model list) differs from the one the entries were made under.
+        """
+        with self._lock:
+            if version != self._version:
+                self._entries.clear()
+                self._bands.clear()
+                self._version = version
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.near_hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "near_hits": self.near_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": (self.hits + self.near_hits) / lookups if lookups else 0.0,
+            }
@@ -0,0 +1,341 @@
+import asyncio
+import heapq
+import itertools
+import os
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+
+# Per-backend admission control. Each backend gets an AIMD concurrency limit
+# that grows while calls succeed quickly and halves on errors, 429s or slow
+# first tokens, plus token buckets for requests and tokens per minute.
+# Requests that find no capacity wait in a priority queue instead of failing.
+
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BATCH = 10
+
+# Assumed completion size when estimating a request's token cost up front
+EXPECTED_OUTPUT_TOKENS = int(os.environ.get("SCHEDULER_EXPECTED_OUTPUT_TOKENS", 500))
+
+BACKEND_LIMITS = {
+    "openai": {"initial": 32, "max_limit": 256, "rpm": 5000, "tpm": 600000, "latency_target": 4.0},
+    "anthropic": {"initial": 16, "max_limit": 128, "rpm": 2000, "tpm": 200000, "latency_target": 4.0},
+    "gemini": {"initial": 16, "max_limit": 128, "rpm": 1000, "tpm": 1000000, "latency_target": 4.0},
+    "huggingface": {"initial": 8, "max_limit": 32, "rpm": 300, "tpm": None, "latency_target": 6.0},
+    # One GPU box each, so the limit stays close to what Ollama can batch
+    "llama": {"initial": 2, "max_limit": 8, "rpm": None, "tpm": None, "latency_target": 3.0},
+    "mistral": {"initial": 2, "max_limit": 8, "rpm": None, "tpm": None, "latency_target": 3.0},
+}
+
+
+class SchedulerTimeout(TimeoutError):
+    pass
+
+
+def estimate_tokens(prompt):
+    # ~4 characters per token for English text
+    return len(prompt) // 4 + EXPECTED_OUTPUT_TOKENS
+
+def is_rate_limited(error):
+    return getattr(error, "status_code", None) == 429 or "RateLimit" in type(error).__name__
+
+
+class TokenBucket:
+
+    def __init__(self, per_minute):
+        self.rate = per_minute / 60.0
+        self.capacity = float(per_minute)
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now):
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount, now):
+        self._refill(now)
+        amount = min(amount, self.capacity)
+        return 0.0 if self.level >= amount else (amount - self.level) / self.rate
+
+    def take(self, amount):
+        self.level -= min(amount, self.capacity)
+
+
+class _Waiter:
+
+    def __init__(self, priority, seq, tokens):
+        self.priority = priority
+        self.seq = seq
+        self.tokens = tokens
+        self.enqueued = time.monotonic()
+        self.cancelled = False
+        self.event = threading.Event()
+
+    def __lt__(self, other):
+        return (self.priority, self.seq) < (other.priority, other.seq)
+
+    def wake(self):
+        self.event.set()
+
+
+class _AsyncWaiter(_Waiter):
+
+    def __init__(self, priority, seq, tokens):
+        super().__init__(priority, seq, tokens)
+        self.loop = asyncio.get_running_loop()
+        self.async_event = asyncio.Event()
+
+    def wake(self):
+        self.loop.call_soon_threadsafe(self.async_event.set)
+
+
+class Slot:
+    """
+    Capacity held by one provider call. Call first_token() when the first
+    chunk arrives, the AIMD controller uses that latency. Call cancel() when
+    the caller gives the call up, e.g. a hedge that lost the race.
+    """
+
+    def __init__(self, scheduler):
+        self.scheduler = scheduler
+        self.started = time.monotonic()
+        self.ttft = None
+        self.cancelled = False
+
+    def first_token(self):
+        if self.ttft is None:
+            self.ttft = time.monotonic() - self.started
+
+    def cancel(self):
+        self.cancelled = True
+
+
+class BackendScheduler:
+
+    def __init__(self, name, initial=8, min_limit=1, max_limit=64, rpm=None, tpm=None, latency_target=None):
+        self.name = name
+        self.limit = float(initial)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.latency_target = latency_target
+        self.requests = TokenBucket(rpm) if rpm else None
+        self.tokens = TokenBucket(tpm) if tpm else None
+        self.in_flight = 0
+        self._queue = []
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+        self._last_decrease = 0.0
+        self._queue_times = deque(maxlen=1000)
+        self.granted = 0
+        self.errors = 0
+        self.rate_limited = 0
+        self.timeouts = 0
+
+    def _head(self):
+        while self._queue and self._queue[0].cancelled:
+            heapq.heappop(self._queue)
+        return self._queue[0] if self._queue else None
+
+    def _try_grant(self, waiter):
+        """
+        Grant capacity to waiter if it is at the head of the queue and every
+        limit allows it. Must hold the lock.
+
+        :return: (granted, seconds until a token bucket refills enough or None)
+        """
+        if self._head() is not waiter or self.in_flight >= int(self.limit):
+            return False, None
+        now = time.monotonic()
+        wait = 0.0
+        if self.requests:
+            wait = max(wait, self.requests.wait_time(1, now))
+        if self.tokens:
+            wait = max(wait, self.tokens.wait_time(waiter.tokens, now))
+        if wait > 0:
+            return False, wait
+        if self.requests:
+            self.requests.take(1)
+        if self.tokens:
+            self.tokens.take(waiter.tokens)
+        heapq.heappop(self._queue)
+        self.in_flight += 1
+        self.granted += 1
+        self._queue_times.append(now - waiter.enqueued)
+        # There may be room for the next waiter too
+        head = self._head()
+        if head is not None:
+            head.wake()
+        return True, None
+
+    def _enqueue(self, waiter):
+        with self._lock:
+            heapq.heappush(self._queue, waiter)
+
+    def _abandon(self, waiter):
+        with self._lock:
+            waiter.cancelled = True
+            self.timeouts += 1
+            head = self._head()
+            if head is not None:
+                head.wake()
+
+    def acquire(self, priority=PRIORITY_INTERACTIVE, tokens=0, timeout=None):
+        """
+        Block until the backend has capacity for this request.
+
+        :param priority: Lower values are served first
+        :param tokens: Estimated token cost, charged against the tokens-per-minute bucket
+        :param timeout: Seconds to wait before raising SchedulerTimeout, None waits forever
+        :return: A Slot to pass back to release()
+        """
+        waiter = _Waiter(priority, next(self._seq), tokens)
+        self._enqueue(waiter)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                waiter.event.clear()
+                granted, wait = self._try_grant(waiter)
+            if granted:
+                return Slot(self)
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._abandon(waiter)
+                    raise SchedulerTimeout(f"No capacity on {self.name} within {timeout}s")
+                wait = remaining if wait is None else min(wait, remaining)
+            waiter.event.wait(wait)
+
+    async def aacquire(self, priority=PRIORITY_INTERACTIVE, tokens=0, timeout=None):
+        waiter = _AsyncWaiter(priority, next(self._seq), tokens)
+        self._enqueue(waiter)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        try:
+            while True:
+                with self._lock:
+                    waiter.async_event.clear()
+                    granted, wait = self._try_grant(waiter)
+                if granted:
+                    return Slot(self)
+                if deadline is not None:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise SchedulerTimeout(f"No capacity on {self.name} within {timeout}s")
+                    wait = remaining if wait is None else min(wait, remaining)
+                try:
+                    await asyncio.wait_for(waiter.async_event.wait(), wait)
+                except asyncio.TimeoutError:
+                    pass
+        except BaseException:
+            self._abandon(waiter)
+            raise
+
+    def release(self, slot, error=None, neutral=False):
+        """
+        Return capacity and feed the outcome to the AIMD controller.
+
+        :param error: The exception the call failed with, if any
+        :param neutral: Release without adjusting the limit, e.g. a hedge cancelled before its first token
+        """
+        now = time.monotonic()
+        latency = slot.ttft if slot.ttft is not None else now - slot.started
+        with self._lock:
+            self.in_flight -= 1
+            if neutral:
+                head = self._head()
+                if head is not None:
+                    head.wake()
+                return
+            slow = self.latency_target is not None and latency > self.latency_target
+            if error is not None or slow:
+                if error is not None:
+                    self.errors += 1
+                    if is_rate_limited(error):
+                        self.rate_limited += 1
+                # Multiplicative decrease, at most once per window so one bad
+                # burst does not collapse the limit to the floor
+                if now - self._last_decrease > (self.latency_target or 1.0):
+                    self.limit = max(self.min_limit, self.limit / 2)
+                    self._last_decrease = now
+            else:
+                # Additive increase of roughly one slot per window of successes
+                self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+            head = self._head()
+            if head is not None:
+                head.wake()
+
+    def stats(self):
+        with self._lock:
+            queue_times = sorted(self._queue_times)
+            return {
+                "limit": round(self.limit, 2),
+                "in_flight": self.in_flight,
+                "queued": sum(not w.cancelled for w in self._queue),
+                "granted": self.granted,
+                "errors": self.errors,
+                "rate_limited": self.rate_limited,
+                "timeouts": self.timeouts,
+                "queue_time_avg_ms": 1000 * sum(queue_times) / len(queue_times) if queue_times else 0.0,
+                "queue_time_p95_ms": 1000 * queue_times[int(0.95 * (len(queue_times) - 1))] if queue_times else 0.0,
+                "queue_time_max_ms": 1000 * queue_times[-1] if queue_times else 0.0,
+            }
+
+
+class Scheduler:
+
+    def __init__(self, limits=BACKEND_LIMITS, queue_timeout=None):
+        self.queue_timeout = queue_timeout
+        self._limits = limits
+        self._backends = {}
+        self._lock = threading.Lock()
+
+    def backend(self, name):
+        scheduler = self._backends.get(name)
+        if scheduler is None:
+            with self._lock:
+                scheduler = self._backends.get(name)
+                if scheduler is None:
+                    scheduler = BackendScheduler(name, **self._limits.get(name, {}))
+                    self._backends[name] = scheduler
+        return scheduler
+
+    @contextmanager
+    def slot(self, backend, priority=PRIORITY_INTERACTIVE, tokens=0):
+        scheduler = self.backend(backend)
+        slot = scheduler.acquire(priority, tokens, self.queue_timeout)
+        error, neutral = None, False
+        try:
+            yield slot
+        except Exception as e:
+            error = e
+            raise
+        except BaseException:
+            # Closed or cancelled by the caller, only informative if a token arrived
+            neutral = slot.ttft is None
+            raise
+        finally:
+            # Given up before a token arrived, says nothing about the backend
+            neutral = neutral or (slot.cancelled and slot.ttft is None)
+            scheduler.release(slot, error, neutral)
+
+    @asynccontextmanager
+    async def aslot(self, backend, priority=PRIORITY_INTERACTIVE, tokens=0):
+        scheduler = self.backend(backend)
+        slot = await scheduler.aacquire(priority, tokens, self.queue_timeout)
+        error, neutral = None, False
+        try:
+            yield slot
+        except Exception as e:
+            error = e
+            raise
+        except BaseException:
+            # Closed or cancelled by the caller, only informative if a token arrived
+            neutral = slot.ttft is None
+            raise
+        finally:
+            # Given up before a token arrived, says nothing about the backend
+            neutral = neutral or (slot.cancelled and slot.ttft is None)
+            scheduler.release(slot, error, neutral)
+
+    def stats(self):
+        return {name: scheduler.stats() for name, scheduler in list(self._backends.items())}
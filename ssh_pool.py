@@ -0,0 +1,402 @@
+import codecs
+import logging
+import os
+import select
+import socket
+import threading
+import time
+from importlib import import_module
+
+import tracing
+
+# SSH connection details for the self-hosted Ollama GPU boxes
+JUMP_HOST = os.environ.get("SSH_JUMP_HOST", "146.152.232.8")
+JUMP_USER = os.environ.get("SSH_JUMP_USER", "guest")
+TARGET_USER = os.environ.get("SSH_TARGET_USER", "ubuntu")
+TARGET_HOSTS = {
+    "mistral": os.environ.get("SSH_MISTRAL_HOST", "100.81.81.162"),
+    "llama": os.environ.get("SSH_LLAMA_HOST", "100.81.81.96"),
+}
+HEALTH_CHECK_INTERVAL = float(os.environ.get("SSH_HEALTH_CHECK_INTERVAL", 15))
+
+# Streaming sessions. The channel window is the only buffer between the remote
+# process and a slow client, small chunks are merged into frames of at least
+# STREAM_MIN_FRAME characters or whatever arrived within STREAM_FLUSH_INTERVAL.
+STREAM_WINDOW = int(os.environ.get("SSH_STREAM_WINDOW", 64 * 1024))
+STREAM_READ_SIZE = 4096
+STREAM_MIN_FRAME = int(os.environ.get("SSH_STREAM_MIN_FRAME", 64))
+STREAM_FLUSH_INTERVAL = float(os.environ.get("SSH_STREAM_FLUSH_INTERVAL", 0.05))
+# stderr kept for the error message of a failed command, its tail is the useful part
+STREAM_STDERR_LIMIT = 16 * 1024
+
+
+def _paramiko():
+    # paramiko pulls in the crypto stack, only pay for it once a tunnel is needed
+    return import_module("paramiko")
+
+def _ssh_errors():
+    return (_paramiko().SSHException, EOFError, OSError)
+
+def find_ssh_key():
+    possible_key_names = ['id_rsa', 'id_ed25519', 'id_ecdsa', 'id_dsa']
+    home_dir = os.path.expanduser('~')
+    ssh_dir = os.path.join(home_dir, '.ssh')
+    
+    for key_name in possible_key_names:
+        key_path = os.path.join(ssh_dir, key_name)
+        if os.path.isfile(key_path):
+            return key_path
+
+    return None
+
+def load_private_key(key_path):
+    paramiko = _paramiko()
+    for key_class in (paramiko.RSAKey, paramiko.Ed25519Key, paramiko.ECDSAKey):
+        try:
+            return key_class.from_private_key_file(key_path)
+        except paramiko.SSHException:
+            continue
+    raise paramiko.SSHException(f"Unsupported private key: {key_path}")
+
+
+class SSHTunnel:
+    """
+    One open route to a target host: a jump-host transport carrying a
+    direct-tcpip channel, and the target SSH transport running over it.
+    Many sessions can be multiplexed over the target transport at once.
+    """
+
+    def __init__(self, target_host, target_port, target_user, pkey, jump_host=None, jump_port=22, jump_user=None):
+        self.target_host = target_host
+        self.target_port = target_port
+        self.target_user = target_user
+        self.pkey = pkey
+        self.jump_host = jump_host
+        self.jump_port = jump_port
+        self.jump_user = jump_user
+        self.jump_client = None
+        self.client = None
+
+    def connect(self):
+        paramiko = _paramiko()
+        sock = None
+        try:
+            if self.jump_host:
+                self.jump_client = paramiko.SSHClient()
+                self.jump_client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+                self.jump_client.connect(self.jump_host, port=self.jump_port, username=self.jump_user, pkey=self.pkey)
+                sock = self.jump_client.get_transport().open_channel(
+                    "direct-tcpip", (self.target_host, self.target_port), ('', 0)
+                )
+
+            self.client = paramiko.SSHClient()
+            self.client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+            self.client.connect(self.target_host, port=self.target_port, username=self.target_user, sock=sock, pkey=self.pkey)
+            # Transport-level keepalives stop NAT boxes from silently dropping idle tunnels
+            self.client.get_transport().set_keepalive(int(HEALTH_CHECK_INTERVAL))
+            if self.jump_client:
+                self.jump_client.get_transport().set_keepalive(int(HEALTH_CHECK_INTERVAL))
+        except BaseException:
+            # A failed target connect must not leak the jump-host connection
+            self.close()
+            self.client = self.jump_client = None
+            raise
+
+    @property
+    def transport(self):
+        return self.client.get_transport() if self.client else None
+
+    def is_active(self):
+        transports = [self.transport]
+        if self.jump_client:
+            transports.append(self.jump_client.get_transport())
+        return all(t is not None and t.is_active() for t in transports)
+
+    def probe(self):
+        """
+        Push an SSH_MSG_IGNORE through the tunnel so a dead peer is noticed now
+        rather than on the next user request.
+        """
+        try:
+            self.transport.send_ignore()
+        except Exception:
+            return False
+        return self.is_active()
+
+    def open_session(self, window_size=None):
+        return self.transport.open_session(window_size=window_size)
+
+    def open_channel(self, kind, dest_addr, src_addr=('', 0)):
+        return self.transport.open_channel(kind, dest_addr, src_addr)
+
+    def close(self):
+        for client in (self.client, self.jump_client):
+            if client:
+                client.close()
+
+
+class LocalForwarder:
+    """
+    Listens on a local port and forwards every accepted connection through a
+    direct-tcpip channel on the pooled tunnel, e.g. to the Ollama HTTP API on
+    the GPU host. Channels are opened through the pool, so connections made
+    after a reconnect ride the new transport.
+    """
+
+    def __init__(self, pool, host, remote_port, remote_host="127.0.0.1"):
+        self.pool = pool
+        self.host = host
+        self.remote_port = remote_port
+        self.remote_host = remote_host
+        self.server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.server.bind(("127.0.0.1", 0))
+        self.server.listen(128)
+        self.port = self.server.getsockname()[1]
+        self._thread = threading.Thread(target=self._accept_loop, name=f"ssh-forward-{host}", daemon=True)
+        self._thread.start()
+
+    def _accept_loop(self):
+        while True:
+            try:
+                sock, addr = self.server.accept()
+            except OSError:
+                return
+            threading.Thread(target=self._pipe, args=(sock, addr), daemon=True).start()
+
+    def _pipe(self, sock, addr):
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        try:
+            chan = self.pool.open_channel(self.host, "direct-tcpip", (self.remote_host, self.remote_port), addr)
+        except Exception as e:
+            logging.error(f"Forwarding to {self.host}:{self.remote_port} failed: {e}")
+            sock.close()
+            return
+        try:
+            while True:
+                readable, _, _ = select.select([sock, chan], [], [])
+                if sock in readable:
+                    data = sock.recv(32768)
+                    if not data:
+                        break
+                    chan.sendall(data)
+                if chan in readable:
+                    data = chan.recv(32768)
+                    if not data:
+                        break
+                    sock.sendall(data)
+        except OSError:
+            pass
+        finally:
+            chan.close()
+            sock.close()
+
+    def close(self):
+        self.server.close()
+
+
+def stream_channel(channel, min_frame=STREAM_MIN_FRAME, flush_interval=STREAM_FLUSH_INTERVAL, read_size=STREAM_READ_SIZE):
+    """
+    Yield a channel's output as text frames until EOF.
+
+    Bytes are decoded incrementally, so a multibyte character split across two
+    reads comes out whole. The channel is only read when the consumer asks for
+    the next frame: a slow client stops window adjustments and the remote side
+    blocks once the channel window is full, so buffering is bounded by the
+    window size. The first text is sent immediately, later chunks are
+    coalesced into frames.
+
+    stderr shares the window with stdout, so it is drained whenever the
+    channel is read. Left until exit, a remote writing more than a window of
+    stderr would block while the loop waits for stdout that never comes.
+
+    :param channel: A paramiko channel with a command running
+    :param min_frame: Characters that trigger a flush before the interval is up
+    :param flush_interval: Longest time in seconds text is held back
+    :return: The last STREAM_STDERR_LIMIT bytes of stderr, as the generator's return value
+    """
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    stderr = bytearray()
+    pending = []
+    pending_chars = 0
+    deadline = None
+    first = True
+    while True:
+        # The channel's fileno is readable when either stream has data, and at EOF
+        select.select([channel], [], [], None if deadline is None else max(deadline - time.monotonic(), 0))
+        while channel.recv_stderr_ready():
+            stderr += channel.recv_stderr(read_size)
+            del stderr[:-STREAM_STDERR_LIMIT]
+        data = channel.recv(read_size) if channel.recv_ready() or channel.eof_received else None
+        if data == b"":
+            break
+        if data:
+            text = decoder.decode(data)
+            if text:
+                pending.append(text)
+                pending_chars += len(text)
+                if deadline is None:
+                    deadline = time.monotonic() + flush_interval
+        if pending and (first or pending_chars >= min_frame or time.monotonic() >= deadline):
+            yield "".join(pending)
+            pending, pending_chars, deadline, first = [], 0, None, False
+
+    pending.append(decoder.decode(b"", final=True))
+    tail = "".join(pending)
+    if tail:
+        yield tail
+    return bytes(stderr)
+
+
+class SSHTunnelPool:
+    """
+    Keeps one SSHTunnel per target host open for the life of the process,
+    reconnecting dead tunnels on demand and from a background health thread.
+
+    Hosts, ports and users are all injectable so the pool can be pointed at a
+    local SSH server stand-in (jump_host=None connects to the target directly).
+    """
+
+    def __init__(self, jump_host=JUMP_HOST, jump_user=JUMP_USER, target_user=TARGET_USER,
+                 key_path=None, pkey=None, jump_port=22, target_port=22,
+                 health_check_interval=HEALTH_CHECK_INTERVAL):
+        self.jump_host = jump_host
+        self.jump_user = jump_user
+        self.target_user = target_user
+        self.jump_port = jump_port
+        self.target_port = target_port
+        self.health_check_interval = health_check_interval
+        self._key_path = key_path
+        self._pkey = pkey
+        self._tunnels = {}
+        self._forwarders = {}
+        self._host_locks = {}
+        self._lock = threading.Lock()
+        self._closed = threading.Event()
+        self._health_thread = None
+
+    @property
+    def pkey(self):
+        # Key discovery touches the disk, do it once per pool
+        if self._pkey is None:
+            key_path = self._key_path or find_ssh_key()
+            if not key_path:
+                raise FileNotFoundError("No SSH key found")
+            self._pkey = load_private_key(key_path)
+        return self._pkey
+
+    def _host_lock(self, host):
+        with self._lock:
+            return self._host_locks.setdefault(host, threading.Lock())
+
+    def _connect(self, host):
+        tunnel = SSHTunnel(
+            host, self.target_port, self.target_user, self.pkey,
+            jump_host=self.jump_host, jump_port=self.jump_port, jump_user=self.jump_user,
+        )
+        # Jump-host and target handshakes, the slow part of a cold SSH request
+        with tracing.span("connection.ssh_handshake", host=host):
+            tunnel.connect()
+        return tunnel
+
+    def get(self, host):
+        """
+        Return a live tunnel to host, connecting or reconnecting if needed.
+        """
+        tunnel = self._tunnels.get(host)
+        if tunnel is not None and tunnel.is_active():
+            return tunnel
+
+        with self._host_lock(host):
+            tunnel = self._tunnels.get(host)
+            if tunnel is not None and tunnel.is_active():
+                return tunnel
+            if tunnel is not None:
+                tunnel.close()
+            tunnel = self._connect(host)
+            self._tunnels[host] = tunnel
+            self.start_health_checks()
+            return tunnel
+
+    def open_session(self, host, window_size=None):
+        """
+        Open a new session channel on the pooled transport to host. If the
+        transport died since the last health check, reconnect once and retry.
+
+        :param window_size: Receive window in bytes, paramiko's default (2 MB) if None
+        """
+        try:
+            return self.get(host).open_session(window_size)
+        except _ssh_errors():
+            self.reset(host)
+            return self.get(host).open_session(window_size)
+
+    def open_channel(self, host, kind, dest_addr, src_addr=('', 0)):
+        try:
+            return self.get(host).open_channel(kind, dest_addr, src_addr)
+        except _ssh_errors():
+            self.reset(host)
+            return self.get(host).open_channel(kind, dest_addr, src_addr)
+
+    def forward_port(self, host, remote_port, remote_host="127.0.0.1"):
+        """
+        Return a local port that is forwarded to remote_host:remote_port as
+        seen from host. The forwarder is created once and reused.
+        """
+        key = (host, remote_host, remote_port)
+        with self._lock:
+            forwarder = self._forwarders.get(key)
+            if forwarder is None:
+                forwarder = LocalForwarder(self, host, remote_port, remote_host)
+                self._forwarders[key] = forwarder
+        return forwarder.port
+
+    def reset(self, host):
+        with self._host_lock(host):
+            tunnel = self._tunnels.pop(host, None)
+            if tunnel is not None:
+                tunnel.close()
+
+    def health(self):
+        return {host: tunnel.is_active() for host, tunnel in list(self._tunnels.items())}
+
+    def check_health(self):
+        for host, tunnel in list(self._tunnels.items()):
+            if tunnel.probe():
+                continue
+            logging.warning(f"SSH tunnel to {host} is down, reconnecting")
+            try:
+                self.reset(host)
+                self.get(host)
+            except Exception as e:
+                logging.error(f"Reconnecting SSH tunnel to {host} failed: {e}")
+
+    def _health_loop(self):
+        while not self._closed.wait(self.health_check_interval):
+            self.check_health()
+
+    def start_health_checks(self):
+        with self._lock:
+            if self._health_thread is None and self.health_check_interval > 0:
+                self._health_thread = threading.Thread(target=self._health_loop, name="ssh-pool-health", daemon=True)
+                self._health_thread.start()
+
+    def close(self):
+        self._closed.set()
+        for forwarder in list(self._forwarders.values()):
+            forwarder.close()
+        self._forwarders.clear()
+        for host in list(self._tunnels):
+            self.reset(host)
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_pool():
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = SSHTunnelPool()
+    return _pool
@@ -0,0 +1,35 @@
+from json import dumps
+
+STREAM_HEADERS = {
+    "Cache-Control": "no-cache",
+    # Stop nginx-style proxies from buffering the body until the model is done
+    "X-Accel-Buffering": "no",
+}
+
+SSE_DONE = "event: done\ndata: {}\n\n"
+SSE_ERROR = f"event: error\ndata: {dumps({'error': 'Upstream provider failed mid-stream.'})}\n\n"
+
+def stream_mode(data, args, headers):
+    """
+    Work out how the caller wants the response delivered.
+
+    :param data: The parsed request body
+    :param args: The request query string arguments
+    :param headers: The request headers
+    :return: "sse", "chunked" or None for a single JSON response
+    """
+    mode = data.get("stream", args.get("stream"))
+    if isinstance(mode, str):
+        mode = mode.lower()
+    if mode in ("sse", "event-stream"):
+        return "sse"
+    if mode in (True, "1", "true", "chunked"):
+        return "chunked"
+    if mode in (False, "0", "false", "json"):
+        return None
+    if "text/event-stream" in headers.get("Accept", ""):
+        return "sse"
+    return None
+
+def sse_event(chunk):
+    return f"data: {dumps({'text': chunk})}\n\n"
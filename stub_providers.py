@@ -0,0 +1,63 @@
+import asyncio
+import math
+import random
+import time
+from zlib import crc32
+from functools import partial
+
+import route
+
+# Deterministic stand-ins for the real providers, used by the benchmarks so
+# serving overhead can be measured without API keys or GPU hosts. Delays and
+# failures can be injected per backend to exercise the execution policy.
+
+_rng = random.Random(0)
+
+def lognormal_ttft(median, sigma, seed=0):
+    """
+    Time to first token drawn from a lognormal distribution, deterministic per
+    prompt so a replayed workload sees the same latencies on every run.
+
+    :param median: Median TTFT in seconds
+    :param sigma: Shape, 0.5 gives a p99 around 3x the median
+    :return: A ttft callable for stub_query
+    """
+    def ttft(query):
+        rng = random.Random(crc32(query.encode("utf-8")) ^ seed)
+        return median * math.exp(sigma * rng.gauss(0, 1))
+    return ttft
+
+def _delay(ttft, query):
+    return ttft(query) if callable(ttft) else ttft
+
+def stub_query(query, ttft=0.2, chunks=20, interval=0.01, failure_rate=0.0):
+    time.sleep(_delay(ttft, query))
+    if failure_rate and _rng.random() < failure_rate:
+        raise RuntimeError("injected provider failure")
+    for i in range(chunks):
+        if i:
+            time.sleep(interval)
+        yield f"token{i} "
+
+async def stub_aquery(query, ttft=0.2, chunks=20, interval=0.01, failure_rate=0.0):
+    await asyncio.sleep(_delay(ttft, query))
+    if failure_rate and _rng.random() < failure_rate:
+        raise RuntimeError("injected provider failure")
+    for i in range(chunks):
+        if i:
+            await asyncio.sleep(interval)
+        yield f"token{i} "
+
+def install(overrides=None, **latency):
+    """
+    Replace every backend in route.PROVIDERS and route.ASYNC_PROVIDERS with a stub.
+
+    :param overrides: Optional backend name -> stub kwargs for that backend only
+    :param latency: ttft (seconds, or a callable of the prompt such as
+                    lognormal_ttft), chunks, interval and failure_rate passed to every stub
+    """
+    overrides = overrides or {}
+    for backend in list(route.PROVIDERS):
+        kwargs = {**latency, **overrides.get(backend, {})}
+        route.PROVIDERS[backend] = partial(stub_query, **kwargs)
+        route.ASYNC_PROVIDERS[backend] = partial(stub_aquery, **kwargs)
@@ -0,0 +1,133 @@
+import math
+import os
+import threading
+import time
+from collections import deque
+
+from scheduler import EXPECTED_OUTPUT_TOKENS
+
+# Rolling per-model telemetry fed by every provider attempt, and the
+# cost/latency-aware selection the router runs on top of it.
+
+# USD per million tokens (input, output). The self-hosted models are priced at
+# an amortized GPU cost so they compare sensibly with the hosted APIs.
+PRICES = {
+    "gpt-4": (30.0, 60.0),
+    "claude-3-sonnet-20240229": (3.0, 15.0),
+    "gemini-1.5-pro": (3.5, 10.5),
+    "mistralai/Mixtral-8x7B-Instruct-v0.1": (0.6, 0.6),
+    "meta-llama/Llama-2-70b-chat-hf": (0.9, 0.9),
+}
+DEFAULT_PRICE = (10.0, 30.0)
+
+WINDOW_SECONDS = float(os.environ.get("TELEMETRY_WINDOW_SECONDS", 300))
+MIN_SAMPLES = 20
+DEGRADED_ERROR_RATE = float(os.environ.get("TELEMETRY_DEGRADED_ERROR_RATE", 0.25))
+# Models whose classifier probability is at least this fraction of the top
+# model's are considered good enough, and compete on cost and latency
+ACCEPTABLE_FRACTION = float(os.environ.get("ROUTER_ACCEPTABLE_FRACTION", 0.5))
+
+
+def _percentile(ordered, p):
+    return ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))]
+
+
+class Telemetry:
+
+    def __init__(self, window_seconds=WINDOW_SECONDS, max_samples=1000):
+        self.window_seconds = window_seconds
+        self.max_samples = max_samples
+        self._samples = {}  # model -> deque of (timestamp, ttft, tokens_per_sec, error)
+        self._lock = threading.Lock()
+
+    def record(self, model, ttft=None, tokens=0, duration=None, error=False):
+        """
+        Record one provider attempt.
+
+        :param ttft: Seconds to the first chunk, None if none arrived
+        :param tokens: Chunks streamed, roughly one token each for the streaming APIs
+        :param duration: Seconds from the first chunk to the end of the stream
+        :param error: Whether the attempt failed or blew its first-token budget
+        """
+        tokens_per_sec = tokens / duration if duration and tokens else None
+        with self._lock:
+            samples = self._samples.setdefault(model, deque(maxlen=self.max_samples))
+            samples.append((time.monotonic(), ttft, tokens_per_sec, error))
+
+    def _window(self, model):
+        cutoff = time.monotonic() - self.window_seconds
+        with self._lock:
+            samples = self._samples.get(model)
+            if not samples:
+                return []
+            while samples and samples[0][0] < cutoff:
+                samples.popleft()
+            return list(samples)
+
+    def ttft_percentile(self, model, p):
+        ttfts = sorted(s[1] for s in self._window(model) if s[1] is not None)
+        if len(ttfts) < MIN_SAMPLES:
+            return None
+        return _percentile(ttfts, p)
+
+    def error_rate(self, model):
+        samples = self._window(model)
+        if len(samples) < MIN_SAMPLES // 2:
+            return 0.0
+        return sum(s[3] for s in samples) / len(samples)
+
+    def is_degraded(self, model):
+        return self.error_rate(model) > DEGRADED_ERROR_RATE
+
+    def expected_cost(self, model, prompt_tokens, output_tokens=EXPECTED_OUTPUT_TOKENS):
+        price_in, price_out = PRICES.get(model, DEFAULT_PRICE)
+        return (prompt_tokens * price_in + output_tokens * price_out) / 1e6
+
+    def snapshot(self, model):
+        samples = self._window(model)
+        ttfts = sorted(s[1] for s in samples if s[1] is not None)
+        rates = sorted(s[2] for s in samples if s[2] is not None)
+        price_in, price_out = PRICES.get(model, DEFAULT_PRICE)
+        return {
+            "samples": len(samples),
+            "ttft_p50_ms": 1000 * _percentile(ttfts, 50) if ttfts else None,
+            "ttft_p95_ms": 1000 * _percentile(ttfts, 95) if ttfts else None,
+            "tokens_per_sec": _percentile(rates, 50) if rates else None,
+            "error_rate": sum(s[3] for s in samples) / len(samples) if samples else 0.0,
+            "degraded": self.is_degraded(model),
+            "price_per_1m_tokens": {"input": price_in, "output": price_out},
+        }
+
+    def select(self, ranked, prompt_tokens, slo_ttft=None):
+        """
+        Pick the cheapest acceptable model that meets the latency SLO.
+
+        :param ranked: (model, classifier probability) pairs, best first
+        :param prompt_tokens: Estimated prompt size, used for the cost estimate
+        :param slo_ttft: Required p95 time to first token in seconds, None for no SLO
+        :return: (model, probability)
+        """
+        # Shift traffic away from degraded backends, so the next best healthy
+        # model takes over when the classifier's favourite is failing
+        healthy = [(m, p) for m, p in ranked if not self.is_degraded(m)] or ranked
+        top = healthy[0][1]
+        healthy = [(m, p) for m, p in healthy if p >= top * ACCEPTABLE_FRACTION]
+
+        def p95(model):
+            value = self.ttft_percentile(model, 95)
+            return math.inf if value is None else value
+
+        # Models without enough samples are assumed to meet the SLO so they get explored
+        meets = [(m, p) for m, p in healthy
+                 if slo_ttft is None or self.ttft_percentile(m, 95) is None or p95(m) <= slo_ttft]
+        if meets:
+            return min(meets, key=lambda mp: self.expected_cost(mp[0], prompt_tokens))
+        return min(healthy, key=lambda mp: p95(mp[0]))
+
+    def stats(self):
+        with self._lock:
+            models = list(self._samples)
+        return {model: self.snapshot(model) for model in models}
+
+
+telemetry = Telemetry()
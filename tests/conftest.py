@@ -0,0 +1,12 @@
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Tests drive route and the apps against stub providers, never the real
+# backends, the on-disk response cache, the background warm-up probes or the
+# SDK preload
+os.environ.setdefault("RESPONSE_CACHE", "0")
+os.environ.setdefault("WARMUP", "0")
+os.environ.setdefault("PRELOAD_PROVIDERS", "0")
@@ -0,0 +1,23 @@
+import pytest
+
+import tracing
+
+agents = pytest.importorskip("canned.agents")
+from langchain_core.tools import tool
+
+
+def tool_call_count():
+    series = tracing.span_duration._series.get(("agent.tool_call", ""))
+    return sum(series[0]) if series else 0
+
+
+def test_tool_call_produces_a_span():
+    @tool
+    def echo(text: str) -> str:
+        """Echo the text back."""
+        return text
+
+    agents.traced([echo])
+    before = tool_call_count()
+    assert echo.invoke("hello") == "hello"
+    assert tool_call_count() == before + 1
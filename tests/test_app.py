@@ -0,0 +1,29 @@
+import json
+
+import pytest
+
+pytest.importorskip("flask")
+import app
+import batch
+
+
+@pytest.fixture
+def client():
+    return app.app.test_client()
+
+
+def test_route_batch_rejects_invalid_input(client):
+    response = client.post("/routeBatch", data="not json", content_type="application/json")
+    assert response.status_code == 400
+    assert response.get_json()["error"].startswith("Validation error")
+
+
+def test_route_batch_reports_unexpected_errors_as_json(client, monkeypatch):
+    def broken(body, content_type):
+        raise RuntimeError("planner is down")
+
+    monkeypatch.setattr(batch, "parse_batch", broken)
+    response = client.post("/routeBatch", data=json.dumps({"prompts": ["q"]}), content_type="application/json")
+    assert response.status_code == 500
+    error = response.get_json()["error"]
+    assert error.startswith("Unexpected error occurred") and "planner is down" in error
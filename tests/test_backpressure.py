@@ -0,0 +1,77 @@
+import asyncio
+import time
+
+import pytest
+
+import route
+from coalesce import STREAM_BUFFER, SingleFlight
+
+# The provider may run ahead of a stalled client by one buffer per stage:
+# the Flight, the execution queue and the chunk each stage holds in hand
+LIMIT = 2 * STREAM_BUFFER + 4
+CHUNKS = 10000
+
+
+def counting_query(produced, query):
+    for i in range(CHUNKS):
+        produced.append(i)
+        yield f"token{i} "
+
+
+async def counting_aquery(produced, query):
+    for i in range(CHUNKS):
+        produced.append(i)
+        yield f"token{i} "
+        await asyncio.sleep(0)
+
+
+@pytest.fixture
+def produced(monkeypatch):
+    produced = []
+    for backend in list(route.PROVIDERS):
+        monkeypatch.setitem(route.PROVIDERS, backend, lambda query: counting_query(produced, query))
+        monkeypatch.setitem(route.ASYNC_PROVIDERS, backend, lambda query: counting_aquery(produced, query))
+    return produced
+
+
+def test_flight_stops_a_buffer_ahead_of_the_slowest_reader():
+    flights, produced = SingleFlight(), []
+    reader = flights.stream("k", lambda: counting_query(produced, "q"))
+    next(reader)
+    time.sleep(0.2)
+    assert len(produced) <= STREAM_BUFFER + 2
+    reader.close()
+
+
+def test_stalled_client_limits_the_provider(produced):
+    stream = route.stream_model("gpt-4", "stalled sync client")
+    next(stream)
+    time.sleep(0.3)
+    assert len(produced) <= LIMIT
+    stream.close()
+
+
+def test_stalled_async_client_limits_the_provider(produced):
+    async def scenario():
+        stream = route.astream_model("gpt-4", "stalled async client")
+        await stream.__anext__()
+        await asyncio.sleep(0.3)
+        count = len(produced)
+        await stream.aclose()
+        return count
+
+    assert asyncio.run(scenario()) <= LIMIT
+
+
+def test_iterate_in_thread_stops_reading_ahead():
+    produced = []
+
+    async def scenario():
+        stream = route.iterate_in_thread(counting_query(produced, "q"))
+        await stream.__anext__()
+        await asyncio.sleep(0.3)
+        count = len(produced)
+        await stream.aclose()
+        return count
+
+    assert asyncio.run(scenario()) <= STREAM_BUFFER + 3
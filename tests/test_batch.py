@@ -0,0 +1,41 @@
+import asyncio
+import queue
+import time
+from concurrent.futures import Future
+
+import batch
+
+
+def test_cancelled_future_still_delivers_a_result():
+    results = queue.Queue()
+    future = Future()
+    future.cancel()
+    batch._deliver(results, 3, "gpt-4", future)
+    assert results.get_nowait() == {"index": 3, "model": "gpt-4", "error": "cancelled"}
+
+
+def test_arun_batch_plans_off_the_event_loop(monkeypatch):
+    def slow_plan(prompts, slo_ttft=None):
+        time.sleep(0.3)
+        return []
+
+    monkeypatch.setattr(batch, "plan", slow_plan)
+
+    async def scenario():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        task = asyncio.ensure_future(ticker())
+        results = [result async for result in batch.arun_batch(["q"])]
+        task.cancel()
+        return results, ticks
+
+    results, ticks = asyncio.run(scenario())
+    assert results == []
+    # The loop kept running while the batch was being routed
+    assert ticks >= 10
@@ -0,0 +1,114 @@
+import asyncio
+import gc
+import time
+
+from coalesce import AsyncSingleFlight, SingleFlight
+
+
+def slow_stream(produced, chunks=50, interval=0.01):
+    for i in range(chunks):
+        time.sleep(interval)
+        produced.append(i)
+        yield i
+
+
+async def aslow_stream(produced, chunks=50, interval=0.01):
+    for i in range(chunks):
+        await asyncio.sleep(interval)
+        produced.append(i)
+        yield i
+
+
+def wait_until(predicate, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline
+        time.sleep(0.005)
+
+
+def test_joiners_share_one_generation():
+    flights, produced, completed = SingleFlight(), [], []
+    first = flights.stream("k", lambda: slow_stream(produced, chunks=5), on_complete=completed.append)
+    second = flights.stream("k", lambda: slow_stream(produced, chunks=5))
+    # Subscribers join when first advanced, the second while the first is mid-stream
+    assert next(first) == next(second) == 0
+    assert list(first) == list(second) == [1, 2, 3, 4]
+    wait_until(lambda: completed)
+    assert produced == [0, 1, 2, 3, 4]
+    assert flights.stats()["upstream_calls"] == 1
+
+
+def test_unconsumed_subscriber_does_not_pin_the_flight():
+    flights, produced, calls = SingleFlight(), [], []
+    unused = flights.stream("k", lambda: calls.append(1) or slow_stream(produced, chunks=3))
+    time.sleep(0.05)
+    # Nothing starts until the iterator is advanced
+    assert calls == [] and flights.stats() == {"in_flight": 0, "upstream_calls": 0, "coalesced": 0}
+    del unused
+    reader = flights.stream("k", lambda: slow_stream(produced, chunks=3))
+    assert list(reader) == [0, 1, 2]
+
+
+def test_last_subscriber_leaving_stops_the_producer():
+    flights, produced = SingleFlight(), []
+    reader = flights.stream("k", lambda: slow_stream(produced, chunks=1000))
+    next(reader)
+    reader.close()
+    assert flights.stats()["in_flight"] == 0
+    time.sleep(0.1)
+    stopped_at = len(produced)
+    time.sleep(0.1)
+    assert len(produced) == stopped_at < 1000
+
+
+def test_subscriber_starting_after_abandonment_gets_a_fresh_flight():
+    flights, produced = SingleFlight(), []
+    leader = flights.stream("k", lambda: slow_stream(produced, chunks=1000))
+    late = flights.stream("k", lambda: slow_stream(produced, chunks=3))
+    next(leader)
+    leader.close()
+    assert list(late) == [0, 1, 2]
+
+
+def test_async_producer_task_survives_garbage_collection():
+    async def main():
+        flights, produced = AsyncSingleFlight(), []
+        reader = flights.stream("k", lambda: aslow_stream(produced, chunks=20))
+        got = []
+        async for chunk in reader:
+            gc.collect()
+            got.append(chunk)
+        return got
+
+    assert asyncio.run(asyncio.wait_for(main(), 5)) == list(range(20))
+
+
+def test_async_last_subscriber_leaving_cancels_the_producer():
+    async def main():
+        flights, produced = AsyncSingleFlight(), []
+        reader = flights.stream("k", lambda: aslow_stream(produced, chunks=1000))
+        await reader.__anext__()
+        task = flights._flights["k"].task
+        await reader.aclose()
+        await asyncio.sleep(0.05)
+        return task, flights.stats(), len(produced)
+
+    task, stats, produced = asyncio.run(main())
+    assert task.cancelled()
+    assert stats["in_flight"] == 0
+    assert produced < 1000
+
+
+def test_async_unconsumed_subscriber_does_not_pin_the_flight():
+    async def main():
+        flights, calls = AsyncSingleFlight(), []
+        unused = flights.stream("k", lambda: calls.append(1) or aslow_stream([], chunks=3))
+        await asyncio.sleep(0.05)
+        stats = flights.stats()
+        reader = flights.stream("k", lambda: aslow_stream([], chunks=3))
+        return calls, stats, [chunk async for chunk in reader]
+
+    calls, stats, chunks = asyncio.run(main())
+    assert calls == []
+    assert stats == {"in_flight": 0, "upstream_calls": 0, "coalesced": 0}
+    assert chunks == [0, 1, 2]
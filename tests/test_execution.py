@@ -0,0 +1,167 @@
+import asyncio
+import time
+from functools import partial
+
+import pytest
+
+import execution
+from execution import ExecutionError, ExecutionPolicy, LatencyBudget
+from llmsetup import backend_for
+from scheduler import Scheduler
+from stub_providers import stub_aquery, stub_query
+from telemetry import Telemetry
+
+BACKENDS = ["openai", "anthropic", "gemini", "mistral", "llama"]
+
+
+def counted(produced, backend, provider):
+    # Wraps a stub and counts the chunks each backend actually produced
+    def query(q):
+        for chunk in provider(q):
+            produced[backend] = produced.get(backend, 0) + 1
+            yield chunk
+    return query
+
+
+def acancellable(cancelled, backend, provider):
+    # Wraps an async stub and notes the backends whose stream was cancelled
+    async def query(q):
+        try:
+            async for chunk in provider(q):
+                yield chunk
+        except asyncio.CancelledError:
+            cancelled.append(backend)
+            raise
+    return query
+
+
+def make_policy(overrides=None, produced=None, cancelled=None, scheduler=None, **latency):
+    """
+    A policy over stub providers, gpt-4 (openai) first in the fallback order.
+
+    :param overrides: Backend name -> stub kwargs for that backend only
+    """
+    overrides = overrides or {}
+    providers, async_providers = {}, {}
+    for backend in BACKENDS:
+        kwargs = {"ttft": 0, "chunks": 5, "interval": 0, **latency, **overrides.get(backend, {})}
+        providers[backend] = partial(stub_query, **kwargs)
+        if produced is not None:
+            providers[backend] = counted(produced, backend, providers[backend])
+        async_providers[backend] = partial(stub_aquery, **kwargs)
+        if cancelled is not None:
+            async_providers[backend] = acancellable(cancelled, backend, async_providers[backend])
+    return ExecutionPolicy(providers, backend_for, async_providers, telemetry=Telemetry(), scheduler=scheduler)
+
+
+@pytest.fixture
+def budget(monkeypatch):
+    def set_budget(**kwargs):
+        monkeypatch.setitem(execution.BUDGETS, "gpt-4", LatencyBudget(**{"ttft": 5.0, "total": 10.0, "hedge_after": 5.0, **kwargs}))
+    return set_budget
+
+
+def test_hedge_fires_after_the_delay(budget):
+    budget(hedge_after=0.1)
+    policy = make_policy({"openai": {"ttft": 2.0}})
+    started = time.monotonic()
+    chunks = list(policy.execute("gpt-4", "q"))
+    elapsed = time.monotonic() - started
+    assert len(chunks) == 5
+    assert policy.stats()["hedges"] == 1
+    assert 0.1 <= elapsed < 1.0
+
+
+def test_no_hedge_when_the_primary_is_fast(budget):
+    budget(hedge_after=0.5)
+    policy = make_policy()
+    assert len(list(policy.execute("gpt-4", "q"))) == 5
+    assert policy.stats() == {"hedges": 0, "fallbacks": 0}
+
+
+def test_failing_primary_falls_back(budget):
+    budget()
+    policy = make_policy({"openai": {"failure_rate": 1.0}})
+    assert len(list(policy.execute("gpt-4", "q"))) == 5
+    assert policy.stats()["fallbacks"] == 1
+
+
+def test_losing_attempt_is_cancelled(budget):
+    budget(hedge_after=0.05)
+    produced = {}
+    policy = make_policy({"openai": {"ttft": 0.2, "chunks": 1000}, "anthropic": {"chunks": 20, "interval": 0.02}}, produced)
+    assert len(list(policy.execute("gpt-4", "q"))) == 20
+    time.sleep(0.1)
+    # The primary stops at the first chunk it produces after losing the race
+    assert produced.get("openai", 0) <= 1
+
+
+def test_expired_attempt_is_recorded_once(budget):
+    budget(ttft=0.1)
+    policy = make_policy({"openai": {"ttft": 0.3}})
+    assert len(list(policy.execute("gpt-4", "q"))) == 5
+    time.sleep(0.4)
+    samples = policy.telemetry._samples["gpt-4"]
+    assert len(samples) == 1
+    assert samples[0][3] is True
+
+
+def test_hedge_cancelled_while_queued_leaves_the_limit_alone(budget):
+    budget(hedge_after=0.05)
+    scheduler = Scheduler(limits={"anthropic": {"initial": 1}})
+    backend = scheduler.backend("anthropic")
+    policy = make_policy({"openai": {"ttft": 0.2}}, scheduler=scheduler)
+    with scheduler.slot("anthropic") as held:
+        # The hedge queues behind this slot and loses the race while it waits
+        assert len(list(policy.execute("gpt-4", "q"))) == 5
+        held.cancel()
+    # Let the hedge get the slot, notice it lost and hand the slot back
+    time.sleep(0.2)
+    assert backend.in_flight == 0
+    assert backend.limit == 1.0
+
+
+def test_total_budget_raises(budget):
+    budget(total=0.2)
+    policy = make_policy(chunks=100, interval=0.01)
+    with pytest.raises(ExecutionError):
+        list(policy.execute("gpt-4", "q"))
+
+
+def test_async_hedge_and_cancellation(budget):
+    budget(hedge_after=0.05)
+    cancelled = []
+    policy = make_policy({"openai": {"ttft": 2.0}}, cancelled=cancelled)
+
+    async def scenario():
+        started = time.monotonic()
+        chunks = [chunk async for chunk in policy.aexecute("gpt-4", "q")]
+        return chunks, time.monotonic() - started
+
+    chunks, elapsed = asyncio.run(scenario())
+    assert len(chunks) == 5
+    assert policy.stats()["hedges"] == 1
+    assert elapsed < 1.0
+    assert cancelled == ["openai"]
+
+
+def test_async_failing_primary_falls_back(budget):
+    budget()
+    policy = make_policy({"openai": {"failure_rate": 1.0}})
+
+    async def scenario():
+        return [chunk async for chunk in policy.aexecute("gpt-4", "q")]
+
+    assert len(asyncio.run(scenario())) == 5
+    assert policy.stats()["fallbacks"] == 1
+
+
+def test_async_total_budget_raises(budget):
+    budget(total=0.2)
+    policy = make_policy(chunks=100, interval=0.01)
+
+    async def scenario():
+        return [chunk async for chunk in policy.aexecute("gpt-4", "q")]
+
+    with pytest.raises(ExecutionError):
+        asyncio.run(scenario())
@@ -0,0 +1,134 @@
+from types import SimpleNamespace
+
+import pytest
+
+import llm_router
+from llm_router import ANTHROPIC_CACHE_MIN_TOKENS, RouterContext
+
+
+class FakeAnthropic:
+    """Records each messages.create call and answers with fixed usage."""
+
+    def __init__(self, reply, **usage):
+        self.calls = []
+        self.reply = reply
+        self.usage = {"input_tokens": 0, "cache_read_input_tokens": 0, "cache_creation_input_tokens": 0, **usage}
+        self.messages = SimpleNamespace(create=self.create)
+
+    def create(self, **kwargs):
+        self.calls.append(kwargs)
+        return SimpleNamespace(
+            content=[SimpleNamespace(text=self.reply)],
+            usage=SimpleNamespace(**self.usage),
+        )
+
+
+class FakeOpenAI:
+    def __init__(self, reply, prompt_tokens, cached_tokens):
+        self.reply = reply
+        self.usage = SimpleNamespace(prompt_tokens=prompt_tokens, prompt_tokens_details=SimpleNamespace(cached_tokens=cached_tokens))
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, **kwargs):
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content=self.reply))],
+            usage=self.usage,
+        )
+
+
+class FakeOllama:
+    def __init__(self, reply, prompt_eval_count):
+        self.response = {"response": reply, "prompt_eval_count": prompt_eval_count}
+
+    def generate(self, **kwargs):
+        return self.response
+
+
+@pytest.fixture
+def stats(monkeypatch):
+    fresh = {"decisions": 0, "errors": 0, "prompt_tokens": 0, "cached_tokens": 0}
+    monkeypatch.setattr(llm_router, "_stats", fresh)
+    return fresh
+
+
+def use_client(monkeypatch, client):
+    monkeypatch.setattr(llm_router, "get_client", lambda name: client)
+
+
+@pytest.mark.parametrize("output, model", [
+    ('{"choice": "GPT-4o"}', "gpt-4"),
+    ('Sure. {"choice": " Claude 3.5 Sonnet "} Hope that helps', "claude-3-sonnet-20240229"),
+    ('{\n  "choice": "mixtral",\n  "reason": "code"\n}', "mistralai/Mixtral-8x7B-Instruct-v0.1"),
+])
+def test_parse_choice_maps_known_choices(output, model):
+    assert llm_router.parse_choice(output) == model
+
+
+@pytest.mark.parametrize("output", [
+    "gpt-4o",
+    '{"choice": "research agent"}',
+    '{"model": "gpt-4o"}',
+    '{"choice": gpt-4o}',
+    '["not", {"an": "object"}]',
+    '{"choice": null}',
+])
+def test_parse_choice_rejects_unusable_output(output):
+    assert llm_router.parse_choice(output) is None
+
+
+def test_short_context_is_sent_uncached(monkeypatch, stats):
+    client = FakeAnthropic('{"choice": "gpt-4o"}', input_tokens=10)
+    use_client(monkeypatch, client)
+    llm_router.anthropic_route("q", RouterContext("short", ANTHROPIC_CACHE_MIN_TOKENS - 1))
+    assert "cache_control" not in client.calls[0]["system"][0]
+
+
+def test_long_context_is_marked_for_caching(monkeypatch, stats):
+    client = FakeAnthropic('{"choice": "gpt-4o"}', input_tokens=10)
+    use_client(monkeypatch, client)
+    llm_router.anthropic_route("q", RouterContext("long", [0] * ANTHROPIC_CACHE_MIN_TOKENS))
+    assert client.calls[0]["system"][0]["cache_control"] == {"type": "ephemeral"}
+
+
+def test_anthropic_totals_include_cache_reads_and_writes(monkeypatch, stats):
+    context = RouterContext("context", ANTHROPIC_CACHE_MIN_TOKENS)
+    # input_tokens only counts the uncached remainder of the prompt
+    use_client(monkeypatch, FakeAnthropic("{}", input_tokens=12, cache_creation_input_tokens=1500))
+    llm_router.anthropic_route("q", context)
+    use_client(monkeypatch, FakeAnthropic("{}", input_tokens=12, cache_read_input_tokens=1500))
+    llm_router.anthropic_route("q", context)
+    assert stats == {"decisions": 2, "errors": 0, "prompt_tokens": 3024, "cached_tokens": 1500}
+
+
+def test_openai_cached_tokens_are_part_of_the_prompt(monkeypatch, stats):
+    use_client(monkeypatch, FakeOpenAI("{}", prompt_tokens=1300, cached_tokens=1280))
+    llm_router.openai_route("q", RouterContext("context", 1290))
+    assert stats["prompt_tokens"] == 1300
+    assert stats["cached_tokens"] == 1280
+
+
+def test_ollama_counts_unevaluated_prefix_as_cached(monkeypatch, stats):
+    context = RouterContext("context", 1000)
+    use_client(monkeypatch, FakeOllama("{}", prompt_eval_count=5))
+    llm_router.ollama_route("llama", "x" * 40, context)
+    # A cold model evaluates more than the estimate, which is never negative
+    use_client(monkeypatch, FakeOllama("{}", prompt_eval_count=2000))
+    llm_router.ollama_route("llama", "x" * 40, context)
+    assert stats["prompt_tokens"] == 2020
+    assert stats["cached_tokens"] == 1005
+
+
+def test_choose_counts_errors_and_reports_the_cached_fraction(monkeypatch, stats):
+    use_client(monkeypatch, FakeAnthropic('{"choice": "gemini 1.5 pro"}', input_tokens=25, cache_read_input_tokens=75))
+    assert llm_router.choose("q", backend="anthropic") == "gemini-1.5-pro"
+
+    def broken(name):
+        raise ConnectionError("refused")
+
+    monkeypatch.setattr(llm_router, "get_client", broken)
+    with pytest.raises(ConnectionError):
+        llm_router.choose("q", backend="anthropic")
+    report = llm_router.stats()
+    assert report["decisions"] == 1
+    assert report["errors"] == 1
+    assert report["cached_fraction"] == 0.75
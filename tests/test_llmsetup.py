@@ -0,0 +1,48 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+import clients
+import llmsetup
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_serving_modules_import_without_keys_or_sdks():
+    env = {k: v for k, v in os.environ.items() if k not in llmsetup.BACKEND_ENV.values()}
+    env["PRELOAD_PROVIDERS"] = "0"
+    script = (
+        "import sys, clients, route, thalamus\n"
+        "print(','.join(m for m in clients.SDK_MODULES.values() if m in sys.modules))\n"
+    )
+    # A fresh interpreter, this one may already have loaded an SDK
+    proc = subprocess.run([sys.executable, "-c", script], cwd=ROOT, env=env, capture_output=True, text=True)
+    assert proc.returncode == 0, proc.stderr
+    assert proc.stdout.strip() == ""
+
+
+def test_missing_key_only_fails_its_backend(monkeypatch):
+    monkeypatch.delenv("ANTHROPIC_API_KEY", raising=False)
+    monkeypatch.setenv("OPENAI_API_KEY", "sk-test")
+    with pytest.raises(ValueError, match="ANTHROPIC_API_KEY"):
+        llmsetup.require("anthropic")
+    assert llmsetup.require("openai") == {"api_key": "sk-test"}
+
+
+def test_key_is_read_when_the_backend_is_first_used(monkeypatch):
+    monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+    with pytest.raises(ValueError, match="OPENAI_API_KEY"):
+        llmsetup.require("openai")
+    # Set after import, as a secrets mount or a late-loaded .env would
+    monkeypatch.setenv("OPENAI_API_KEY", "sk-late")
+    assert llmsetup.require("openai")["api_key"] == "sk-late"
+
+
+def test_client_builder_reports_the_missing_key(monkeypatch):
+    pytest.importorskip("anthropic")
+    monkeypatch.delenv("ANTHROPIC_API_KEY", raising=False)
+    monkeypatch.setattr(clients, "_clients", {})
+    with pytest.raises(ValueError, match="ANTHROPIC_API_KEY"):
+        clients.get_client("anthropic")
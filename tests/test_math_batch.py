@@ -0,0 +1,106 @@
+import math
+
+import numpy as np
+import pytest
+
+from toolkitutils import math_batch
+from toolkitutils.math_batch import INTEGER_KERNELS, KERNELS
+from toolkitutils.math_toolkit import lookup
+
+# Rows inside every float kernel's domain: positive sides and angles below pi/2
+rng = np.random.default_rng(7)
+ROWS = 64
+
+
+def sample_columns(category, name, arity):
+    columns = [rng.uniform(0.5, 1.5, ROWS) for _ in range(arity)]
+    if (category, name) == ("geometry", "triangle_area_sides"):
+        # Sides that satisfy the triangle inequality
+        a, b = columns[0], columns[1]
+        columns[2] = np.abs(a - b) + rng.uniform(0.1, 0.9, ROWS) * (a + b - np.abs(a - b))
+    elif (category, name) == ("geometry", "regular_polygon_area"):
+        columns[0] = rng.integers(3, 12, ROWS).astype(float)
+    elif (category, name) == ("algebra", "logarithm"):
+        columns[0] = rng.uniform(1.5, 10, ROWS)
+    elif (category, name) == ("algebra", "infinite_geometric_series_sum"):
+        columns[1] = rng.uniform(-0.9, 0.9, ROWS)
+    elif (category, name) == ("algebra", "geometric_series_sum"):
+        columns[2] = rng.integers(0, 20, ROWS).astype(float)
+    elif (category, name) == ("algebra", "quadratic_roots"):
+        # a > 0 and c < 0 gives two real roots on every row
+        columns[2] = -columns[2]
+    return columns
+
+
+FLOAT_KERNELS = [(category, name) for category, kernels in KERNELS.items() for name in kernels]
+
+
+@pytest.mark.parametrize("category, name", FLOAT_KERNELS)
+def test_kernel_matches_the_scalar_operation(category, name):
+    op = lookup(category, name)
+    columns = sample_columns(category, name, op.arity)
+    batched = math_batch.batch(category, name, columns)
+    expected = [op(*row) for row in zip(*(c.tolist() for c in columns))]
+    if isinstance(batched, tuple):
+        for i, column in enumerate(batched):
+            np.testing.assert_allclose(column, [row[i] for row in expected], rtol=1e-9)
+    else:
+        np.testing.assert_allclose(batched, expected, rtol=1e-9)
+
+
+def test_every_kernel_is_a_registered_canonical_operation():
+    for kernels in (KERNELS, INTEGER_KERNELS):
+        for category, names in kernels.items():
+            for name in names:
+                assert lookup(category, name).name == name
+
+
+def test_aliases_reach_the_kernel():
+    radii = np.array([1.0, 2.0])
+    heights = np.array([3.0, 4.0])
+    np.testing.assert_allclose(math_batch.batch("geometry", "cyli_volume", [radii, heights]),
+                               math_batch.batch("geometry", "cylinder_volume", [radii, heights]))
+
+
+def test_out_of_domain_rows_are_nan():
+    roots = math_batch.batch("algebra", "quadratic_roots", [[1.0, 1.0, 1.0], [0.0, 2.0, -3.0], [1.0, 1.0, 2.0]])
+    # No real roots, one double root, two roots
+    assert np.isnan(roots[0][0]) and np.isnan(roots[1][0])
+    assert roots[0][1] == -1.0 and np.isnan(roots[1][1])
+    np.testing.assert_allclose([roots[0][2], roots[1][2]], [2.0, 1.0])
+    sums = math_batch.batch("algebra", "infinite_geometric_series_sum", [[1.0, 1.0], [0.5, 2.0]])
+    assert sums[0] == 2.0 and np.isnan(sums[1])
+
+
+def test_operations_without_a_kernel_loop_over_the_scalar_op():
+    ns = np.array([5, 6, 7])
+    assert math_batch.batch("algebra", "factorial", [ns]).tolist() == [120, 720, 5040]
+    assert math_batch.batch("number_theory", "gcd", [ns, 4]).tolist() == [1, 2, 1]
+    assert math_batch.batch("number_theory", "is_prime", [ns]).tolist() == [True, False, True]
+
+
+def test_params_in_every_layout():
+    expected = [math.pi * 4, math.pi * 9]
+    rows = np.array([[2.0], [3.0]])
+    for params in ({"radius": [2.0, 3.0]}, [[2.0, 3.0]], rows):
+        np.testing.assert_allclose(math_batch.batch("geometry", "circle_area", params), expected)
+
+
+def test_column_count_must_match_the_arity():
+    with pytest.raises(ValueError, match="takes 2 column"):
+        math_batch.batch("geometry", "rectangle_area", [[1.0]])
+
+
+@pytest.mark.parametrize("dtype", [np.int32, np.int64, np.uint32])
+def test_integer_modexp_matches_pow(dtype):
+    bases = rng.integers(0, 1 << 31, ROWS).astype(dtype)
+    exponents = rng.integers(0, 1 << 20, ROWS).astype(dtype)
+    moduli = rng.integers(1, 1 << 31, ROWS).astype(dtype)
+    result = math_batch.batch("number_theory", "mod_exponentiation", [bases, exponents, moduli])
+    assert result.tolist() == [pow(int(b), int(e), int(m)) for b, e, m in zip(bases, exponents, moduli)]
+
+
+def test_negative_integer_bases_match_pow():
+    bases = np.array([-7, -1, -123456789])
+    result = math_batch.batch("number_theory", "modular_exponentiation", [bases, 3, 1000003])
+    assert result.tolist() == [pow(int(b), 3, 1000003) for b in bases]
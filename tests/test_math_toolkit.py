@@ -0,0 +1,68 @@
+import pytest
+
+from toolkitutils import math_toolkit
+
+
+def test_primes_in_range():
+    assert math_toolkit.primes_in_range(10, 30) == [11, 13, 17, 19, 23, 29]
+
+
+def test_primes_in_range_rejects_oversized_ranges():
+    with pytest.raises(ValueError):
+        math_toolkit.primes_in_range(0, math_toolkit.MAX_PRIME_RANGE + 1)
+    with pytest.raises(ValueError):
+        math_toolkit.primes_in_range(math_toolkit.MAX_PRIME_BOUND, math_toolkit.MAX_PRIME_BOUND + 10)
+
+
+@pytest.mark.parametrize("alias, canonical", [
+    ("geometry.cyli_volume", "geometry.cylinder_volume"),
+    ("geometry.reg_polygon_area", "geometry.regular_polygon_area"),
+    ("algebra.quad_roots", "algebra.quadratic_roots"),
+    ("algebra.log", "algebra.logarithm"),
+    ("number_theory.mod_exponentiation", "number_theory.modular_exponentiation"),
+    ("trigonometry.law_of_cos", "trigonometry.law_of_cosines"),
+])
+def test_aliases_resolve_to_the_canonical_operation(alias, canonical):
+    assert math_toolkit.lookup(*alias.split(".")) is math_toolkit.OPERATIONS[canonical]
+
+
+def test_aliases_are_not_listed():
+    operations = math_toolkit.get_available_operations()
+    assert "geometry.cylinder_volume" in operations
+    assert "geometry.cyli_volume" not in operations
+    assert len(operations) == len(set(operations))
+
+
+def test_unknown_operation():
+    with pytest.raises(ValueError, match="Invalid geometry operation: hexagon"):
+        math_toolkit.MathToolkit.geometry("hexagon", 1)
+
+
+@pytest.mark.parametrize("args", [(2,), (2, 3, 4)])
+def test_arity_is_checked(args):
+    with pytest.raises(ValueError, match=r"geometry.rectangle_area takes 2 argument\(s\) \(length, width\)"):
+        math_toolkit.MathToolkit.geometry("rectangle_area", *args)
+
+
+def test_docstrings_list_the_registry():
+    doc = math_toolkit.MathToolkit.number_theory.__doc__
+    assert "- modular_exponentiation: base, exponent, modulus" in doc
+    assert "- mod_exponentiation" not in doc
+
+
+def test_fixed_width_calculators_drop_unused_params():
+    assert math_toolkit.geometry_calculator("circle_area", 2, 0) == math_toolkit.circle_area(2)
+    assert math_toolkit.number_theory_calculator("is_prime", 97) is True
+    assert math_toolkit.unified_calculator("algebra", "log", {"param1": 2, "param2": 8}) == 3.0
+
+
+def test_number_theory_calculator_takes_three_params():
+    assert math_toolkit.number_theory_calculator("modular_exponentiation", 4, 13, 497) == 445
+    assert math_toolkit.unified_calculator("number_theory", "mod_exponentiation", {"param1": 4, "param2": 13, "param3": 497}) == 445
+
+
+def test_available_operations_cannot_be_mutated_through_the_getter():
+    operations = math_toolkit.get_available_operations()
+    operations.append("geometry.hexagon")
+    assert "geometry.hexagon" not in math_toolkit.get_available_operations()
+    assert "geometry.hexagon" not in math_toolkit.AVAILABLE_OPERATIONS
@@ -0,0 +1,136 @@
+import math
+import random
+
+import numpy as np
+import pytest
+
+from toolkitutils import number_theory
+from toolkitutils.math_batch import batch
+
+
+def trial_division(n):
+    factors, d = {}, 2
+    while d * d <= n:
+        while n % d == 0:
+            factors[d] = factors.get(d, 0) + 1
+            n //= d
+        d += 1 if d == 2 else 2
+    if n > 1:
+        factors[n] = factors.get(n, 0) + 1
+    return factors
+
+
+def brute_inverse(a, m):
+    return next((x for x in range(m) if a * x % m == 1 % m), None)
+
+
+def brute_crt(remainders, moduli):
+    lcm = math.lcm(*moduli)
+    return next(((x, lcm) for x in range(lcm) if all((x - r) % m == 0 for r, m in zip(remainders, moduli))), None)
+
+
+def or_none(fn, *args):
+    try:
+        return fn(*args)
+    except ValueError:
+        return None
+
+
+def test_mod_inverse_against_brute_force():
+    rng = random.Random(0)
+    for _ in range(2000):
+        a, m = rng.randint(-100, 100), rng.randint(1, 60)
+        assert or_none(number_theory.mod_inverse, a, m) == brute_inverse(a % m, m), (a, m)
+
+
+def test_crt_against_brute_force():
+    rng = random.Random(1)
+    for _ in range(2000):
+        # Small moduli so the search stays short, often sharing factors
+        moduli = [rng.randint(1, 18) for _ in range(rng.randint(1, 4))]
+        remainders = [rng.randint(-40, 40) for _ in moduli]
+        assert or_none(number_theory.crt, remainders, moduli) == brute_crt(remainders, moduli), (remainders, moduli)
+
+
+def test_crt_on_many_large_coprime_moduli():
+    rng = random.Random(2)
+    moduli = []
+    while len(moduli) < 200:
+        n = rng.getrandbits(64) | (1 << 63) | 1
+        if number_theory.is_prime(n) and n not in moduli:
+            moduli.append(n)
+    x = rng.getrandbits(64 * 200)
+    solution, lcm = number_theory.crt([x % m for m in moduli], moduli)
+    assert lcm == math.prod(moduli)
+    assert solution == x % lcm
+
+
+@pytest.mark.parametrize("bits", [32, 200])
+def test_batch_modular_exponentiation_against_pow(bits):
+    rng = random.Random(bits)
+    bases = [rng.randint(-10 ** 6, 10 ** 6) for _ in range(500)]
+    exponents = [rng.randint(0, 10 ** 6) for _ in range(500)]
+    moduli = [rng.getrandbits(bits - 1) + 1 for _ in range(500)]
+    got = batch("number_theory", "modular_exponentiation", [bases, exponents, moduli])
+    assert [int(v) for v in got] == [pow(b, e, m) for b, e, m in zip(bases, exponents, moduli)]
+
+
+def test_batch_modular_exponentiation_with_uint64_bases_above_2_63():
+    bases = np.array([2 ** 63, 2 ** 64 - 1, 2 ** 63 + 12345], dtype=np.uint64)
+    exponents = np.array([3, 5, 7], dtype=np.uint64)
+    moduli = np.array([1000003, 2 ** 32 - 5, 97], dtype=np.uint64)
+    got = batch("number_theory", "modular_exponentiation", [bases, exponents, moduli])
+    assert [int(v) for v in got] == [pow(int(b), int(e), int(m)) for b, e, m in zip(bases, exponents, moduli)]
+
+
+# Carmichael numbers fool the Fermat test for every coprime base; the last
+# three are strong pseudoprimes to the bases 2..7, 2..23 and 2..37
+PSEUDOPRIMES = [561, 1105, 1729, 2465, 2821, 6601, 8911, 41041, 825265, 321197185,
+                3215031751, 3825123056546413051, 318665857834031151167461]
+# Products of two primes near 2^32, the worst case for Pollard-rho below 2^64
+SEMIPRIMES = [(4294967291, 4294967279), (4294967279, 4294967231), (3037000493, 6074001001)]
+
+
+def test_is_prime_against_trial_division():
+    # The sieve, the trial division path and Miller-Rabin
+    small = range(-5, 5000)
+    around_sieve = range(number_theory.SIEVE_LIMIT - 500, number_theory.SIEVE_LIMIT + 500)
+    rng = random.Random(0)
+    large = [rng.randrange(10 ** 6, 10 ** 10) for _ in range(300)]
+    for n in [*small, *around_sieve, *large]:
+        assert number_theory.is_prime(n) == (trial_division(n) == {n: 1} if n > 1 else False), n
+
+
+def test_factorization_against_trial_division():
+    rng = random.Random(1)
+    for n in [*range(0, 3000), *(rng.randrange(10 ** 6, 10 ** 10) for _ in range(300))]:
+        expected = trial_division(n) if n > 1 else {}
+        factors = number_theory.factorization(n)
+        assert factors == expected, n
+        assert list(factors) == sorted(factors)
+
+
+@pytest.mark.parametrize("n", PSEUDOPRIMES)
+def test_pseudoprimes_are_composite(n):
+    assert not number_theory.is_prime(n)
+    factors = number_theory.factorization(n)
+    assert math.prod(p ** k for p, k in factors.items()) == n
+    assert len(factors) > 1 and all(number_theory.is_prime(p) for p in factors)
+
+
+@pytest.mark.parametrize("p, q", SEMIPRIMES)
+def test_64_bit_semiprimes(p, q):
+    assert number_theory.is_prime(p) and number_theory.is_prime(q)
+    assert not number_theory.is_prime(p * q)
+    assert number_theory.prime_factors(p * q) == sorted([p, q])
+
+
+@pytest.mark.parametrize("n, prime", [
+    ((1 << 61) - 1, True),
+    ((1 << 64) - 59, True),
+    ((1 << 89) - 1, True),
+    ((1 << 67) - 1, False),
+    ((1 << 64) + 1, False),
+])
+def test_is_prime_at_and_above_64_bits(n, prime):
+    assert number_theory.is_prime(n) == prime
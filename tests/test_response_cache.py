@@ -0,0 +1,54 @@
+import sqlite3
+import time
+
+import response_cache
+from response_cache import ResponseCache
+
+
+def test_cache_is_opt_in(monkeypatch):
+    monkeypatch.delenv("RESPONSE_CACHE", raising=False)
+    assert response_cache.get_cache() is None
+
+
+def test_round_trip(tmp_path):
+    cache = ResponseCache(path=str(tmp_path / "cache.sqlite3"))
+    assert cache.get("gpt-4", "q") is None
+    cache.put("gpt-4", "q", ["a", "b"])
+    assert cache.get("gpt-4", "q") == ["a", "b"]
+    assert cache.stats()["hits"] == 1
+
+
+def test_entries_expire(tmp_path):
+    cache = ResponseCache(path=str(tmp_path / "cache.sqlite3"), ttl=0.1)
+    cache.put("gpt-4", "q", ["a"])
+    assert cache.get("gpt-4", "q") == ["a"]
+    time.sleep(0.15)
+    assert cache.get("gpt-4", "q") is None
+    # The next write reclaims the expired entry
+    cache.put("gpt-4", "other", ["b"])
+    stats = cache.stats()
+    assert stats["entries"] == 1
+    assert stats["expirations"] == 1
+
+
+def test_hits_keep_entries_from_eviction(tmp_path):
+    cache = ResponseCache(path=str(tmp_path / "cache.sqlite3"), max_bytes=250)
+    cache.put("gpt-4", "old", ["x" * 50])
+    time.sleep(0.01)
+    cache.put("gpt-4", "new", ["x" * 50])
+    time.sleep(0.01)
+    # The hit is only noted in memory, it must still count when evicting
+    assert cache.get("gpt-4", "old") is not None
+    cache.put("gpt-4", "newest", ["x" * 50])
+    assert cache.get("gpt-4", "old") is not None
+    assert cache.get("gpt-4", "new") is None
+
+
+def test_existing_cache_files_gain_expiry(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    db = sqlite3.connect(path)
+    db.execute("CREATE TABLE responses (key TEXT PRIMARY KEY, namespace TEXT, chunks TEXT, embedding TEXT, size INTEGER, last_access REAL)")
+    db.execute("INSERT INTO responses VALUES (?, '', '[\"a\"]', NULL, 10, ?)", (response_cache.cache_key("gpt-4", "q"), time.time()))
+    db.commit()
+    db.close()
+    assert ResponseCache(path=path).get("gpt-4", "q") == ["a"]
@@ -0,0 +1,60 @@
+import pytest
+
+import thalamus
+import train_router
+from router import Router, extract_features
+
+EXAMPLES = [
+    ("Write a python function that parses a csv file", "gpt-4"),
+    ("Fix this javascript bug in my api handler", "gpt-4"),
+    ("Draft a polite email to my landlord about the heating", "claude-3-sonnet-20240229"),
+    ("Write a short story about a lighthouse keeper", "claude-3-sonnet-20240229"),
+    ("hi, how are you today?", "mistralai/Mixtral-8x7B-Instruct-v0.1"),
+    ("thanks, any tips for a fun weekend?", "mistralai/Mixtral-8x7B-Instruct-v0.1"),
+]
+LABELS = ["gpt-4", "claude-3-sonnet-20240229", "mistralai/Mixtral-8x7B-Instruct-v0.1"]
+
+
+def test_features_are_stable():
+    query = "Compare the tradeoffs of two database designs?"
+    assert extract_features(query) == extract_features(query)
+
+
+def test_training_is_deterministic():
+    first = train_router.train(EXAMPLES, LABELS, epochs=10)
+    second = train_router.train(EXAMPLES, LABELS, epochs=10)
+    assert first.weights == second.weights
+
+
+def test_load_and_probabilities_are_deterministic(tmp_path):
+    path = str(tmp_path / "weights.json")
+    train_router.train(EXAMPLES, LABELS, epochs=10).save(path)
+    first, second = Router.load(path), Router.load(path)
+    assert first.labels == second.labels == LABELS
+    query = "Write a python script to rename files"
+    assert first.probabilities(query) == second.probabilities(query)
+    assert sum(first.probabilities(query)) == pytest.approx(1.0)
+    assert first.predict(query)[0] == "gpt-4"
+
+
+def test_missing_weights_raise_for_the_fallback():
+    with pytest.raises(OSError):
+        Router.load("/nonexistent/router_weights.json")
+
+
+def test_without_weights_every_model_is_ranked_equally(monkeypatch):
+    monkeypatch.setattr(thalamus, "router", None)
+    ranked = thalamus.classify("anything")
+    assert [m for m, _ in ranked] == thalamus.models
+    assert {p for _, p in ranked} == {1 / len(thalamus.models)}
+
+
+def test_route_decision_only_returns_configured_models(monkeypatch, tmp_path):
+    path = str(tmp_path / "weights.json")
+    train_router.train(EXAMPLES, LABELS, epochs=10).save(path)
+    monkeypatch.setattr(thalamus, "router", Router.load(path))
+    # gpt-4 is the classifier's favourite but is no longer configured
+    monkeypatch.setattr(thalamus, "models", ["claude-3-sonnet-20240229", "gemini-1.5-pro"])
+    model, _ = thalamus.route_decision("Write a python function that parses a csv file")
+    assert model in thalamus.models
+    thalamus.invalidate_routing_cache()
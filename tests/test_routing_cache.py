@@ -0,0 +1,71 @@
+import time
+
+from routing_cache import SHINGLE_CHARS, RoutingCache, minhash_bands
+
+
+def cache_and_store(cache, query, value):
+    key, cached = cache.get(query)
+    assert cached is None
+    cache.put(key, value)
+
+
+def test_normalized_queries_share_an_entry():
+    cache = RoutingCache()
+    cache_and_store(cache, "What is  the Capital of France?", "gpt-4")
+    assert cache.get("what is the capital of france?")[1] == "gpt-4"
+    assert cache.stats()["hits"] == 1
+
+
+def test_entries_expire_after_the_ttl():
+    cache = RoutingCache(ttl=0.05)
+    cache_and_store(cache, "q", "gpt-4")
+    assert cache.get("q")[1] == "gpt-4"
+    time.sleep(0.1)
+    assert cache.get("q")[1] is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = RoutingCache(max_entries=2)
+    cache_and_store(cache, "a", 1)
+    cache_and_store(cache, "b", 2)
+    assert cache.get("a")[1] == 1
+    cache_and_store(cache, "c", 3)
+    assert cache.get("b")[1] is None
+    assert cache.get("a")[1] == 1
+    assert cache.stats()["evictions"] == 1
+
+
+def test_version_change_invalidates():
+    cache = RoutingCache()
+    cache.check_version(("gpt-4",))
+    cache_and_store(cache, "q", "gpt-4")
+    cache.check_version(("gpt-4",))
+    assert cache.get("q")[1] == "gpt-4"
+    cache.check_version(("gpt-4", "claude"))
+    assert cache.get("q")[1] is None
+
+
+def test_near_duplicate_hit():
+    cache = RoutingCache(near_duplicates=True)
+    query = "Summarize the attached quarterly report and list the three biggest risks for the business."
+    cache_and_store(cache, query, "claude")
+    assert cache.get(query.replace("three", "3"))[1] == "claude"
+    assert cache.stats()["near_hits"] == 1
+    assert cache.get("Write a haiku about autumn leaves falling on a pond.")[1] is None
+
+
+def test_near_duplicates_off_by_default():
+    cache = RoutingCache()
+    query = "Summarize the attached quarterly report and list the three biggest risks for the business."
+    cache_and_store(cache, query, "claude")
+    assert cache.get(query.replace("three", "3"))[1] is None
+
+
+def test_keys_do_not_hold_the_prompt():
+    cache = RoutingCache(near_duplicates=True)
+    query = "x" * 100000
+    key, _ = cache.get(query)
+    assert len(key.digest) == 16
+    # Only the head of the prompt is shingled
+    assert list(key.bands) == minhash_bands("x" * SHINGLE_CHARS)
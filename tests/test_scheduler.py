@@ -0,0 +1,114 @@
+import threading
+import time
+
+import pytest
+
+from scheduler import PRIORITY_BATCH, PRIORITY_INTERACTIVE, BackendScheduler, Scheduler, SchedulerTimeout
+
+
+class RateLimitError(Exception):
+    pass
+
+
+def queued(backend):
+    return backend.stats()["queued"]
+
+
+def wait_until(predicate, timeout=2):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline
+        time.sleep(0.005)
+
+
+def test_success_grows_the_limit_additively():
+    backend = BackendScheduler("x", initial=4)
+    backend.release(backend.acquire())
+    assert backend.limit == 4.25
+
+
+def test_errors_halve_the_limit_once_per_window():
+    backend = BackendScheduler("x", initial=8, latency_target=10.0)
+    backend.release(backend.acquire(), error=RateLimitError())
+    assert backend.limit == 4
+    backend.release(backend.acquire(), error=RuntimeError())
+    assert backend.limit == 4
+    assert backend.stats()["rate_limited"] == 1
+    assert backend.stats()["errors"] == 2
+
+
+def test_slow_first_token_halves_the_limit():
+    backend = BackendScheduler("x", initial=8, latency_target=0.01)
+    slot = backend.acquire()
+    time.sleep(0.02)
+    backend.release(slot)
+    assert backend.limit == 4
+
+
+def test_request_bucket_blocks_until_it_refills():
+    backend = BackendScheduler("x", rpm=600)
+    backend.requests.level = 0
+    with pytest.raises(SchedulerTimeout):
+        backend.acquire(timeout=0.05)
+    # 10 requests a second, so one is available within about 0.1s
+    started = time.monotonic()
+    backend.release(backend.acquire(timeout=1))
+    assert time.monotonic() - started < 0.5
+
+
+def test_token_bucket_charges_the_estimate():
+    backend = BackendScheduler("x", tpm=600)
+    backend.release(backend.acquire(tokens=600))
+    started = time.monotonic()
+    backend.release(backend.acquire(tokens=5, timeout=2))
+    # 10 tokens a second refill the 5 needed in about half a second
+    assert 0.3 < time.monotonic() - started < 1.5
+
+
+def test_interactive_jumps_batch_and_each_priority_is_fifo():
+    backend = BackendScheduler("x", initial=1)
+    held = backend.acquire()
+    order = []
+
+    def request(name, priority):
+        slot = backend.acquire(priority)
+        order.append(name)
+        backend.release(slot, neutral=True)
+
+    threads = []
+    for name, priority in (("batch", PRIORITY_BATCH), ("first", PRIORITY_INTERACTIVE), ("second", PRIORITY_INTERACTIVE)):
+        thread = threading.Thread(target=request, args=(name, priority))
+        thread.start()
+        threads.append(thread)
+        wait_until(lambda: queued(backend) == len(threads))
+    backend.release(held, neutral=True)
+    for thread in threads:
+        thread.join(2)
+    assert order == ["first", "second", "batch"]
+
+
+def test_queue_timeout_raises():
+    backend = BackendScheduler("x", initial=1)
+    held = backend.acquire()
+    with pytest.raises(SchedulerTimeout):
+        backend.acquire(timeout=0.05)
+    assert backend.stats()["timeouts"] == 1
+    assert queued(backend) == 0
+    backend.release(held)
+
+
+def test_cancelled_slot_releases_without_moving_the_limit():
+    scheduler = Scheduler(limits={"x": {"initial": 4}})
+    with scheduler.slot("x") as slot:
+        slot.cancel()
+    backend = scheduler.backend("x")
+    assert backend.limit == 4
+    assert backend.in_flight == 0
+
+
+def test_closed_before_a_token_is_neutral():
+    scheduler = Scheduler(limits={"x": {"initial": 4}})
+    with pytest.raises(KeyboardInterrupt):
+        with scheduler.slot("x"):
+            raise KeyboardInterrupt
+    assert scheduler.backend("x").limit == 4
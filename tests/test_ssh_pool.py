@@ -0,0 +1,163 @@
+import os
+import socket
+import threading
+import types
+
+import pytest
+
+import route
+import ssh_pool
+
+
+class FakeClient:
+    # Stands in for paramiko.SSHClient; the target host refuses connections
+    clients = []
+
+    def __init__(self):
+        self.closed = False
+        FakeClient.clients.append(self)
+
+    def set_missing_host_key_policy(self, policy):
+        pass
+
+    def connect(self, host, **kwargs):
+        if host == "target":
+            raise OSError("connection refused")
+
+    def get_transport(self):
+        return types.SimpleNamespace(open_channel=lambda *args: object())
+
+    def close(self):
+        self.closed = True
+
+
+def test_failed_target_connect_closes_the_jump_client(monkeypatch):
+    fake = types.SimpleNamespace(SSHClient=FakeClient, AutoAddPolicy=lambda: None)
+    monkeypatch.setattr(ssh_pool, "_paramiko", lambda: fake)
+    FakeClient.clients = []
+    tunnel = ssh_pool.SSHTunnel("target", 22, "user", None, jump_host="jump", jump_user="user")
+    with pytest.raises(OSError):
+        tunnel.connect()
+    jump, target = FakeClient.clients
+    assert jump.closed and target.closed
+    assert tunnel.jump_client is None and tunnel.client is None
+
+
+class FakeChannel:
+    """
+    A session channel with paramiko's flow control: the remote side blocks
+    while a window's worth of stdout and stderr is unread, and fileno() is
+    readable whenever either stream has data or EOF has arrived.
+    """
+
+    def __init__(self, window, stdout=b"", stderr=b"", status=0):
+        self.window = window
+        self.out, self.err = bytearray(), bytearray()
+        self.eof_received = False
+        self.timeout = None
+        self.status = status
+        self._script = (stdout, stderr)
+        self._cond = threading.Condition()
+        self._read_fd, self._write_fd = os.pipe()
+        self._signalled = False
+
+    def exec_command(self, command):
+        self.command = command
+        threading.Thread(target=self._remote, daemon=True).start()
+
+    def _remote(self):
+        # Like ollama, the diagnostics go out before the answer
+        stdout, stderr = self._script
+        for buffer, data in ((self.err, stderr), (self.out, stdout)):
+            for start in range(0, len(data), 1024):
+                piece = data[start:start + 1024]
+                with self._cond:
+                    self._cond.wait_for(lambda: len(self.out) + len(self.err) + len(piece) <= self.window)
+                    buffer += piece
+                    self._signal()
+        with self._cond:
+            self.eof_received = True
+            self._signal()
+
+    def _signal(self):
+        ready = bool(self.out or self.err or self.eof_received)
+        if ready != self._signalled:
+            os.write(self._write_fd, b"x") if ready else os.read(self._read_fd, 1)
+            self._signalled = ready
+        self._cond.notify_all()
+
+    def fileno(self):
+        return self._read_fd
+
+    def settimeout(self, timeout):
+        self.timeout = timeout
+
+    def recv_ready(self):
+        return bool(self.out)
+
+    def recv_stderr_ready(self):
+        return bool(self.err)
+
+    def _read(self, buffer, n):
+        with self._cond:
+            if not self._cond.wait_for(lambda: buffer or self.eof_received, self.timeout):
+                raise socket.timeout()
+            data = bytes(buffer[:n])
+            del buffer[:n]
+            self._signal()
+            return data
+
+    def recv(self, n):
+        return self._read(self.out, n)
+
+    def recv_stderr(self, n):
+        return self._read(self.err, n)
+
+    def recv_exit_status(self):
+        with self._cond:
+            self._cond.wait_for(lambda: self.eof_received)
+        return self.status
+
+    def close(self):
+        os.close(self._read_fd)
+        os.close(self._write_fd)
+
+
+def consume(generator, timeout=5):
+    # A regression here deadlocks, fail the test instead of hanging the suite
+    frames, outcome = [], {}
+
+    def run():
+        try:
+            outcome["value"] = yield from generator
+        except Exception as e:
+            outcome["error"] = e
+
+    thread = threading.Thread(target=lambda: frames.extend(run()), daemon=True)
+    thread.start()
+    thread.join(timeout)
+    assert not thread.is_alive(), "stream deadlocked"
+    return frames, outcome
+
+
+def test_stderr_larger_than_the_window_does_not_block_stdout():
+    answer = "caf\u00e9 " * 200
+    stderr = bytes(range(256)) * 400  # 100 KiB against a 16 KiB window
+    channel = FakeChannel(16 * 1024, stdout=answer.encode(), stderr=stderr)
+    channel.exec_command("ollama run")
+    frames, outcome = consume(ssh_pool.stream_channel(channel, read_size=7))
+    # The 7-byte reads split the two-byte characters, which still come out whole
+    assert "".join(frames) == answer
+    assert outcome["value"] == stderr[-ssh_pool.STREAM_STDERR_LIMIT:]
+
+
+def test_failed_command_raises_with_its_stderr(monkeypatch):
+    channel = FakeChannel(ssh_pool.STREAM_WINDOW, stderr=b"x" * 100_000 + b"\nError: model not found\n", status=1)
+    monkeypatch.setattr(route, "get_pool", lambda: types.SimpleNamespace(open_session=lambda host, window_size: channel))
+    frames, outcome = consume(route.ssh_ml_query("hello", "llama"))
+    assert frames == []
+    assert isinstance(outcome["error"], RuntimeError)
+    message = str(outcome["error"])
+    # The tail of stderr, where the reason is
+    assert message.endswith("\nError: model not found")
+    assert len(message) < ssh_pool.STREAM_STDERR_LIMIT + 100
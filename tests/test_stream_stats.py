@@ -0,0 +1,78 @@
+import numpy as np
+import pytest
+
+from toolkitutils import stream_stats
+from toolkitutils.stream_stats import StreamingStats
+
+
+def sample_data(n=10_000, seed=3):
+    rng = np.random.default_rng(seed)
+    # Integers with a single most common value, offset far from zero so a
+    # naive sum-of-squares variance would lose precision
+    data = rng.integers(0, 500, n) + 10 ** 9
+    data[:50] = 10 ** 9 + 123
+    rng.shuffle(data)
+    return data
+
+
+def assert_matches_numpy(stats, data):
+    values, frequencies = np.unique(data, return_counts=True)
+    assert stats.count == data.size
+    assert stats.mean == pytest.approx(np.mean(data), rel=1e-12)
+    assert stats.variance == pytest.approx(np.var(data), rel=1e-9)
+    assert stats.standard_deviation == pytest.approx(np.std(data), rel=1e-9)
+    assert stats.min == data.min()
+    assert stats.max == data.max()
+    assert stats.range == np.ptp(data)
+    assert stats.mode == values[frequencies.argmax()]
+
+
+def test_array_input():
+    data = sample_data()
+    assert_matches_numpy(StreamingStats().update(data), data)
+
+
+def test_chunked_input(monkeypatch):
+    monkeypatch.setattr(stream_stats, "CHUNK_SIZE", 1000)
+    data = sample_data()
+    # Uneven chunks of every kind, including an empty one
+    chunks = [data[:1], list(data[1:2500]), tuple(data[2500:2500]), data[2500:7777], iter(data[7777:].tolist())]
+    assert_matches_numpy(StreamingStats().update_chunks(chunks), data)
+
+
+def test_iterator_input(monkeypatch):
+    monkeypatch.setattr(stream_stats, "CHUNK_SIZE", 333)
+    data = sample_data()
+    assert_matches_numpy(StreamingStats().update(x for x in data.tolist()), data)
+
+
+def test_float_input():
+    data = np.random.default_rng(4).normal(-3.0, 2.5, 50_000)
+    stats = StreamingStats(track_mode=False).update(data)
+    assert stats.mean == pytest.approx(np.mean(data), rel=1e-12)
+    assert stats.variance == pytest.approx(np.var(data), rel=1e-9)
+    assert (stats.min, stats.max) == (data.min(), data.max())
+
+
+def test_median_is_exact_while_the_sample_holds_everything():
+    data = sample_data(n=1001)
+    assert StreamingStats(sample_size=2048).update(iter(data.tolist())).median == np.median(data)
+    even = data[:1000]
+    assert stream_stats.median(even) == np.median(even)
+
+
+def test_module_functions_match_numpy():
+    data = sample_data()
+    values, frequencies = np.unique(data, return_counts=True)
+    assert stream_stats.mean(data.tolist()) == pytest.approx(np.mean(data), rel=1e-12)
+    assert stream_stats.mean(data) == pytest.approx(np.mean(data), rel=1e-12)
+    assert stream_stats.mode(data) == stream_stats.mode(data.tolist()) == values[frequencies.argmax()]
+
+
+def test_empty_and_untracked():
+    with pytest.raises(ValueError, match="No data"):
+        StreamingStats().mean
+    with pytest.raises(ValueError, match="Mode is not tracked"):
+        StreamingStats(track_mode=False).update([1, 2]).mode
+    with pytest.raises(ValueError, match="numeric"):
+        StreamingStats().update(["a", "b"])
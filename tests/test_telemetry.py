@@ -0,0 +1,64 @@
+import thalamus
+from telemetry import MIN_SAMPLES, Telemetry
+
+GPT, CLAUDE, GEMINI, MIXTRAL = "gpt-4", "claude-3-sonnet-20240229", "gemini-1.5-pro", "mistralai/Mixtral-8x7B-Instruct-v0.1"
+
+
+def warm(telemetry, model, ttft, errors=0, samples=MIN_SAMPLES):
+    for i in range(samples):
+        telemetry.record(model, ttft=ttft, tokens=10, duration=1.0, error=i < errors)
+
+
+def test_degraded_backend_is_dropped():
+    telemetry = Telemetry()
+    warm(telemetry, GEMINI, 0.5, errors=MIN_SAMPLES // 2)
+    warm(telemetry, GPT, 0.5)
+    assert telemetry.is_degraded(GEMINI)
+    assert telemetry.select([(GEMINI, 0.6), (GPT, 0.4)], 100)[0] == GPT
+
+
+def test_error_rate_at_the_threshold_is_not_degraded():
+    telemetry = Telemetry()
+    warm(telemetry, GEMINI, 0.5, errors=MIN_SAMPLES // 4)
+    assert not telemetry.is_degraded(GEMINI)
+
+
+def test_cheapest_acceptable_model_meeting_the_slo_wins():
+    telemetry = Telemetry()
+    for model in (GPT, CLAUDE, MIXTRAL):
+        warm(telemetry, model, 0.5)
+    # Mixtral is cheapest but below half the top probability, so it is not acceptable
+    ranked = [(GPT, 0.5), (CLAUDE, 0.3), (MIXTRAL, 0.2)]
+    assert telemetry.select(ranked, 100, slo_ttft=1.0)[0] == CLAUDE
+
+
+def test_slow_models_miss_the_slo():
+    telemetry = Telemetry()
+    warm(telemetry, GPT, 0.5)
+    warm(telemetry, CLAUDE, 3.0)
+    assert telemetry.select([(GPT, 0.5), (CLAUDE, 0.5)], 100, slo_ttft=1.0)[0] == GPT
+
+
+def test_fastest_model_when_none_meets_the_slo():
+    telemetry = Telemetry()
+    warm(telemetry, GPT, 2.0)
+    warm(telemetry, CLAUDE, 3.0)
+    assert telemetry.select([(CLAUDE, 0.5), (GPT, 0.5)], 100, slo_ttft=1.0)[0] == GPT
+
+
+def test_models_with_too_few_samples_are_explored():
+    telemetry = Telemetry()
+    warm(telemetry, GPT, 0.5)
+    warm(telemetry, CLAUDE, 3.0, samples=MIN_SAMPLES - 1)
+    # Claude's p95 is unknown, so it is assumed to meet the SLO and wins on cost
+    assert telemetry.select([(GPT, 0.5), (CLAUDE, 0.5)], 100, slo_ttft=1.0)[0] == CLAUDE
+
+
+def test_route_decision_avoids_a_degraded_favourite(monkeypatch):
+    telemetry = Telemetry()
+    warm(telemetry, GPT, 0.5, errors=MIN_SAMPLES)
+    monkeypatch.setattr(thalamus, "telemetry", telemetry)
+    monkeypatch.setattr(thalamus, "classify", lambda query: [(GPT, 0.9), (CLAUDE, 0.8)])
+    thalamus.invalidate_routing_cache()
+    assert thalamus.find_llm("a prompt for route_decision") == CLAUDE
+    thalamus.invalidate_routing_cache()
@@ -0,0 +1,71 @@
+import threading
+import time
+
+import warmup
+from warmup import DOWN, READY, UNKNOWN, Readiness
+
+
+def backend_of(model):
+    return model.split("/")[0]
+
+
+def test_unprobed_backends_are_unknown_and_routable():
+    readiness = Readiness()
+    assert readiness.status("openai") == UNKNOWN
+    assert not readiness.ready()
+    ranked = [("openai/gpt-4", 0.6), ("anthropic/claude", 0.4)]
+    assert readiness.available(ranked, backend_of) == ranked
+
+
+def test_down_backends_are_dropped():
+    readiness = Readiness()
+    readiness.mark("openai", DOWN, error="refused")
+    readiness.mark("anthropic", READY, latency=0.01)
+    assert readiness.ready()
+    ranked = [("openai/gpt-4", 0.6), ("anthropic/claude", 0.4)]
+    assert readiness.available(ranked, backend_of) == [("anthropic/claude", 0.4)]
+
+
+def test_ranked_is_kept_when_every_backend_is_down():
+    readiness = Readiness()
+    readiness.mark("openai", DOWN)
+    ranked = [("openai/gpt-4", 1.0)]
+    assert readiness.available(ranked, backend_of) == ranked
+
+
+def test_hung_probe_is_marked_down_and_not_stacked(monkeypatch):
+    release, calls = threading.Event(), []
+
+    def hanging(timeout):
+        calls.append(timeout)
+        release.wait(5)
+
+    monkeypatch.setitem(warmup.PROBES, "hung", hanging)
+    started = time.monotonic()
+    snapshot = warmup.probe_all(["hung"], timeout=0.05)
+    assert time.monotonic() - started < 1
+    assert snapshot["hung"]["status"] == DOWN
+    assert "Timed out" in snapshot["hung"]["error"]
+
+    # The next interval skips the backend while its probe is still running
+    warmup.probe_all(["hung"], timeout=0.05)
+    assert len(calls) == 1
+
+    # A late completion marks it ready, and it is probed again after that
+    release.set()
+    deadline = time.monotonic() + 2
+    while warmup.readiness.status("hung") != READY:
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+    warmup.probe_all(["hung"], timeout=1)
+    assert len(calls) == 2
+
+
+def test_failing_probe_is_marked_down(monkeypatch):
+    def failing(timeout):
+        raise ConnectionError("refused")
+
+    monkeypatch.setitem(warmup.PROBES, "failing", failing)
+    snapshot = warmup.probe_all(["failing"], timeout=1)
+    assert snapshot["failing"]["status"] == DOWN
+    assert "ConnectionError" in snapshot["failing"]["error"]
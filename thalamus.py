@@ -1,4 +1,12 @@
-import random
+import logging
+import os
+import sys
+
+import llm_router
+from router import Router
+from routing_cache import RoutingCache
+from telemetry import telemetry
+from warmup import readiness
 
 models =  [
     "gpt-4",
@@ -8,6 +16,95 @@ models =  [
     "meta-llama/Llama-2-70b-chat-hf",
 ]
 
-def find_llm(query):
-    return random.choice(models)
-    
\ No newline at end of file
+# Trained classifier, loaded once at import. See train_router.py.
+try:
+    router = Router.load()
+except (OSError, ValueError) as e:
+    logging.warning(f"Routing weights unavailable, falling back to random choice: {e}")
+    router = None
+
+# ROUTER_MODE=llm asks an LLM primed with canned/context.txt first, see llm_router.py
+ROUTER_MODE = os.environ.get("ROUTER_MODE", "classifier")
+if ROUTER_MODE == "llm":
+    llm_router.load_context()
+
+routing_cache = RoutingCache(
+    max_entries=int(os.environ.get("ROUTING_CACHE_SIZE", 10000)),
+    ttl=float(os.environ.get("ROUTING_CACHE_TTL", 3600)),
+    near_duplicates=os.environ.get("ROUTING_CACHE_NEAR_DUPLICATES", "0") == "1",
+)
+
+def models_version():
+    # Cached decisions are only valid for the model list they were made against
+    llmsetup = sys.modules.get("llmsetup")
+    configured = tuple(c["model"] for c in llmsetup.llm_config["config_list"]) if llmsetup else ()
+    return tuple(models), configured
+
+def invalidate_routing_cache():
+    routing_cache.invalidate()
+
+def classify(query):
+    """
+    Score every model for query without consulting the cache.
+
+    :param query: The raw user prompt
+    :return: (model, probability) pairs over models, best first
+    """
+    if router is None:
+        # Without weights every model is equally suitable, telemetry picks on cost
+        ranked = [(m, 1 / len(models)) for m in models]
+    else:
+        probabilities = dict(zip(router.labels, router.probabilities(query)))
+        ranked = sorted(((m, probabilities.get(m, 0.0)) for m in models), key=lambda mp: -mp[1])
+
+    if ROUTER_MODE == "llm":
+        try:
+            choice = llm_router.choose(query)
+        except Exception as e:
+            logging.warning(f"LLM router failed, using the classifier: {e}")
+            choice = None
+        if choice in models:
+            ranked = [(choice, 1.0)] + [(m, p) for m, p in ranked if m != choice]
+    return ranked
+
+def route_decision(query, slo_ttft=None):
+    """
+    Choose a model for query: the classifier ranks the models (cached by
+    normalized query), backends that failed their warm-up probe are dropped,
+    then live telemetry picks the cheapest suitable, healthy model that meets
+    the latency SLO.
+
+    :param slo_ttft: Required p95 time to first token in seconds, None for no SLO
+    :return: (model, confidence)
+    """
+    routing_cache.check_version(models_version())
+    key, ranked = routing_cache.get(query)
+    if ranked is None:
+        ranked = classify(query)
+        routing_cache.put(key, ranked)
+    # ~4 characters per prompt token
+    return telemetry.select(readiness.available(ranked), len(query) // 4, slo_ttft)
+
+def route_batch(queries, slo_ttft=None):
+    """
+    Route many prompts in one pass. Repeated prompts in the batch are scored
+    once, and routing state is checked once for the whole batch.
+
+    :return: (model, confidence) per query, in input order
+    """
+    routing_cache.check_version(models_version())
+    ranked_by_key = {}
+    decisions = []
+    for query in queries:
+        key, ranked = routing_cache.get(query)
+        if ranked is None:
+            ranked = ranked_by_key.get(key)
+            if ranked is None:
+                ranked = classify(query)
+                routing_cache.put(key, ranked)
+        ranked_by_key[key] = ranked
+        decisions.append(telemetry.select(readiness.available(ranked), len(query) // 4, slo_ttft))
+    return decisions
+
+def find_llm(query, slo_ttft=None):
+    return route_decision(query, slo_ttft)[0]
@@ -1,26 +1,22 @@
 from typing import Annotated, Literal, Dict, Any
-from toolkitutils.math_toolkit import calculator, unified_calculator, get_available_operations, MathToolkit
+from toolkitutils.math_toolkit import calculator, unified_calculator, get_available_operations, lookup, MathToolkit
 
 def math_toolkit_wrapper(operation: str, params: Dict[str, Any]) -> Any:
-
-    print(operation)
     """
     A strict wrapper function to access MathToolkit methods.
     
     :param operation: The specific operation to perform (must be in the format 'category.operation')
-    :param params: A dictionary containing the parameters for the operation
+    :param params: A dictionary containing the parameters for the operation, in positional order
     :return: The result of the mathematical operation
     """
-    if operation not in get_available_operations():
-        raise ValueError(f"Unknown operation: {operation}. Available operations are: {', '.join(get_available_operations)}")
-    
-    category, specific_operation = operation.split('.')
-    category_method = getattr(MathToolkit, category)
-    
-    # Convert params dictionary to a list of arguments
-    args = list(params.values())
-    
-    return category_method(specific_operation, *args)
+    category, _, specific_operation = operation.partition('.')
+    try:
+        op = lookup(category, specific_operation)
+    except ValueError:
+        raise ValueError(f"Unknown operation: {operation}. Available operations are: {', '.join(get_available_operations())}")
+
+    # Arity is checked against the registered signature
+    return op(*params.values())
     
 CATEGORY_ABBR = {
     "geometry": "g",
@@ -0,0 +1,147 @@
+from typing import Any, Dict, Sequence, Tuple, Union
+
+import numpy as np
+
+from toolkitutils.math_toolkit import lookup
+
+# Vectorized batch mode for MathToolkit. Each kernel evaluates one operation
+# over whole parameter columns in a single NumPy pass. Operations without a
+# kernel (exact integer results, most of number theory, statistics over data
+# lists) fall back to calling MathToolkit once per row, so every operation
+# accepts a batch. Inputs outside an operation's domain give NaN instead of
+# raising, so one bad row does not fail the whole batch.
+
+def _triangle_area_sides(a, b, c):
+    s = (a + b + c) / 2
+    return np.sqrt(s * (s - a) * (s - b) * (s - c))
+
+def _quadratic_roots(a, b, c):
+    # Two root columns, NaN where the scalar call returns fewer than two roots
+    discriminant = b ** 2 - 4 * a * c
+    root = np.sqrt(np.where(discriminant >= 0, discriminant, np.nan))
+    first = (-b + root) / (2 * a)
+    second = np.where(discriminant > 0, (-b - root) / (2 * a), np.nan)
+    return first, second
+
+def _geometric_series_sum(first, ratio, n):
+    unit = ratio == 1
+    safe_ratio = np.where(unit, 0.0, ratio)
+    return np.where(unit, first * n, first * (1 - safe_ratio ** n) / (1 - safe_ratio))
+
+def _infinite_geometric_series_sum(first, ratio):
+    return np.where(np.abs(ratio) < 1, first / (1 - ratio), np.nan)
+
+def _modular_exponentiation(bases, exponents, moduli):
+    bases, exponents, moduli = np.broadcast_arrays(np.asarray(bases), np.asarray(exponents), np.asarray(moduli))
+    fits = all(c.dtype.kind in "iu" for c in (bases, exponents, moduli))
+    if not (fits and moduli.size and moduli.min() >= 1 and moduli.max() < 1 << 32 and exponents.min() >= 0):
+        # Big integers, or negative exponents needing an inverse: exact per row
+        return np.array([pow(int(b), int(e), int(m)) for b, e, m in zip(bases.ravel(), exponents.ravel(), moduli.ravel())],
+                        dtype=object).reshape(moduli.shape)
+    # Square and multiply on every row at once. Moduli below 2^32 keep each
+    # product below 2^64, so uint64 never overflows.
+    moduli = moduli.astype(np.uint64)
+    if bases.dtype.kind == "u":
+        # Reduced as unsigned, casting bases of 2^63 and up to int64 would wrap them negative
+        bases = bases.astype(np.uint64) % moduli
+    else:
+        bases = np.mod(bases.astype(np.int64), moduli.astype(np.int64)).astype(np.uint64)
+    exponents = exponents.astype(np.uint64)
+    result = np.ones_like(moduli) % moduli
+    while exponents.any():
+        odd = (exponents & np.uint64(1)).astype(bool)
+        result = np.where(odd, result * bases % moduli, result)
+        bases = bases * bases % moduli
+        exponents >>= np.uint64(1)
+    return result
+
+# Exact integer kernels, given the columns as passed rather than as floats
+INTEGER_KERNELS = {
+    "number_theory": {
+        "modular_exponentiation": _modular_exponentiation,
+    },
+}
+
+KERNELS = {
+    "geometry": {
+        "triangle_area": lambda base, height: 0.5 * base * height,
+        "triangle_area_sides": _triangle_area_sides,
+        "triangle_area_trig": lambda a, b, angle: 0.5 * a * b * np.sin(angle),
+        "square_area": lambda side: side ** 2,
+        "rectangle_area": lambda length, width: length * width,
+        "trapezoid_area": lambda b1, b2, height: 0.5 * (b1 + b2) * height,
+        "regular_hexagon_area": lambda side: 3 * np.sqrt(3) * side ** 2 / 2,
+        "regular_polygon_area": lambda n, side: (n * side ** 2) / (4 * np.tan(np.pi / n)),
+        "circle_area": lambda radius: np.pi * radius ** 2,
+        "sphere_volume": lambda radius: (4 / 3) * np.pi * radius ** 3,
+        "sphere_surface_area": lambda radius: 4 * np.pi * radius ** 2,
+        "cone_volume": lambda radius, height: np.pi * radius ** 2 * height / 3,
+        "cone_surface_area": lambda radius, slant: np.pi * radius * (radius + slant),
+        "cylinder_volume": lambda radius, height: np.pi * radius ** 2 * height,
+        "cylinder_surface_area": lambda radius, height: 2 * np.pi * radius * (radius + height),
+        "pyramid_volume": lambda base_area, height: base_area * height / 3,
+        "pyramid_surface_area": lambda perimeter, slant, base_area: perimeter * slant / 2 + base_area,
+        "pythagorean": np.hypot,
+        "distance": lambda x1, y1, x2, y2: np.hypot(x2 - x1, y2 - y1),
+    },
+    "algebra": {
+        "quadratic_roots": _quadratic_roots,
+        "arithmetic_series_sum": lambda first, last, n: (n / 2) * (first + last),
+        "geometric_series_sum": _geometric_series_sum,
+        "infinite_geometric_series_sum": _infinite_geometric_series_sum,
+        "logarithm": lambda base, x: np.log(x) / np.log(base),
+        "exponent": np.power,
+        "vieta_quadratic": lambda a, b, c: (-b / a, c / a),
+    },
+    "trigonometry": {
+        "sin_cos_tan": lambda angle: (np.sin(angle), np.cos(angle), np.tan(angle)),
+        "law_of_sines": lambda a, A, B: a * np.sin(B) / np.sin(A),
+        "law_of_cosines": lambda a, b, C: np.sqrt(a ** 2 + b ** 2 - 2 * a * b * np.cos(C)),
+    },
+}
+
+Params = Union[Dict[str, Any], Sequence[Any], np.ndarray]
+
+def _columns(params: Params) -> list:
+    if isinstance(params, dict):
+        # Same convention as toolkit.math_toolkit_wrapper, values in positional order
+        return list(params.values())
+    if isinstance(params, np.ndarray) and params.ndim == 2:
+        return list(params.T)
+    return list(params)
+
+def _scalar_loop(op, columns: list) -> Union[np.ndarray, Tuple[np.ndarray, ...]]:
+    columns = [c.tolist() if isinstance(c, np.ndarray) else c for c in columns]
+    rows = max((len(c) for c in columns if isinstance(c, (list, tuple))), default=1)
+    columns = [c if isinstance(c, (list, tuple)) and len(c) == rows else [c] * rows for c in columns]
+    results = [op(*row) for row in zip(*columns)]
+    if results and isinstance(results[0], tuple):
+        return tuple(np.array(values) for values in zip(*results))
+    return np.array(results)
+
+def batch(category: str, operation: str, params: Params) -> Union[np.ndarray, Tuple[np.ndarray, ...]]:
+    """
+    Evaluate one MathToolkit operation over many parameter tuples at once.
+
+    :param category: The MathToolkit category, e.g. "geometry"
+    :param operation: The operation within the category, e.g. "circle_area"
+    :param params: Parameter columns in positional order: a columnar dict of
+                   name -> array, a sequence of arrays, or a 2-D array with
+                   one row per call. Scalars broadcast against the columns.
+    :return: An array with one result per row, or a tuple of arrays for
+             operations that return several values
+    """
+    op = lookup(category, operation)
+    columns = _columns(params)
+    if len(columns) != op.arity:
+        raise ValueError(f"{category}.{op.name} takes {op.arity} column(s) ({', '.join(op.params)}), got {len(columns)}")
+    # Kernels are keyed by canonical name, aliases resolve through the registry
+    kernel = INTEGER_KERNELS.get(category, {}).get(op.name)
+    if kernel is not None:
+        return kernel(*columns)
+    kernel = KERNELS.get(category, {}).get(op.name)
+    if kernel is None:
+        return _scalar_loop(op, columns)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return kernel(*(np.asarray(c, dtype=float) for c in columns))
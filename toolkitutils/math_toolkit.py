@@ -1,5 +1,8 @@
+import inspect
 import math
-from typing import List, Union, Tuple, Dict, Any, Annotated, Literal, Set
+from typing import List, Union, Tuple, Dict, Any, Annotated, Literal, Callable
+
+from toolkitutils import number_theory, stream_stats
 
 Operator = Literal["+", "-", "*", "/"]
 
@@ -15,300 +18,373 @@ def calculator(a: int, b: int, operator: Annotated[Operator, "operator"]) -> int
     else:
         raise ValueError("Invalid operator")
 
+CATEGORIES = ["geometry", "algebra", "number_theory", "trigonometry", "statistics", "probability"]
+
+
+class Operation:
+    """
+    One registered MathToolkit operation. The signature is read once at
+    registration, so calls only pay for an arity check.
+    """
+    __slots__ = ("category", "name", "func", "params", "arity", "note")
+
+    def __init__(self, category: str, name: str, func: Callable, note: str = ""):
+        self.category = category
+        self.name = name
+        self.func = func
+        self.params = tuple(inspect.signature(func).parameters)
+        self.arity = len(self.params)
+        self.note = note
+
+    def __call__(self, *args):
+        if len(args) != self.arity:
+            raise ValueError(f"{self.category}.{self.name} takes {self.arity} argument(s) ({', '.join(self.params)}), got {len(args)}")
+        return self.func(*args)
+
+    def describe(self) -> str:
+        return f"{self.name}: {', '.join(self.params)}" + (f" ({self.note})" if self.note else "")
+
+
+# "category.operation" -> Operation, canonical names only, in registration order
+OPERATIONS: Dict[str, Operation] = {}
+# Canonical names plus the older short names still accepted for compatibility
+_DISPATCH: Dict[str, Operation] = {}
+
+def operation(category: str, name: str, *aliases: str, note: str = ""):
+    """
+    Register the decorated function as category.name, also reachable as
+    category.<alias> for every alias.
+    """
+    def register(func):
+        op = Operation(category, name, func, note)
+        OPERATIONS[f"{category}.{name}"] = op
+        for key in (name,) + aliases:
+            _DISPATCH[f"{category}.{key}"] = op
+        return func
+    return register
+
+def lookup(category: str, name: str) -> Operation:
+    """
+    :return: The Operation registered as category.name or one of its aliases
+    """
+    op = _DISPATCH.get(f"{category}.{name}")
+    if op is None:
+        raise ValueError(f"Invalid {category} operation: {name}")
+    return op
+
+
+# Geometry
+
+@operation("geometry", "triangle_area")
+def triangle_area(base, height):
+    return 0.5 * base * height
+
+@operation("geometry", "triangle_area_sides", note="Heron's formula")
+def triangle_area_sides(a, b, c):
+    s = (a + b + c) / 2
+    return math.sqrt(s * (s - a) * (s - b) * (s - c))
+
+@operation("geometry", "triangle_area_trig", note="angle in radians")
+def triangle_area_trig(a, b, angle):
+    return 0.5 * a * b * math.sin(angle)
+
+@operation("geometry", "square_area")
+def square_area(side):
+    return side ** 2
+
+@operation("geometry", "rectangle_area")
+def rectangle_area(length, width):
+    return length * width
+
+@operation("geometry", "trapezoid_area")
+def trapezoid_area(b1, b2, height):
+    return 0.5 * (b1 + b2) * height
+
+@operation("geometry", "regular_hexagon_area", "reg_hexagon_area")
+def regular_hexagon_area(side):
+    return 3 * math.sqrt(3) * side ** 2 / 2
+
+@operation("geometry", "regular_polygon_area", "reg_polygon_area", note="n sides")
+def regular_polygon_area(n, side):
+    return (n * side ** 2) / (4 * math.tan(math.pi / n))
+
+@operation("geometry", "circle_area")
+def circle_area(radius):
+    return math.pi * radius ** 2
+
+@operation("geometry", "sphere_volume")
+def sphere_volume(radius):
+    return (4/3) * math.pi * radius ** 3
+
+@operation("geometry", "sphere_surface_area")
+def sphere_surface_area(radius):
+    return 4 * math.pi * radius ** 2
+
+@operation("geometry", "cone_volume")
+def cone_volume(radius, height):
+    return math.pi * radius ** 2 * height / 3
+
+@operation("geometry", "cone_surface_area")
+def cone_surface_area(radius, slant_height):
+    return math.pi * radius * (radius + slant_height)
+
+@operation("geometry", "cylinder_volume", "cyli_volume")
+def cylinder_volume(radius, height):
+    return math.pi * radius ** 2 * height
+
+@operation("geometry", "cylinder_surface_area")
+def cylinder_surface_area(radius, height):
+    return 2 * math.pi * radius * (radius + height)
+
+@operation("geometry", "pyramid_volume")
+def pyramid_volume(base_area, height):
+    return base_area * height / 3
+
+@operation("geometry", "pyramid_surface_area")
+def pyramid_surface_area(base_perimeter, slant_height, base_area):
+    return base_perimeter * slant_height / 2 + base_area
+
+@operation("geometry", "pythagorean", note="returns c")
+def pythagorean(a, b):
+    return math.sqrt(a ** 2 + b ** 2)
+
+@operation("geometry", "distance")
+def distance(x1, y1, x2, y2):
+    return math.sqrt((x2 - x1) ** 2 + (y2 - y1) ** 2)
+
+
+# Algebra
+
+@operation("algebra", "quadratic_roots", "quad_roots", note="ax^2 + bx + c = 0")
+def quadratic_roots(a, b, c):
+    discriminant = b ** 2 - 4 * a * c
+    if discriminant > 0:
+        return (-b + math.sqrt(discriminant)) / (2 * a), (-b - math.sqrt(discriminant)) / (2 * a)
+    elif discriminant == 0:
+        return -b / (2 * a),
+    else:
+        return []
+
+@operation("algebra", "arithmetic_series_sum", "add_series_sum")
+def arithmetic_series_sum(first_term, last_term, num_terms):
+    return (num_terms / 2) * (first_term + last_term)
+
+@operation("algebra", "geometric_series_sum", "geo_series_sum")
+def geometric_series_sum(first_term, ratio, num_terms):
+    if ratio == 1:
+        return first_term * num_terms
+    return first_term * (1 - ratio ** num_terms) / (1 - ratio)
+
+@operation("algebra", "infinite_geometric_series_sum", "inf_geo_series_sum", note="|ratio| < 1")
+def infinite_geometric_series_sum(first_term, ratio):
+    if abs(ratio) >= 1:
+        raise ValueError("Ratio must be less than 1 for infinite series")
+    return first_term / (1 - ratio)
+
+@operation("algebra", "logarithm", "log")
+def logarithm(base, argument):
+    return math.log(argument, base)
+
+@operation("algebra", "exponent")
+def exponent(base, power):
+    return base ** power
+
+@operation("algebra", "factorial")
+def factorial(n):
+    return math.factorial(n)
+
+@operation("algebra", "permutation")
+def permutation(n, r):
+    return math.factorial(n) // math.factorial(n - r)
+
+@operation("algebra", "combination")
+def combination(n, r):
+    return math.factorial(n) // (math.factorial(r) * math.factorial(n - r))
+
+@operation("algebra", "binomial_theorem", note="expands (a + b)^n")
+def binomial_theorem(a, b, n):
+    return sum(combination(n, k) * (a ** (n-k)) * (b ** k) for k in range(n+1))
+
+@operation("algebra", "vieta_quadratic", note="returns sum and product of roots")
+def vieta_quadratic(a, b, c):
+    return -b/a, c/a
+
+
+# Number theory
+
+@operation("number_theory", "is_prime")
+def is_prime(n):
+    return number_theory.is_prime(n)
+
+@operation("number_theory", "prime_factors")
+def prime_factors(n):
+    return number_theory.prime_factors(n)
+
+# Widest range primes_in_range sieves, the result list grows with it
+MAX_PRIME_RANGE = 10 ** 6
+# Highest bound, so the base primes up to sqrt(high) come from the cached sieve
+MAX_PRIME_BOUND = number_theory.SIEVE_LIMIT ** 2
+
+@operation("number_theory", "primes_in_range", note="primes p with low <= p < high")
+def primes_in_range(low, high):
+    if high - low > MAX_PRIME_RANGE:
+        raise ValueError(f"Range is limited to {MAX_PRIME_RANGE} integers, got {high - low}")
+    if high > MAX_PRIME_BOUND:
+        raise ValueError(f"Upper bound is limited to {MAX_PRIME_BOUND}, got {high}")
+    return number_theory.sieve.primes(low, high)
+
+@operation("number_theory", "gcd")
+def gcd(a, b):
+    while b:
+        a, b = b, a % b
+    return a
+
+@operation("number_theory", "lcm")
+def lcm(a, b):
+    return abs(a * b) // gcd(a, b)
+
+@operation("number_theory", "euler_totient")
+def euler_totient(n):
+    return number_theory.euler_totient(n)
+
+@operation("number_theory", "modular_exponentiation", "mod_exponentiation")
+def modular_exponentiation(base, exponent, modulus):
+    # A negative exponent raises the modular inverse to its absolute value
+    return pow(base, exponent, modulus)
+
+@operation("number_theory", "modular_inverse", "mod_inverse")
+def modular_inverse(a, modulus):
+    return number_theory.mod_inverse(a, modulus)
+
+@operation("number_theory", "chinese_remainder_theorem", note="moduli need not be coprime")
+def chinese_remainder_theorem(remainders, moduli):
+    return number_theory.crt(remainders, moduli)[0]
+
+
+# Trigonometry
+
+@operation("trigonometry", "sin_cos_tan", note="angle in radians")
+def sin_cos_tan(angle):
+    return math.sin(angle), math.cos(angle), math.tan(angle)
+
+@operation("trigonometry", "law_of_sines", note="side a, angle A, angle B in radians")
+def law_of_sines(a, A, B):
+    return a * math.sin(B) / math.sin(A)
+
+@operation("trigonometry", "law_of_cosines", "law_of_cos", note="sides a, b, angle C in radians")
+def law_of_cosines(a, b, C):
+    return math.sqrt(a**2 + b**2 - 2*a*b*math.cos(C))
+
+
+# Statistics
+
+@operation("statistics", "mean")
+def mean(data):
+    return stream_stats.mean(data)
+
+@operation("statistics", "median")
+def median(data):
+    return stream_stats.median(data)
+
+@operation("statistics", "mode")
+def mode(data):
+    return stream_stats.mode(data)
+
+@operation("statistics", "range")
+def data_range(data):
+    return stream_stats.summarize(data, track_mode=False, sample_size=0).range
+
+@operation("statistics", "variance", note="population variance")
+def variance(data):
+    return stream_stats.summarize(data, track_mode=False, sample_size=0).variance
+
+@operation("statistics", "standard_deviation")
+def standard_deviation(data):
+    return stream_stats.summarize(data, track_mode=False, sample_size=0).standard_deviation
+
+
+# Probability
+
+@operation("probability", "binomial_probability", note="n trials, k successes, probability p")
+def binomial_probability(n, k, p):
+    return combination(n, k) * (p ** k) * ((1 - p) ** (n - k))
+
+@operation("probability", "expected_value")
+def expected_value(values, probabilities):
+    return sum(v * p for v, p in zip(values, probabilities))
+
+
+def describe(category: str) -> str:
+    """
+    Generate the operation listing for a category from the registry.
+    """
+    lines = [f"- {op.describe()}" for op in OPERATIONS.values() if op.category == category]
+    return "Operations:\n" + "\n".join(lines)
+
+
 class MathToolkit:
+    # Each category dispatches through the registry in one dict lookup. The
+    # docstrings are generated from the registry below, so they cannot drift
+    # from the code.
+
     @staticmethod
     def geometry(operation: str, *args) -> Union[float, Tuple[float, float, float]]:
-        """
-        Perform various geometry calculations.
-        
-        Operations:
-        - triangle_area: base, height
-        - triangle_area_sides: a, b, c (Heron's formula)
-        - triangle_area_trig: a, b, angle (in radians)
-        - square_area: side
-        - rectangle_area: length, width
-        - trapezoid_area: b1, b2, height
-        - regular_hexagon_area: side
-        - regular_polygon_area: n (number of sides), side
-        - circle_area: radius
-        - sphere_volume: radius
-        - sphere_surface_area: radius
-        - cone_volume: radius, height
-        - cone_surface_area: radius, slant_height
-        - cylinder_volume: radius, height
-        - cylinder_surface_area: radius, height
-        - pyramid_volume: base_area, height
-        - pyramid_surface_area: base_perimeter, slant_height, base_area
-        - pythagorean: a, b (returns c)
-        - distance: x1, y1, x2, y2
-        - quadratic_roots: a, b, c (for ax^2 + bx + c = 0)
-        - arithmetic_series_sum: first_term, last_term, num_terms
-        - geometric_series_sum: first_term, ratio, num_terms
-        - infinite_geometric_series_sum: first_term, ratio (|ratio| < 1)
-        - logarithm: base, argument
-        - exponent: base, power
-        - factorial: n
-        - permutation: n, r
-        - combination: n, r
-        - binomial_theorem: a, b, n
-        - vieta_quadratic: a, b, c (returns sum and product of roots)
-        """
-        if operation == "triangle_area":
-            return 0.5 * args[0] * args[1]
-        elif operation == "triangle_area_sides":
-            s = sum(args) / 2
-            return math.sqrt(s * (s - args[0]) * (s - args[1]) * (s - args[2]))
-        elif operation == "triangle_area_trig":
-            return 0.5 * args[0] * args[1] * math.sin(args[2])
-        elif operation == "square_area":
-            return args[0] ** 2
-        elif operation == "rectangle_area":
-            return args[0] * args[1]
-        elif operation == "trapezoid_area":
-            return 0.5 * (args[0] + args[1]) * args[2]
-        elif operation == "reg_hexagon_area":
-            return 3 * math.sqrt(3) * args[0] ** 2 / 2
-        elif operation == "reg_polygon_area":
-            n, s = args
-            return (n * s ** 2) / (4 * math.tan(math.pi / n))
-        elif operation == "circle_area":
-            return math.pi * args[0] ** 2
-        elif operation == "sphere_volume":
-            return (4/3) * math.pi * args[0] ** 3
-        elif operation == "sphere_surface_area":
-            return 4 * math.pi * args[0] ** 2
-        elif operation == "cone_volume":
-            return math.pi * args[0] ** 2 * args[1] / 3
-        elif operation == "cone_surface_area":
-            return math.pi * args[0] * (args[0] + args[1])
-        elif operation == "cyli_volume":
-            return math.pi * args[0] ** 2 * args[1]
-        elif operation == "cylinder_surface_area":
-            return 2 * math.pi * args[0] * (args[0] + args[1])
-        elif operation == "pyramid_volume":
-            return args[0] * args[1] / 3
-        elif operation == "pyramid_surface_area":
-            return args[0] * args[1] / 2 + args[2]
-        elif operation == "pythagorean":
-            return math.sqrt(args[0] ** 2 + args[1] ** 2)
-        elif operation == "distance":
-            return math.sqrt((args[2] - args[0]) ** 2 + (args[3] - args[1]) ** 2)
-        
+        return lookup("geometry", operation)(*args)
 
     @staticmethod
     def algebra(operation: str, *args) -> Union[float, Tuple[float, float], List[float]]:
-        """
-        Perform various algebraic calculations.
-        
-        Operations:
-        - 
-        """
-        if operation == "quad_roots":
-            a, b, c = args
-            discriminant = b ** 2 - 4 * a * c
-            if discriminant > 0:
-                return (-b + math.sqrt(discriminant)) / (2 * a), (-b - math.sqrt(discriminant)) / (2 * a)
-            elif discriminant == 0:
-                return -b / (2 * a),
-            else:
-                return []
-        elif operation == "add_series_sum":
-            return (args[2] / 2) * (args[0] + args[1])
-        elif operation == "geo_series_sum":
-            if args[1] == 1:
-                return args[0] * args[2]
-            return args[0] * (1 - args[1] ** args[2]) / (1 - args[1])
-        elif operation == "inf_geo_series_sum":
-            if abs(args[1]) >= 1:
-                raise ValueError("Ratio must be less than 1 for infinite series")
-            return args[0] / (1 - args[1])
-        elif operation == "log":
-            return math.log(args[1], args[0])
-        elif operation == "exponent":
-            return args[0] ** args[1]
-        elif operation == "factorial":
-            return math.factorial(args[0])
-        elif operation == "permutation":
-            return math.factorial(args[0]) // math.factorial(args[0] - args[1])
-        elif operation == "combination":
-            return math.factorial(args[0]) // (math.factorial(args[1]) * math.factorial(args[0] - args[1]))
-        elif operation == "binomial_theorem":
-            a, b, n = args
-            return sum(MathToolkit.algebra("combination", n, k)[0] * (a ** (n-k)) * (b ** k) for k in range(n+1))
-        elif operation == "vieta_quadratic":
-            a, b, c = args
-            return -b/a, c/a  # sum of roots, product of roots
-        else:
-            raise ValueError("Invalid algebra operation")
+        return lookup("algebra", operation)(*args)
 
     @staticmethod
     def number_theory(operation: str, *args) -> Union[int, bool, List[int]]:
-        """
-        Perform various number theory calculations.
-        
-        Operations:
-        - is_prime: n
-        - prime_factors: n
-        - gcd: a, b
-        - lcm: a, b
-        - euler_totient: n
-        - modular_exponentiation: base, exponent, modulus
-        - chinese_remainder_theorem: remainders, moduli
-        """
-        if operation == "is_prime":
-            n = args[0]
-            if n < 2:
-                return False
-            for i in range(2, int(math.sqrt(n)) + 1):
-                if n % i == 0:
-                    return False
-            return True
-        elif operation == "prime_factors":
-            n = args[0]
-            factors = []
-            d = 2
-            while n > 1:
-                while n % d == 0:
-                    factors.append(d)
-                    n //= d
-                d += 1
-                if d * d > n:
-                    if n > 1:
-                        factors.append(n)
-                    break
-            return factors
-        elif operation == "gcd":
-            a, b = args
-            while b:
-                a, b = b, a % b
-            return a
-        elif operation == "lcm":
-            a, b = args
-            return abs(a * b) // MathToolkit.number_theory("gcd", a, b)
-        elif operation == "euler_totient":
-            n = args[0]
-            result = n
-            for i in range(2, int(math.sqrt(n)) + 1):
-                if n % i == 0:
-                    while n % i == 0:
-                        n //= i
-                    result *= (1 - 1/i)
-            if n > 1:
-                result *= (1 - 1/n)
-            return int(result)
-        elif operation == "mod_exponentiation":
-            base, exponent, modulus = args
-            result = 1
-            base = base % modulus
-            while exponent > 0:
-                if exponent % 2 == 1:
-                    result = (result * base) % modulus
-                exponent = exponent >> 1
-                base = (base * base) % modulus
-            return result
-        elif operation == "chinese_remainder_theorem":
-            remainders, moduli = args
-            total = 0
-            product = math.prod(moduli)
-            for remainder, modulus in zip(remainders, moduli):
-                p = product // modulus
-                total += remainder * MathToolkit.number_theory("modular_exponentiation", p, MathToolkit.number_theory("euler_totient", modulus) - 1, modulus) * p
-            return total % product
-        else:
-            raise ValueError("Invalid number theory operation")
+        return lookup("number_theory", operation)(*args)
 
     @staticmethod
     def trigonometry(operation: str, *args) -> Union[float, Tuple[float, float, float]]:
-        """
-        Perform various trigonometric calculations.
-        
-        Operations:
-        - sin_cos_tan: angle (in radians)
-        - law_of_sines: a, A, B (side a, angle A, angle B in radians)
-        - law_of_cosines: a, b, C (sides a, b, angle C in radians)
-        """
-        if operation == "sin_cos_tan":
-            angle = args[0]
-            return math.sin(angle), math.cos(angle), math.tan(angle)
-        elif operation == "law_of_sines":
-            a, A, B = args
-            return a * math.sin(B) / math.sin(A)
-        elif operation == "law_of_cos":
-            a, b, C = args
-            return math.sqrt(a**2 + b**2 - 2*a*b*math.cos(C))
-        else:
-            raise ValueError("Invalid trigonometry operation")
+        return lookup("trigonometry", operation)(*args)
 
     @staticmethod
     def statistics(operation: str, data: List[float]) -> float:
-        """
-        Perform various statistical calculations.
-        
-        Operations:
-        - mean
-        - median
-        - mode
-        - range
-        - variance
-        - standard_deviation
-        """
-        if operation == "mean":
-            return sum(data) / len(data)
-        elif operation == "median":
-            sorted_data = sorted(data)
-            n = len(sorted_data)
-            if n % 2 == 0:
-                return (sorted_data[n//2 - 1] + sorted_data[n//2]) / 2
-            else:
-                return sorted_data[n//2]
-        elif operation == "mode":
-            return max(set(data), key=data.count)
-        elif operation == "range":
-            return max(data) - min(data)
-        elif operation == "variance":
-            mean = MathToolkit.statistics("mean", data)
-            return sum((x - mean) ** 2 for x in data) / len(data)
-        elif operation == "standard_deviation":
-            return math.sqrt(MathToolkit.statistics("variance", data))
-        else:
-            raise ValueError("Invalid statistics operation")
+        return lookup("statistics", operation)(data)
 
     @staticmethod
     def probability(operation: str, *args) -> Union[float, int]:
-        """
-        Perform various probability calculations.
-        
-        Operations:
-        - binomial_probability: n, k, p (n trials, k successes, probability p)
-        - expected_value: values, probabilities
-        """
-        if operation == "binomial_probability":
-            n, k, p = args
-            return MathToolkit.algebra("combination", n, k) * (p ** k) * ((1 - p) ** (n - k))
-        elif operation == "expected_value":
-            values, probabilities = args
-            return sum(v * p for v, p in zip(values, probabilities))
-        else:
-            raise ValueError("Invalid probability operation")
+        return lookup("probability", operation)(*args)
+
+_SUMMARIES = {
+    "geometry": "Perform various geometry calculations.",
+    "algebra": "Perform various algebraic calculations.",
+    "number_theory": "Perform various number theory calculations.",
+    "trigonometry": "Perform various trigonometric calculations.",
+    "statistics": "Perform various statistical calculations.",
+    "probability": "Perform various probability calculations.",
+}
+for _category in CATEGORIES:
+    getattr(MathToolkit, _category).__doc__ = f"{_SUMMARIES[_category]}\n\n{describe(_category)}"
+
 
+def _call_padded(category: str, operation: str, params: tuple) -> Any:
+    # The fixed-width calculators pass unused trailing parameters as 0
+    op = lookup(category, operation)
+    return op(*params[:op.arity])
 
 def geometry_calculator(operation: str, param1: float, param2: float, param3: float = 0) -> float:
-    return MathToolkit.geometry(operation, param1, param2, param3)
+    return _call_padded("geometry", operation, (param1, param2, param3))
 
 def algebra_calculator(operation: str, param1: float, param2: float, param3: float = 0) -> Union[float, Tuple[float, float]]:
-    return MathToolkit.algebra(operation, param1, param2, param3)
+    return _call_padded("algebra", operation, (param1, param2, param3))
 
-def number_theory_calculator(operation: str, param1: int, param2: int = 0) -> Union[int, bool, List[int]]:
-    return MathToolkit.number_theory(operation, param1, param2)
+def number_theory_calculator(operation: str, param1: int, param2: int = 0, param3: int = 0) -> Union[int, bool, List[int]]:
+    return _call_padded("number_theory", operation, (param1, param2, param3))
 
 def trigonometry_calculator(operation: str, param1: float, param2: float = 0, param3: float = 0) -> Union[float, Tuple[float, float, float]]:
-    return MathToolkit.trigonometry(operation, param1, param2, param3)
+    return _call_padded("trigonometry", operation, (param1, param2, param3))
 
 def statistics_calculator(operation: str, data: List[float]) -> float:
     return MathToolkit.statistics(operation, data)
 
 def probability_calculator(operation: str, param1: float, param2: float, param3: float = 0) -> float:
-    return MathToolkit.probability(operation, param1, param2, param3)
+    return _call_padded("probability", operation, (param1, param2, param3))
 
 def unified_calculator(category: str, operation: str, params: Dict[str, Any]) -> Any:
     if category == "geometry":
@@ -316,7 +392,7 @@ def unified_calculator(category: str, operation: str, params: Dict[str, Any]) ->
     elif category == "algebra":
         return algebra_calculator(operation, params.get('param1', 0), params.get('param2', 0), params.get('param3', 0))
     elif category == "number_theory":
-        return number_theory_calculator(operation, params.get('param1', 0), params.get('param2', 0))
+        return number_theory_calculator(operation, params.get('param1', 0), params.get('param2', 0), params.get('param3', 0))
     elif category == "trigonometry":
         return trigonometry_calculator(operation, params.get('param1', 0), params.get('param2', 0), params.get('param3', 0))
     elif category == "statistics":
@@ -325,16 +401,12 @@ def unified_calculator(category: str, operation: str, params: Dict[str, Any]) ->
         return probability_calculator(operation, params.get('param1', 0), params.get('param2', 0), params.get('param3', 0))
     else:
         raise ValueError(f"Unknown category: {category}")
-# Example usage
 
 def get_available_operations():
     """
-    Generate a list of all available operations in MathToolkit.
+    List every MathToolkit operation as "category.operation", canonical names only.
     """
-    operations = []
-    for category in ['geometry', 'algebra', 'number_theory', 'trigonometry', 'statistics', 'probability']:
-        method = getattr(MathToolkit, category)
-        operations.extend([f"{category}.{op}" for op in method.__doc__.split('Operations:')[1].split('-')[1:]])
-    return [op.strip().split(':')[0] for op in operations if op.strip()]
+    # A new list per call, callers may extend or filter it
+    return list(OPERATIONS)
 
-AVAILABLE_OPERATIONS = get_available_operations()
\ No newline at end of file
+AVAILABLE_OPERATIONS = tuple(OPERATIONS)
@@ -0,0 +1,321 @@
+import math
+import random
+import threading
+from typing import Dict, List, Sequence, Tuple
+
+# Number theory engine behind MathToolkit.number_theory. Primality is
+# Miller-Rabin, deterministic below 2^64 and probabilistic above, and
+# factoring is trial division by small primes followed by Pollard-rho with
+# Brent's cycle detection. Any 64-bit input factors in milliseconds instead
+# of hanging a worker; the cost grows with the square root of the second
+# largest prime factor, so larger inputs are fast unless they are products of
+# two big primes. Small bulk queries are answered from a shared sieve that
+# grows one segment at a time and is kept for the life of the process.
+
+# The first 12 primes as bases make Miller-Rabin exact for every
+# n < 318665857834031151167461 (about 3.18 * 10^23), so all 64-bit inputs
+DETERMINISTIC_BASES = (2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37)
+# Extra random bases above that; each one that passes cuts the error bound by 4x
+PROBABILISTIC_ROUNDS = 16
+# Trial division limit before falling back to Pollard-rho
+TRIAL_LIMIT = 1000
+# The shared sieve answers is_prime directly up to this bound
+SIEVE_LIMIT = 1 << 20
+SEGMENT_SIZE = 1 << 16
+
+_SMALL_PRIMES = [p for p in range(2, TRIAL_LIMIT) if all(p % d for d in range(2, int(p ** 0.5) + 1))]
+
+
+class Sieve:
+    """
+    Sieve of Eratosthenes that grows lazily in fixed-size segments. Each
+    segment is crossed off with the base primes up to its square root, so
+    growing to n never re-sieves the range already covered.
+    """
+
+    def __init__(self, segment_size: int = SEGMENT_SIZE):
+        self.segment_size = segment_size
+        self.limit = 2
+        # flags[i] is 1 when i is prime, for 0 <= i < limit
+        self.flags = bytearray(b"\x00\x00")
+        self._lock = threading.Lock()
+
+    def extend(self, n: int):
+        """
+        Grow the sieve so it covers every integer below n.
+        """
+        if n <= self.limit:
+            return
+        with self._lock:
+            while self.limit < n:
+                self._add_segment(self.limit, self.limit + self.segment_size)
+
+    def _add_segment(self, low: int, high: int):
+        segment = bytearray(b"\x01") * (high - low)
+        for p in range(2, math.isqrt(high - 1) + 1):
+            # Base primes come from the part already sieved, or this segment
+            # itself while it is still being crossed off
+            if (self.flags[p] if p < low else segment[p - low]) == 0:
+                continue
+            start = max(p * p, (low + p - 1) // p * p)
+            if start < high:
+                segment[start - low::p] = bytes(len(range(start - low, high - low, p)))
+        self.flags += segment
+        self.limit = high
+
+    def is_prime(self, n: int) -> bool:
+        if n >= SIEVE_LIMIT:
+            return is_prime(n)
+        self.extend(n + 1)
+        return n >= 0 and self.flags[n] == 1
+
+    def primes(self, low: int, high: int) -> List[int]:
+        """
+        :return: The primes p with low <= p < high
+        """
+        low = max(low, 2)
+        if high <= low:
+            return []
+        if high <= SIEVE_LIMIT:
+            self.extend(high)
+            flags = self.flags
+            return [i for i in range(low, high) if flags[i]]
+        return _window_primes(self, low, high)
+
+
+def _window_primes(sieve: Sieve, low: int, high: int) -> List[int]:
+    # Ranges beyond the cached bound are sieved window by window and not kept
+    base = sieve.primes(2, math.isqrt(high - 1) + 1)
+    found = [p for p in base if p >= low]
+    low = max(low, math.isqrt(high - 1) + 1)
+    for start in range(low, high, SEGMENT_SIZE):
+        end = min(start + SEGMENT_SIZE, high)
+        window = bytearray(b"\x01") * (end - start)
+        for p in base:
+            first = max(p * p, (start + p - 1) // p * p)
+            if first < end:
+                window[first - start::p] = bytes(len(range(first - start, end - start, p)))
+        found.extend(start + i for i, flag in enumerate(window) if flag)
+    return found
+
+# Shared by every caller in the process
+sieve = Sieve()
+
+
+def is_prime(n: int) -> bool:
+    """
+    :param n: The integer to test
+    :return: True if n is prime. Exact below 2^64, wrong with probability
+             below 4^-PROBABILISTIC_ROUNDS above.
+    """
+    if n < 2:
+        return False
+    if n < SIEVE_LIMIT:
+        return sieve.is_prime(n)
+    for p in _SMALL_PRIMES:
+        if n % p == 0:
+            return n == p
+    if n < TRIAL_LIMIT * TRIAL_LIMIT:
+        return True
+
+    d, s = n - 1, 0
+    while d % 2 == 0:
+        d //= 2
+        s += 1
+
+    def witness(a: int) -> bool:
+        # True when a proves n composite
+        x = pow(a, d, n)
+        if x == 1 or x == n - 1:
+            return False
+        for _ in range(s - 1):
+            x = x * x % n
+            if x == n - 1:
+                return False
+        return True
+
+    if any(witness(a) for a in DETERMINISTIC_BASES):
+        return False
+    if n.bit_length() <= 64:
+        return True
+    return not any(witness(random.randrange(2, n - 1)) for _ in range(PROBABILISTIC_ROUNDS))
+
+
+def pollard_brent(n: int) -> int:
+    """
+    Find a nontrivial factor of an odd composite n with Pollard-rho, using
+    Brent's cycle detection and batched gcds.
+
+    :param n: An odd composite integer
+    :return: A factor d with 1 < d < n
+    """
+    if n % 2 == 0:
+        return 2
+    while True:
+        y, c, m = random.randrange(1, n), random.randrange(1, n), 128
+        g = r = q = 1
+        while g == 1:
+            x = y
+            for _ in range(r):
+                y = (y * y + c) % n
+            k = 0
+            while k < r and g == 1:
+                ys = y
+                for _ in range(min(m, r - k)):
+                    y = (y * y + c) % n
+                    q = q * abs(x - y) % n
+                g = math.gcd(q, n)
+                k += m
+            r *= 2
+        if g == n:
+            # The batch overshot; redo it one step at a time
+            g = 1
+            while g == 1:
+                ys = (ys * ys + c) % n
+                g = math.gcd(abs(x - ys), n)
+        if g != n:
+            return g
+        # Unlucky constant, retry with another
+
+
+def factorization(n: int) -> Dict[int, int]:
+    """
+    :param n: The integer to factor
+    :return: prime -> exponent, in increasing order of prime. Empty for n < 2.
+    """
+    factors: Dict[int, int] = {}
+    if n < 2:
+        return factors
+    for p in _SMALL_PRIMES:
+        if p * p > n:
+            break
+        while n % p == 0:
+            factors[p] = factors.get(p, 0) + 1
+            n //= p
+    stack = [n] if n > 1 else []
+    while stack:
+        m = stack.pop()
+        if is_prime(m):
+            factors[m] = factors.get(m, 0) + 1
+        else:
+            d = pollard_brent(m)
+            stack.extend((d, m // d))
+    return dict(sorted(factors.items()))
+
+
+def prime_factors(n: int) -> List[int]:
+    """
+    :return: The prime factors of n in increasing order, with multiplicity
+    """
+    return [p for p, k in factorization(n).items() for _ in range(k)]
+
+
+def euler_totient(n: int) -> int:
+    """
+    :return: The number of integers in [1, n] coprime to n
+    """
+    if n < 1:
+        return 0
+    result = n
+    for p in factorization(n):
+        result = result // p * (p - 1)
+    return result
+
+
+def extended_gcd(a: int, b: int) -> Tuple[int, int, int]:
+    """
+    :return: (g, x, y) with g = gcd(a, b) >= 0 and a*x + b*y = g
+    """
+    x0, y0, x1, y1 = 1, 0, 0, 1
+    while b:
+        q, r = divmod(a, b)
+        a, b = b, r
+        x0, x1 = x1, x0 - q * x1
+        y0, y1 = y1, y0 - q * y1
+    if a < 0:
+        return -a, -x0, -y0
+    return a, x0, y0
+
+
+def mod_inverse(a: int, modulus: int) -> int:
+    """
+    :return: x in [0, modulus) with a*x = 1 (mod modulus)
+    """
+    if modulus < 1:
+        raise ValueError(f"Modulus must be positive, got {modulus}")
+    g, x, _ = extended_gcd(a % modulus, modulus)
+    if g != 1:
+        raise ValueError(f"{a} has no inverse modulo {modulus}, gcd is {g}")
+    return x % modulus
+
+
+def _product_tree(values: List[int]) -> List[List[int]]:
+    # Leaves first, each level the pairwise products of the one below
+    tree = [values]
+    while len(tree[-1]) > 1:
+        level = tree[-1]
+        tree.append([level[i] * level[i + 1] for i in range(0, len(level) - 1, 2)] + level[len(level) - len(level) % 2:])
+    return tree
+
+
+def _crt_coprime(remainders: List[int], moduli: List[int]) -> Tuple[int, int]:
+    # x = sum(c_i * M/m_i) mod M with c_i = r_i * (M/m_i)^-1 (mod m_i). M/m_i mod
+    # m_i is (M mod m_i^2) // m_i, read off a remainder tree, so every inverse is
+    # taken modulo one small m_i. The inverse fails exactly when two moduli
+    # share a factor.
+    tree = _product_tree(moduli)
+    product = tree[-1][0]
+    rems = [product]
+    for level in reversed(tree[:-1]):
+        rems = [rems[i // 2] % (m * m) for i, m in enumerate(level)]
+    level = [(r * pow(rem // m, -1, m) % m, m) for r, rem, m in zip(remainders, rems, moduli)]
+    while len(level) > 1:
+        merged = [(s1 * m2 + s2 * m1, m1 * m2) for (s1, m1), (s2, m2) in zip(level[::2], level[1::2])]
+        level = merged + level[len(level) - len(level) % 2:]
+    return level[0][0] % product, product
+
+
+def _crt_fold(remainders: List[int], moduli: List[int]) -> Tuple[int, int]:
+    # Fold the congruences in one at a time. Merging x (mod M) with r (mod m),
+    # where g = gcd(M, m), gives x + M*t (mod M*m/g) for
+    # t = (r - x)/g * (M/g)^-1 (mod m/g); every inverse is taken modulo m/g,
+    # so the big operands only ever meet a small one.
+    x, product = 0, 1
+    for r, m in zip(remainders, moduli):
+        g = math.gcd(product, m)
+        diff = (r - x) % m
+        if diff % g:
+            raise ValueError(f"No solution: x = {r} (mod {m}) disagrees with the earlier congruences modulo {g}")
+        step = m // g
+        if step > 1:
+            # g divides m, so (M/g) mod (m/g) is (M mod m)/g
+            t = diff // g * mod_inverse(product % m // g, step) % step
+            x += product * t
+            product *= step
+    return x, product
+
+
+def crt(remainders: Sequence[int], moduli: Sequence[int]) -> Tuple[int, int]:
+    """
+    Solve a system of congruences x = remainders[i] (mod moduli[i]). The
+    moduli need not be coprime. Pairwise coprime moduli go through product
+    and remainder trees; otherwise the congruences are folded in one by one.
+    Either way every inverse is taken modulo a single input modulus.
+
+    :return: (x, lcm of the moduli), the smallest non-negative solution and
+             the modulus it is unique to
+    :raises ValueError: When the congruences are inconsistent
+    """
+    if len(remainders) != len(moduli):
+        raise ValueError(f"Got {len(remainders)} remainders for {len(moduli)} moduli")
+    if any(m < 1 for m in moduli):
+        raise ValueError("Moduli must be positive")
+    if not moduli:
+        return 0, 1
+    moduli = list(moduli)
+    remainders = [r % m for r, m in zip(remainders, moduli)]
+    try:
+        return _crt_coprime(remainders, moduli)
+    except ValueError:
+        # Two moduli share a factor
+        return _crt_fold(remainders, moduli)
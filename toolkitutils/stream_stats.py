@@ -0,0 +1,229 @@
+import itertools
+import math
+from collections import Counter
+from typing import Any, Dict, Iterable, Optional
+
+import numpy as np
+
+# Single-pass statistics for MathToolkit.statistics. Data arrives as one
+# sequence, an iterator, or chunks, and each value is read exactly once.
+# NumPy arrays and other buffer-protocol objects are viewed, not copied, and
+# are reduced a chunk at a time in C; plain iterators are gathered into
+# fixed-size chunks first, so memory stays bounded however long the stream.
+
+# Values gathered from an iterator before they are reduced as one chunk
+CHUNK_SIZE = 1 << 16
+# Values kept for the approximate median; the median is exact up to this count
+SAMPLE_SIZE = 1 << 14
+
+
+class StreamingStats:
+    """
+    Accumulates count, mean, variance (Welford, merged across chunks with
+    Chan's update), min, max, mode and median in one pass.
+
+    The mode is an exact hash count, so its memory grows with the number of
+    distinct values; pass track_mode=False for continuous data. The median
+    comes from a uniform reservoir sample of sample_size values: exact while
+    the count fits, otherwise accurate to about 1/sqrt(sample_size) in rank.
+    sample_size=0 skips the sample and the median with it.
+    """
+
+    def __init__(self, track_mode: bool = True, sample_size: int = SAMPLE_SIZE, seed: Optional[int] = None):
+        self.count = 0
+        self._mean = 0.0
+        self._m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        self.counts: Optional[Counter] = Counter() if track_mode else None
+        self.sample_size = sample_size
+        self._sample = np.empty(sample_size)
+        self._rng = np.random.default_rng(seed)
+
+    def update(self, data: Any) -> "StreamingStats":
+        """
+        :param data: An array, buffer, sequence or iterator of numbers
+        :return: self, so calls chain
+        """
+        if isinstance(data, np.ndarray) or _is_buffer(data):
+            # A view over the caller's memory, reduced in slices so temporaries stay chunk-sized
+            values = as_array(data)
+            for start in range(0, values.size, CHUNK_SIZE):
+                self._update_chunk(values[start:start + CHUNK_SIZE])
+            return self
+        iterator = iter(data)
+        while True:
+            chunk = list(itertools.islice(iterator, CHUNK_SIZE))
+            if not chunk:
+                return self
+            self._update_chunk(np.asarray(chunk))
+
+    def update_chunks(self, chunks: Iterable[Any]) -> "StreamingStats":
+        for chunk in chunks:
+            self.update(chunk)
+        return self
+
+    def _update_chunk(self, chunk: np.ndarray):
+        n = chunk.size
+        if n == 0:
+            return
+        if chunk.dtype.kind == "O":
+            # Integers too large for int64 end up as objects
+            chunk = chunk.astype(np.float64)
+        elif chunk.dtype.kind not in "biuf":
+            raise ValueError(f"Statistics need numeric data, got {chunk.dtype}")
+        if self.counts is not None:
+            values, frequencies = np.unique(chunk, return_counts=True)
+            self.counts.update(dict(zip(values.tolist(), frequencies.tolist())))
+
+        # Chan's parallel update folds the chunk's own mean and M2 into the running ones
+        chunk_mean = float(chunk.mean(dtype=np.float64))
+        chunk_m2 = float(np.square(chunk - chunk_mean, dtype=np.float64).sum())
+        total = self.count + n
+        delta = chunk_mean - self._mean
+        self._mean += delta * n / total
+        self._m2 += chunk_m2 + delta * delta * self.count * n / total
+        self.min = min(self.min, chunk.min().item())
+        self.max = max(self.max, chunk.max().item())
+        if self.sample_size:
+            self._sample_chunk(chunk, self.count)
+        self.count = total
+
+    def _sample_chunk(self, chunk: np.ndarray, seen: int):
+        # Reservoir sampling (Algorithm R) for a whole chunk: element i is kept
+        # at slot j, uniform over [0, seen + i], when j lands inside the
+        # reservoir. Fancy assignment keeps the last write, as the serial loop would.
+        fill = max(min(self.sample_size - seen, chunk.size), 0)
+        self._sample[seen:seen + fill] = chunk[:fill]
+        rest = chunk[fill:]
+        if rest.size:
+            slots = self._rng.integers(0, seen + fill + np.arange(rest.size) + 1)
+            keep = slots < self.sample_size
+            self._sample[slots[keep]] = rest[keep]
+
+    def _require_data(self):
+        if self.count == 0:
+            raise ValueError("No data")
+
+    @property
+    def mean(self) -> float:
+        self._require_data()
+        return self._mean
+
+    @property
+    def variance(self) -> float:
+        """
+        Population variance, dividing by the count.
+        """
+        self._require_data()
+        return self._m2 / self.count
+
+    @property
+    def standard_deviation(self) -> float:
+        return math.sqrt(self.variance)
+
+    @property
+    def range(self):
+        self._require_data()
+        return self.max - self.min
+
+    @property
+    def mode(self):
+        self._require_data()
+        if self.counts is None:
+            raise ValueError("Mode is not tracked, create the accumulator with track_mode=True")
+        return self.counts.most_common(1)[0][0]
+
+    @property
+    def median(self) -> float:
+        self._require_data()
+        if not self.sample_size:
+            raise ValueError("Median is not tracked, create the accumulator with sample_size > 0")
+        return median(self._sample[:min(self.count, self.sample_size)])
+
+    def summary(self) -> Dict[str, Any]:
+        result = {
+            "count": self.count,
+            "mean": self.mean,
+            "variance": self.variance,
+            "standard_deviation": self.standard_deviation,
+            "min": self.min,
+            "max": self.max,
+            "range": self.range,
+        }
+        if self.sample_size:
+            result["median"] = self.median
+        if self.counts is not None:
+            result["mode"] = self.mode
+        return result
+
+
+def _is_buffer(data: Any) -> bool:
+    try:
+        memoryview(data)
+    except TypeError:
+        return False
+    # bytes and bytearray are buffers too, but of characters rather than numbers
+    return not isinstance(data, (bytes, bytearray))
+
+
+def as_array(data: Any) -> np.ndarray:
+    """
+    :return: data as a flat array, a view when it already is an array or a buffer
+    """
+    if isinstance(data, np.ndarray) or _is_buffer(data):
+        return np.asarray(data).reshape(-1)
+    if not isinstance(data, (list, tuple)):
+        data = list(data)
+    return np.asarray(data)
+
+
+def mean(data: Any) -> float:
+    """
+    Mean in one pass. Lists and tuples are summed directly with math.fsum,
+    which is faster than converting them to an array and exact to the last bit.
+    """
+    if isinstance(data, (list, tuple)):
+        if not data:
+            raise ValueError("No data")
+        return math.fsum(data) / len(data)
+    return summarize(data, track_mode=False, sample_size=0).mean
+
+
+def median(data: Any) -> float:
+    """
+    Exact median by selection rather than a full sort: np.partition places
+    the middle elements in O(n).
+    """
+    values = as_array(data)
+    n = values.size
+    if n == 0:
+        raise ValueError("No data")
+    middle = n // 2
+    if n % 2:
+        return np.partition(values, middle)[middle].item()
+    lower, upper = np.partition(values, (middle - 1, middle))[middle - 1:middle + 1]
+    return (lower.item() + upper.item()) / 2
+
+
+def mode(data: Any):
+    """
+    Most common value by hash count, in one pass. Arrays are counted with
+    np.unique; anything else may hold any hashable values.
+    """
+    if isinstance(data, np.ndarray) or _is_buffer(data):
+        values, frequencies = np.unique(as_array(data), return_counts=True)
+        if values.size == 0:
+            raise ValueError("No data")
+        return values[frequencies.argmax()].item()
+    counts = Counter(data)
+    if not counts:
+        raise ValueError("No data")
+    return counts.most_common(1)[0][0]
+
+
+def summarize(data: Any, track_mode: bool = True, sample_size: int = SAMPLE_SIZE) -> StreamingStats:
+    """
+    :return: A StreamingStats after one pass over data
+    """
+    return StreamingStats(track_mode=track_mode, sample_size=sample_size).update(data)
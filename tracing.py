@@ -0,0 +1,235 @@
+import contextvars
+import logging
+import os
+import queue
+import random
+import threading
+import time
+import urllib.request
+from bisect import bisect_left
+from contextlib import contextmanager
+from json import dumps
+
+# Request tracing for the serving hot path. Every finished span is observed in
+# a Prometheus histogram labelled by span name and model (served at /metrics),
+# and, when OTLP_ENDPOINT is set, exported as OTLP/HTTP JSON to a collector.
+# `python otlp_collector.py` is a local stand-in for one.
+OTLP_ENDPOINT = os.environ.get("OTLP_ENDPOINT", "")
+OTLP_FLUSH_INTERVAL = float(os.environ.get("OTLP_FLUSH_INTERVAL", 1))
+OTLP_MAX_QUEUE = 10000
+SERVICE_NAME = os.environ.get("OTEL_SERVICE_NAME", "thalamus")
+
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+
+class Histogram:
+    """
+    Cumulative histogram rendered in the Prometheus text format.
+    """
+
+    def __init__(self, name, help, label_names, buckets=BUCKETS):
+        self.name = name
+        self.help = help
+        self.label_names = label_names
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        # label values -> [per-bucket counts (last is +Inf), sum]
+        self._series = {}
+
+    def observe(self, value, **labels):
+        key = tuple(str(labels.get(name, "")) for name in self.label_names)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][bisect_left(self.buckets, value)] += 1
+            series[1] += value
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = {key: (list(counts), total) for key, (counts, total) in self._series.items()}
+        for key, (counts, total) in sorted(series.items()):
+            labels = ",".join(f'{name}="{value}"' for name, value in zip(self.label_names, key))
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), counts):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f"{self.name}_sum{{{labels}}} {total}")
+            lines.append(f"{self.name}_count{{{labels}}} {cumulative}")
+        return lines
+
+
+span_duration = Histogram("thalamus_span_duration_seconds", "Duration of traced request phases.", ("span", "model"))
+
+
+class Span:
+    __slots__ = ("name", "trace_id", "span_id", "parent_id", "attributes", "start_ns", "end_ns", "error")
+
+    def __init__(self, name, parent=None, start_ns=None, **attributes):
+        self.name = name
+        self.trace_id = parent.trace_id if parent else f"{random.getrandbits(128):032x}"
+        self.span_id = f"{random.getrandbits(64):016x}"
+        self.parent_id = parent.span_id if parent else None
+        self.attributes = attributes
+        self.start_ns = start_ns or time.time_ns()
+        self.end_ns = None
+        self.error = None
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    @property
+    def duration(self):
+        return ((self.end_ns or time.time_ns()) - self.start_ns) / 1e9
+
+    def end(self, error=None):
+        """
+        Finish the span and publish it. Later calls are ignored.
+
+        :param error: The exception that ended the span, if any
+        """
+        if self.end_ns is not None:
+            return
+        self.end_ns = time.time_ns()
+        if error is not None:
+            self.error = f"{type(error).__name__}: {error}"
+        span_duration.observe(self.duration, span=self.name, model=self.attributes.get("model", ""))
+        if OTLP_ENDPOINT:
+            exporter().submit(self)
+
+
+_current = contextvars.ContextVar("thalamus_span", default=None)
+
+def current_span():
+    return _current.get()
+
+def activate(span):
+    """
+    Make span the parent of spans started later in this thread or task. Used
+    for request roots and provider attempts, which own their thread or task.
+    """
+    _current.set(span)
+
+def start_span(name, parent=None, **attributes):
+    """
+    Start a span under parent, or under the active span. The caller ends it.
+    """
+    return Span(name, parent or _current.get(), **attributes)
+
+@contextmanager
+def span(name, **attributes):
+    """
+    Trace a block that does not yield across requests. Spans started inside
+    it become its children.
+    """
+    s = start_span(name, **attributes)
+    token = _current.set(s)
+    try:
+        yield s
+    except BaseException as e:
+        s.end(error=e)
+        raise
+    finally:
+        _current.reset(token)
+        s.end()
+
+def record(name, duration, parent=None, **attributes):
+    """
+    Publish a span that already finished, e.g. time to first byte measured
+    by the caller.
+
+    :param duration: Seconds, the span is taken to end now
+    """
+    s = Span(name, parent or _current.get(), start_ns=time.time_ns() - int(duration * 1e9), **attributes)
+    s.end()
+    return s
+
+def render_metrics():
+    return "\n".join(span_duration.render()) + "\n"
+
+
+def _otlp_value(value):
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+def otlp_span(span):
+    encoded = {
+        "traceId": span.trace_id,
+        "spanId": span.span_id,
+        "name": span.name,
+        # SPAN_KIND_INTERNAL
+        "kind": 1,
+        "startTimeUnixNano": str(span.start_ns),
+        "endTimeUnixNano": str(span.end_ns),
+        "attributes": [{"key": k, "value": _otlp_value(v)} for k, v in span.attributes.items()],
+        # STATUS_CODE_ERROR or STATUS_CODE_OK
+        "status": {"code": 2, "message": span.error} if span.error else {"code": 1},
+    }
+    if span.parent_id:
+        encoded["parentSpanId"] = span.parent_id
+    return encoded
+
+
+class OTLPExporter:
+    """
+    Batches finished spans and posts them to {endpoint}/v1/traces from a
+    daemon thread. Spans are dropped, never blocked on, when the collector
+    falls behind.
+    """
+
+    def __init__(self, endpoint, flush_interval=OTLP_FLUSH_INTERVAL, max_queue=OTLP_MAX_QUEUE):
+        self.url = endpoint.rstrip("/") + "/v1/traces"
+        self.flush_interval = flush_interval
+        self.queue = queue.Queue(max_queue)
+        self.dropped = 0
+        threading.Thread(target=self._loop, name="otlp-export", daemon=True).start()
+
+    def submit(self, span):
+        try:
+            self.queue.put_nowait(span)
+        except queue.Full:
+            self.dropped += 1
+
+    def _drain(self):
+        spans = []
+        while True:
+            try:
+                spans.append(self.queue.get_nowait())
+            except queue.Empty:
+                return spans
+
+    def _loop(self):
+        while True:
+            time.sleep(self.flush_interval)
+            spans = self._drain()
+            if spans:
+                self.export(spans)
+
+    def export(self, spans):
+        body = dumps({"resourceSpans": [{
+            "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": SERVICE_NAME}}]},
+            "scopeSpans": [{"scope": {"name": "thalamus"}, "spans": [otlp_span(s) for s in spans]}],
+        }]}).encode()
+        request = urllib.request.Request(self.url, data=body, headers={"Content-Type": "application/json"})
+        try:
+            urllib.request.urlopen(request, timeout=5).close()
+        except OSError as e:
+            logging.warning(f"Could not export {len(spans)} spans to {self.url}: {e}")
+
+
+_exporter = None
+_exporter_lock = threading.Lock()
+
+def exporter():
+    global _exporter
+    if _exporter is None:
+        with _exporter_lock:
+            if _exporter is None:
+                _exporter = OTLPExporter(OTLP_ENDPOINT)
+    return _exporter
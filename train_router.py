@@ -0,0 +1,93 @@
+"""
+Train the routing classifier offline and write canned/router_weights.json.
+
+    python train_router.py --data canned/router_prompts.jsonl
+
+The data file is JSON lines of {"text": ..., "model": ...}, where model is one
+of thalamus.models.
+"""
+import argparse
+import json
+import math
+import random
+
+from router import WEIGHTS_PATH, Router, extract_features
+from thalamus import models
+
+DATA_PATH = "canned/router_prompts.jsonl"
+
+def load_examples(path):
+    examples = []
+    with open(path) as f:
+        for line in f:
+            if line.strip():
+                row = json.loads(line)
+                if row["model"] not in models:
+                    raise ValueError(f"Unknown model label: {row['model']}")
+                examples.append((row["text"], row["model"]))
+    return examples
+
+def train(examples, labels, epochs=40, learning_rate=0.5, l2=1e-4, seed=0):
+    """
+    Fit the multinomial logistic regression with plain SGD.
+
+    :return: A Router holding the learned weights
+    """
+    rng = random.Random(seed)
+    index = {label: i for i, label in enumerate(labels)}
+    featurized = [(extract_features(text), index[label]) for text, label in examples]
+    weights = {}
+
+    for epoch in range(epochs):
+        rng.shuffle(featurized)
+        rate = learning_rate / (1 + epoch * 0.1)
+        for features, target in featurized:
+            scores = [0.0] * len(labels)
+            for key, value in features.items():
+                row = weights.get(key)
+                if row is not None:
+                    for i, w in enumerate(row):
+                        scores[i] += value * w
+            top = max(scores)
+            exps = [math.exp(s - top) for s in scores]
+            total = sum(exps)
+            for key, value in features.items():
+                row = weights.setdefault(key, [0.0] * len(labels))
+                for i in range(len(labels)):
+                    gradient = (exps[i] / total - (1.0 if i == target else 0.0)) * value
+                    row[i] -= rate * (gradient + l2 * row[i])
+
+    return Router(labels, weights)
+
+def accuracy(router, examples):
+    return sum(router.predict(text)[0] == label for text, label in examples) / len(examples)
+
+def cross_validate(examples, labels, folds=5):
+    shuffled = examples[:]
+    random.Random(1).shuffle(shuffled)
+    scores = []
+    for k in range(folds):
+        held_out = shuffled[k::folds]
+        training = [e for i, e in enumerate(shuffled) if i % folds != k]
+        scores.append(accuracy(train(training, labels), held_out))
+    return sum(scores) / folds
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--data", default=DATA_PATH)
+    parser.add_argument("--out", default=WEIGHTS_PATH)
+    parser.add_argument("--epochs", type=int, default=40)
+    args = parser.parse_args()
+
+    examples = load_examples(args.data)
+    labels = [m for m in models if any(label == m for _, label in examples)]
+
+    print(f"{len(examples)} examples, {len(labels)} labels")
+    print(f"5-fold accuracy: {cross_validate(examples, labels):.3f}")
+    router = train(examples, labels, epochs=args.epochs)
+    print(f"training accuracy: {accuracy(router, examples):.3f}")
+    router.save(args.out)
+    print(f"wrote {args.out}")
+
+if __name__ == "__main__":
+    main()
@@ -1,21 +1,11 @@
-import llmsetup
-from langchain_community.llms import OpenAI, Anthropic
-from langchain_google import GoogleVertexAI
-from langchain_community.llms import HuggingFaceHub
+import sys
 
-llms = []
+import warmup
 
-for config in llmsetup.llm_config["config_list"]:
-    if config["model"].startswith("gpt-"):
-        llms.append(OpenAI(model=config["model"], api_key=config["api_key"]))
-    elif config["model"].startswith("claude-"):
-        llms.append(Anthropic(model=config["model"], api_key=config["api_key"]))
-    elif config["model"].startswith("gemini-"):
-        model = genai.GenerativeModel("gemini-1.5-flash")
-    else:  # Hugging Face models
-        llms.append(HuggingFaceHub(repo_id=config["model"], huggingfacehub_api_token=config["token"]))
-
-# Check if working
-for llm in llms:
-    response = llm("Hello, world!")
-    print(f"Response from {llm.__class__.__name__} ({llm.model if hasattr(llm, 'model') else 'Unknown model'}): {response}")
\ No newline at end of file
+# Probe every configured backend once, concurrently, and report readiness.
+# Exits non-zero if no backend came up.
+snapshot = warmup.probe_all()
+for backend, entry in snapshot.items():
+    detail = entry["error"] or f"{entry['latency_ms']} ms"
+    print(f"{backend}: {entry['status']} ({detail})")
+sys.exit(0 if warmup.readiness.ready() else 1)
@@ -0,0 +1,169 @@
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from functools import partial
+
+import llmsetup
+from clients import OLLAMA_KEEP_ALIVE, OLLAMA_MODELS, OLLAMA_TRANSPORT, get_client
+from ssh_pool import TARGET_HOSTS, get_pool
+
+WARMUP_TIMEOUT = float(os.environ.get("WARMUP_TIMEOUT", 10))
+# Re-probing well inside OLLAMA_KEEP_ALIVE keeps the self-hosted models resident
+WARMUP_INTERVAL = float(os.environ.get("WARMUP_INTERVAL", 60))
+
+READY = "ready"
+DOWN = "down"
+UNKNOWN = "unknown"
+
+
+class Readiness:
+    """
+    Per-backend readiness published by the warm-up probes. Backends that have
+    not been probed yet are UNKNOWN and still routable.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._backends = {}
+
+    def mark(self, backend, status, latency=None, error=None):
+        with self._lock:
+            self._backends[backend] = {
+                "status": status,
+                "latency_ms": None if latency is None else round(latency * 1000, 1),
+                "error": error,
+                "checked_at": time.time(),
+            }
+
+    def status(self, backend):
+        with self._lock:
+            entry = self._backends.get(backend)
+        return entry["status"] if entry else UNKNOWN
+
+    def ready(self):
+        """
+        :return: True when at least one backend can serve requests
+        """
+        with self._lock:
+            return any(entry["status"] == READY for entry in self._backends.values())
+
+    def available(self, ranked, backend_for=llmsetup.backend_for):
+        """
+        Drop models whose backend failed its last probe.
+
+        :param ranked: (model, probability) pairs, best first
+        :return: The routable pairs, or ranked unchanged if none are
+        """
+        return [(m, p) for m, p in ranked if self.status(backend_for(m)) != DOWN] or ranked
+
+    def snapshot(self):
+        with self._lock:
+            return {backend: dict(entry) for backend, entry in self._backends.items()}
+
+
+readiness = Readiness()
+
+
+def probe_openai(timeout):
+    # Listing models opens a pooled connection without spending tokens
+    get_client("openai").with_options(timeout=timeout).models.list()
+
+def probe_anthropic(timeout):
+    get_client("anthropic").with_options(timeout=timeout).models.list(limit=1)
+
+def probe_gemini(timeout):
+    import google.generativeai as genai
+    model = get_client("gemini")
+    genai.get_model(model.model_name, request_options={"timeout": timeout})
+
+def probe_ollama(modal, timeout):
+    if OLLAMA_TRANSPORT == "cli":
+        if not get_pool().get(TARGET_HOSTS[modal]).probe():
+            raise ConnectionError(f"SSH tunnel to {TARGET_HOSTS[modal]} is not active")
+        return
+    # Opens the tunnel and forwarded port. An empty prompt loads the model onto
+    # the GPU and resets its keep_alive timer without generating anything.
+    get_client(f"ollama_{modal}").generate(model=OLLAMA_MODELS[modal], prompt="", keep_alive=OLLAMA_KEEP_ALIVE)
+
+PROBES = {
+    "openai": probe_openai,
+    "anthropic": probe_anthropic,
+    "gemini": probe_gemini,
+    "llama": partial(probe_ollama, "llama"),
+    "mistral": partial(probe_ollama, "mistral"),
+}
+
+def configured_backends():
+    backends = []
+    for config in llmsetup.llm_config["config_list"]:
+        try:
+            backend = llmsetup.backend_for(config["model"])
+        except ValueError:
+            continue
+        if backend not in backends:
+            backends.append(backend)
+    return backends
+
+def _probe(backend, timeout):
+    start = time.perf_counter()
+    try:
+        PROBES[backend](timeout)
+    except Exception as e:
+        logging.warning(f"Warm-up probe for {backend} failed: {e}")
+        readiness.mark(backend, DOWN, time.perf_counter() - start, f"{type(e).__name__}: {e}")
+    else:
+        readiness.mark(backend, READY, time.perf_counter() - start)
+
+# One worker per backend for the life of the process. A probe hung on a dead
+# connection keeps its worker, and its backend is skipped until it returns.
+_executor = ThreadPoolExecutor(max_workers=len(PROBES), thread_name_prefix="warmup")
+_running = {}  # backend -> future of its latest probe
+_running_lock = threading.Lock()
+
+def probe_all(backends=None, timeout=WARMUP_TIMEOUT):
+    """
+    Probe every backend concurrently, so warm-up takes as long as the slowest
+    backend rather than the sum of them. A probe that outlives the timeout is
+    marked down now and marks itself ready if it completes later; until then
+    its backend is not probed again.
+
+    :param backends: Keys of PROBES, every backend in llmsetup.llm_config by default
+    :return: The readiness snapshot
+    """
+    backends = backends or configured_backends()
+    futures = {}
+    with _running_lock:
+        for backend in backends:
+            previous = _running.get(backend)
+            if previous is not None and not previous.done():
+                continue
+            future = _executor.submit(_probe, backend, timeout)
+            _running[backend] = future
+            futures[future] = backend
+    if futures:
+        _, pending = wait(futures, timeout=timeout)
+        for future in pending:
+            readiness.mark(futures[future], DOWN, timeout, f"Timed out after {timeout}s")
+    return readiness.snapshot()
+
+_started = threading.Event()
+
+def start(interval=WARMUP_INTERVAL, timeout=WARMUP_TIMEOUT):
+    """
+    Warm every backend on a daemon thread, then keep re-probing every interval
+    seconds so readiness stays current. Calling it again is a no-op.
+    """
+    if _started.is_set():
+        return
+    _started.set()
+
+    def loop():
+        while True:
+            probe_all(timeout=timeout)
+            if interval <= 0:
+                return
+            time.sleep(interval)
+
+    threading.Thread(target=loop, name="warmup", daemon=True).start()